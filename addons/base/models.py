@@ -1,6 +1,5 @@
 import abc
 import os
-import time
 
 import markupsafe
 import requests
@@ -16,6 +15,7 @@ from osf.models.user import OSFUser
 from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
 from website import settings
 from addons.base import logger, serializer
+from addons.base.utils import crawl_file_tree, get_rate_limiter
 from website.oauth.signals import oauth_complete
 from website.util import waterbutler_api_url_for
 
@@ -585,9 +585,6 @@ class BaseStorageAddon(object):
         if res.status_code != 200:
             raise HTTPError(res.status_code, data={'error': res.json()})
 
-        # TODO: better throttling?
-        time.sleep(1.0 / 5.0)
-
         data = res.json().get('data', None)
         if data:
             return [child['attributes'] for child in data]
@@ -597,23 +594,36 @@ class BaseStorageAddon(object):
         """
         Recursively get file metadata
         """
-        filenode = filenode or {
+        filenode = filenode or self._get_root_filenode()
+        for folder, children in self._iter_file_tree(filenode, user, cookie=cookie, version=version):
+            pass
+        return filenode
+
+    def _iter_file_tree(self, filenode=None, user=None, cookie=None, version=None):
+        """
+        Stream the file metadata under `filenode` as (folder, children) pairs while the tree
+        is being crawled. Sibling folders are listed concurrently, rate limited per provider.
+        """
+        filenode = filenode or self._get_root_filenode()
+        # Do the database work up front rather than from the crawler's threads
+        self.owner._id
+        if not cookie and user:
+            cookie = user.get_or_create_cookie()
+
+        def list_children(folder):
+            # Only the folder the crawl starts from is listed at `version`
+            return self._get_fileobj_child_metadata(
+                folder, user, cookie=cookie, version=version if folder is filenode else None
+            )
+
+        return crawl_file_tree(filenode, list_children, rate_limiter=get_rate_limiter(self.config.short_name))
+
+    def _get_root_filenode(self):
+        return {
             'path': '/',
             'kind': 'folder',
             'name': self.root_node.name,
         }
-        if filenode.get('kind') == 'file':
-            return filenode
-
-        kwargs = {
-            'version': version,
-            'cookie': cookie,
-        }
-        filenode['children'] = [
-            self._get_file_tree(child, user, cookie=cookie)
-            for child in self._get_fileobj_child_metadata(filenode, user, **kwargs)
-        ]
-        return filenode
 
 
 class BaseOAuthNodeSettings(BaseNodeSettings):
@@ -1,5 +1,12 @@
+import httplib as http
+import threading
+import time
+from multiprocessing.pool import ThreadPool
 from os.path import basename
 
+import requests
+
+from framework.exceptions import HTTPError
 from website import settings
 
 def serialize_addon_config(config, user):
@@ -20,3 +27,90 @@ def serialize_addon_config(config, user):
 def get_addons_by_config_type(config_type, user):
     addons = [addon for addon in settings.ADDONS_AVAILABLE if config_type in addon.configs]
     return [serialize_addon_config(addon_config, user) for addon_config in sorted(addons, key=lambda cfg: cfg.full_name.lower())]
+
+
+class TokenBucket(object):
+    """Thread-safe token bucket allowing `rate` calls per second, in bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = capacity or max(1, rate)
+        self._tokens = self.capacity
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the next call is allowed."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.time()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider):
+    """The process-wide limiter of WaterButler metadata requests for `provider`."""
+    with _rate_limiters_lock:
+        if provider not in _rate_limiters:
+            _rate_limiters[provider] = TokenBucket(settings.WATERBUTLER_METADATA_RATE_LIMIT)
+        return _rate_limiters[provider]
+
+
+def _is_retryable(error):
+    if isinstance(error, HTTPError):
+        return error.code >= http.INTERNAL_SERVER_ERROR
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def crawl_file_tree(root, list_children, rate_limiter=None, workers=None, retries=None, backoff=None):
+    """Crawl a file tree breadth first, listing the folders of each level concurrently.
+
+    :param dict root: metadata of the folder to start from
+    :param list_children: callable returning the metadata of a folder's children
+    :param TokenBucket rate_limiter: acquired before each call to `list_children`
+    :return: generator of (folder, children) pairs in the order folders get listed. Each folder's
+        `children` is set before it is yielded, so the tree under `root` is complete once the
+        generator is exhausted.
+    """
+    workers = workers or settings.FILE_TREE_CRAWLER_WORKERS
+    retries = settings.FILE_TREE_CRAWLER_RETRIES if retries is None else retries
+    backoff = settings.FILE_TREE_CRAWLER_BACKOFF if backoff is None else backoff
+
+    def list_folder(folder):
+        attempt = 0
+        while True:
+            if rate_limiter:
+                rate_limiter.acquire()
+            try:
+                return folder, list_children(folder)
+            except Exception as error:
+                if attempt >= retries or not _is_retryable(error):
+                    raise
+                time.sleep(backoff * 2 ** attempt)
+                attempt += 1
+
+    if root.get('kind') == 'file':
+        return
+    pool = ThreadPool(workers)
+    try:
+        level = [root]
+        while level:
+            next_level = []
+            for folder, children in pool.imap_unordered(list_folder, level):
+                folder['children'] = children
+                next_level.extend(child for child in children if child.get('kind') != 'file')
+                yield folder, children
+            level = next_level
+    finally:
+        pool.terminate()
@@ -373,6 +373,40 @@ class OsfStorageFolder(OsfStorageFileNode, Folder):
                     return True
         return False
 
+    def _trash_descendants(self, user, deleted_on, store_paths=True):
+        from website.search import search
+
+        # Paths are computed from the tree, they must be stored before the tree is trashed
+        file_ids = super(OsfStorageFolder, self)._trash_descendants(user, deleted_on, store_paths=True)
+        if file_ids:
+            search.bulk_delete_files(file_ids)
+        return file_ids
+
+    def _move_descendants(self):
+        from website.search import search
+
+        file_ids = super(OsfStorageFolder, self)._move_descendants()
+        if file_ids:
+            search.bulk_update_files(self.node, file_ids=file_ids)
+        return file_ids
+
+    def _restore_descendants(self, deleted_on, file_type, folder_type):
+        from website.search import search
+
+        file_ids = super(OsfStorageFolder, self)._restore_descendants(deleted_on, file_type, folder_type)
+        if file_ids:
+            search.bulk_update_files(self.node, file_ids=file_ids)
+        return file_ids
+
+    def _copy_descendants(self, src, batch_size=None):
+        from website.search import search
+
+        file_ids = super(OsfStorageFolder, self)._copy_descendants(src, batch_size=batch_size)
+        if file_ids:
+            # A copied storage root holds every file of its node, e.g. on fork
+            search.bulk_update_files(self.node, file_ids=file_ids if self.parent_id else None)
+        return file_ids
+
     def serialize(self, include_full=False, version=None):
         # Versions just for compatibility
         ret = super(OsfStorageFolder, self).serialize()
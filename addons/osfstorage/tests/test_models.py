@@ -5,6 +5,8 @@ import unittest
 
 import pytest
 import pytz
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from nose.tools import *  # noqa
 
@@ -220,6 +222,49 @@ class TestOsfstorageFileNode(StorageTestCase):
                 None
             )
 
+    @mock.patch('website.search.search.bulk_delete_files')
+    def test_delete_nested_folder(self, mock_delete_files):
+        folder = self.node_settings.get_root().append_folder('Test')
+        subfolder = folder.append_folder('Sub')
+        kid = subfolder.append_file('Kid')
+
+        folder.delete(user=self.user)
+
+        trashed_subfolder = models.TrashedFileNode.load(subfolder._id)
+        trashed_kid = models.TrashedFileNode.load(kid._id)
+        assert_equal(trashed_subfolder.kind, 'folder')
+        assert_equal(trashed_subfolder.path, '/{}/'.format(subfolder._id))
+        assert_equal(trashed_subfolder.materialized_path, '/Test/Sub/')
+        assert_equal(trashed_kid.kind, 'file')
+        assert_equal(trashed_kid.path, '/{}'.format(kid._id))
+        assert_equal(trashed_kid.materialized_path, '/Test/Sub/Kid')
+        assert_equal(trashed_kid.deleted_by, self.user)
+        assert_equal(trashed_kid.deleted_on, models.TrashedFileNode.load(folder._id).deleted_on)
+        mock_delete_files.assert_called_once_with([kid._id])
+
+    def test_delete_folder_leaves_trashed_descendants(self):
+        folder = self.node_settings.get_root().append_folder('Test')
+        subfolder = folder.append_folder('Sub')
+        kid = subfolder.append_file('Kid')
+        subfolder.delete()
+        deleted_on = models.TrashedFileNode.load(kid._id).deleted_on
+
+        folder.delete()
+
+        assert_equal(models.TrashedFileNode.load(subfolder._id).deleted_on, deleted_on)
+        assert_equal(models.TrashedFileNode.load(kid._id).deleted_on, deleted_on)
+
+    @mock.patch('website.search.search.bulk_update_files')
+    def test_restore_folder_reindexes_restored_files(self, mock_update_files):
+        folder = self.node_settings.get_root().append_folder('Test')
+        kid = folder.append_folder('Sub').append_file('Kid')
+        folder.delete()
+
+        models.TrashedFileNode.load(folder._id).restore()
+
+        assert_is_not(OsfStorageFile.load(kid._id), None)
+        mock_update_files.assert_called_once_with(self.node_settings.owner, file_ids=[kid._id])
+
     def test_delete_file(self):
         child = self.node_settings.get_root().append_file('Test')
         field_names = [f.name for f in child._meta.get_fields() if not f.is_relation and f.name not in ['id', 'content_type_pk']]
@@ -277,6 +322,28 @@ class TestOsfstorageFileNode(StorageTestCase):
         assert_equal(new_project, move_to.node)
         assert_equal(new_project, child.node)
 
+    @mock.patch('website.search.search.bulk_update_files')
+    def test_move_nested_reindexes_moved_files(self, mock_update_files):
+        new_project = ProjectFactory()
+        move_to = new_project.get_addon('osfstorage').get_root()
+        to_move = self.node_settings.get_root().append_folder('Carp')
+        child = to_move.append_folder('Tuna').append_file('A dee um')
+
+        to_move.move_under(move_to)
+
+        child.reload()
+        assert_equal(new_project, child.node)
+        mock_update_files.assert_called_once_with(new_project, file_ids=[child._id])
+
+    @mock.patch('website.search.search.bulk_update_files')
+    def test_move_within_node_does_not_reindex_descendants(self, mock_update_files):
+        to_move = self.node_settings.get_root().append_folder('Carp')
+        to_move.append_file('A dee um')
+
+        to_move.move_under(self.node_settings.get_root().append_folder('Cloud'))
+
+        assert_false(mock_update_files.called)
+
     def test_copy_rename(self):
         to_copy = self.node_settings.get_root().append_file('Carp')
         copy_to = self.node_settings.get_root().append_folder('Cloud')
@@ -289,6 +356,40 @@ class TestOsfstorageFileNode(StorageTestCase):
         assert_equal(copied.parent, copy_to)
         assert_equal(to_copy.parent, self.node_settings.get_root())
 
+    @mock.patch('website.settings.FILE_COPY_BATCH_SIZE', 1)
+    def test_copy_nested_folder(self):
+        to_copy = self.node_settings.get_root().append_folder('Carp')
+        tuna = to_copy.append_folder('Tuna')
+        deep = tuna.append_file('A dee um')
+        version = factories.FileVersionFactory()
+        deep.versions.add(version)
+        to_copy.append_file('Bass')
+        to_copy.append_file('Trashed').delete()
+        copy_to = self.node_settings.get_root().append_folder('Cloud')
+
+        copied = to_copy.copy_under(copy_to)
+
+        assert_equal(sorted(child.name for child in copied.children), ['Bass', 'Tuna'])
+        copied_tuna = copied.find_child_by_name('Tuna', kind=0)
+        copied_deep = copied_tuna.find_child_by_name('A dee um')
+        assert_not_equal(copied_deep, deep)
+        assert_equal(copied_deep.copied_from, deep)
+        assert_equal(copied_deep.node, self.node_settings.owner)
+        assert_equal(list(copied_deep.versions.all()), [version])
+        assert_equal(sorted(child.name for child in to_copy.children), ['Bass', 'Tuna'])
+        assert_equal(list(tuna.children), [deep])
+
+    @mock.patch('website.search.search.bulk_update_files')
+    def test_copy_nested_indexes_copied_files(self, mock_update_files):
+        to_copy = self.node_settings.get_root().append_folder('Carp')
+        to_copy.append_file('A dee um')
+        copy_to = self.node_settings.get_root().append_folder('Cloud')
+
+        copied = to_copy.copy_under(copy_to)
+
+        copied_child = copied.find_child_by_name('A dee um')
+        mock_update_files.assert_called_once_with(self.node_settings.owner, file_ids=[copied_child._id])
+
     def test_move(self):
         to_move = self.node_settings.get_root().append_file('Carp')
         move_to = self.node_settings.get_root().append_folder('Cloud')
@@ -687,6 +788,28 @@ class TestOsfStorageFileVersion(StorageTestCase):
             metadata={'sha256': 'existing'}
         )._find_matching_archive())
 
+    def test_sha256_is_kept_in_step_with_metadata(self):
+        version = factories.FileVersionFactory(metadata={'sha256': 'existing'})
+        assert_equal(models.FileVersion.objects.get(sha256='existing'), version)
+
+        version.update_metadata({'sha256': 'changed'})
+        assert_equal(models.FileVersion.objects.get(id=version.id).sha256, 'changed')
+
+    def test_find_archives(self):
+        models.FileVersion.objects.all().delete()
+        for _ in range(2):
+            factories.FileVersionFactory(metadata={'sha256': 'archived', 'vault': 'the cloud', 'archive': 'erchiv'})
+        factories.FileVersionFactory(metadata={'sha256': 'unarchived'})
+        # Versions whose archiving is pending don't hide the archived ones
+        factories.FileVersionFactory(metadata={'sha256': 'archived', 'vault': None, 'archive': None})
+        factories.FileVersionFactory(metadata={'sha256': 'pending', 'vault': 'the cloud', 'archive': ''})
+
+        with CaptureQueriesContext(connection) as queries:
+            archives = models.FileVersion.find_archives(['archived', 'unarchived', 'pending', 'unknown'])
+
+        assert_equal(len(queries), 1)
+        assert_equal(archives, {'archived': ('the cloud', 'erchiv')})
+
 
 @pytest.mark.django_db
 class TestOsfStorageCheckout(StorageTestCase):
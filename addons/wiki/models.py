@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import datetime
 import functools
+import hashlib
+import json
 import logging
 
 import markdown
@@ -10,6 +12,7 @@ from bleach.callbacks import nofollow
 from bleach import Cleaner
 from functools import partial
 from bleach.linkifier import LinkifyFilter
+from django.core.cache import cache
 from django.db import models
 from framework.forms.utils import sanitize
 from markdown.extensions import codehilite, fenced_code, wikilinks
@@ -17,6 +20,7 @@ from osf.models import AbstractNode, NodeLog
 from osf.models.base import BaseModel, GuidMixin
 from osf.utils.fields import NonNaiveDateTimeField
 from website import settings
+from addons.wiki import settings as wiki_settings
 from addons.wiki import utils as wiki_utils
 from website.exceptions import NodeStateError
 from website.util import api_v2_url
@@ -78,6 +82,12 @@ def render_content(content, node):
     return sanitized_content
 
 
+def get_renderer_version():
+    """Identifies the Markdown renderer and sanitizer settings cached wiki HTML was built with."""
+    whitelist = json.dumps(settings.WIKI_WHITELIST, sort_keys=True)
+    return '{}-{}'.format(wiki_settings.HTML_RENDERER_VERSION, hashlib.md5(whitelist).hexdigest())
+
+
 def build_wiki_url(node, label, base, end):
     return '/{pid}/wiki/{wname}/'.format(pid=node._id, wname=label)
 
@@ -144,6 +154,9 @@ class NodeWikiPage(GuidMixin, BaseModel):
 
     def html(self, node):
         """The cleaned HTML of the page"""
+        return self._get_cached_rendering('html', node, self._render_html)
+
+    def _render_html(self, node):
         html_output = build_html_output(self.content, node=node)
         try:
             cleaner = Cleaner(
@@ -161,7 +174,28 @@ class NodeWikiPage(GuidMixin, BaseModel):
     def raw_text(self, node):
         """ The raw text of the page, suitable for using in a test search"""
 
-        return sanitize(self.html(node), tags=[], strip=True)
+        return self._get_cached_rendering('raw_text', node, lambda node: sanitize(self.html(node), tags=[], strip=True))
+
+    def _get_cached_rendering(self, kind, node, render):
+        """Render the page with `render`, or return what it rendered for this version before.
+
+        Links in the rendered page point to `node`, so renderings are cached per node, and keyed
+        on a hash of the content and on the renderer settings.
+        """
+        if not wiki_settings.HTML_CACHE_TIMEOUT:
+            return render(node)
+        key = 'wiki-{}:{}:{}:{}:{}'.format(
+            kind,
+            self._id,
+            node._id,
+            hashlib.md5(self.content.encode('utf-8')).hexdigest(),
+            get_renderer_version(),
+        )
+        rendered = cache.get(key)
+        if rendered is None:
+            rendered = render(node)
+            cache.set(key, rendered, wiki_settings.HTML_CACHE_TIMEOUT)
+        return rendered
 
     def get_draft(self, node):
         """
@@ -13,3 +13,9 @@ SHAREJS_DB_URL = os.environ.get('SHAREJS_DB_URL', 'mongodb://{}:{}/{}'.format(se
 
 # TODO: Change to release date for wiki change
 WIKI_CHANGE_DATE = datetime.datetime.utcfromtimestamp(1423760098).replace(tzinfo=pytz.utc)
+
+# Seconds the sanitized HTML of a wiki version is cached for. 0 disables the cache.
+HTML_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+# Bump when the Markdown extensions or sanitizing of wiki pages change, so that cached
+# HTML is rendered again.
+HTML_RENDERER_VERSION = 1
@@ -1,8 +1,9 @@
+import mock
 import pytest
 
 from addons.wiki.exceptions import NameMaximumLengthError
 
-from addons.wiki.models import NodeWikiPage
+from addons.wiki.models import NodeWikiPage, build_html_output
 from addons.wiki.tests.factories import NodeWikiFactory
 from osf_tests.factories import NodeFactory, UserFactory, ProjectFactory
 from tests.base import OsfTestCase
@@ -78,3 +79,20 @@ class TestNodeWikiPage(OsfTestCase):
         wiki.save()
         url = '{}wiki/{}/'.format(self.project.url, wiki.page_name)
         assert wiki.url == url
+
+    def test_html_is_rendered_once_per_version(self):
+        with mock.patch('addons.wiki.models.build_html_output', wraps=build_html_output) as build:
+            html = self.wiki.html(self.project)
+            assert self.wiki.html(self.project) == html
+            assert self.wiki.raw_text(self.project) == 'Some content'
+            assert build.call_count == 1
+
+            fork = ProjectFactory(creator=self.user)
+            self.wiki.html(fork)
+            assert build.call_count == 2
+
+    def test_html_is_rendered_again_when_content_changes(self):
+        assert self.wiki.html(self.project) == '<p>Some content</p>'
+        self.wiki.content = 'Other content'
+        self.wiki.save()
+        assert self.wiki.html(self.project) == '<p>Other content</p>'
@@ -235,8 +235,9 @@ def serialize_wiki_widget(node):
     more = len(node.wiki_pages_current.keys()) >= 2
     MAX_DISPLAY_LENGTH = 400
     rendered_before_update = False
-    if wiki_page and wiki_page.html(node):
-        wiki_html = BeautifulSoup(wiki_page.html(node)).text
+    wiki_html = wiki_page and wiki_page.html(node)
+    if wiki_html:
+        wiki_html = BeautifulSoup(wiki_html).text
         if len(wiki_html) > MAX_DISPLAY_LENGTH:
             wiki_html = BeautifulSoup(wiki_html[:MAX_DISPLAY_LENGTH] + '...', 'html.parser')
             more = True
@@ -194,13 +194,17 @@ class OSFCASAuthentication(authentication.BaseAuthentication):
         except (cas.CasTokenError, KeyError):
             return None
 
-        try:
-            cas_auth_response = client.profile(auth_token)
-        except cas.CasHTTPError:
-            raise exceptions.NotAuthenticated(_('User provided an invalid OAuth2 access token'))
-
-        if cas_auth_response.authenticated is False:
-            raise exceptions.NotAuthenticated(_('CAS server failed to authenticate this token'))
+        token_cache = cas.get_token_cache()
+        cas_auth_response = token_cache.get(auth_token)
+        if cas_auth_response is None:
+            try:
+                cas_auth_response = client.profile(auth_token)
+            except cas.CasHTTPError:
+                raise exceptions.NotAuthenticated(_('User provided an invalid OAuth2 access token'))
+
+            if cas_auth_response.authenticated is False:
+                raise exceptions.NotAuthenticated(_('CAS server failed to authenticate this token'))
+            token_cache.set(auth_token, cas_auth_response)
 
         user = OSFUser.load(cas_auth_response.user)
         if not user:
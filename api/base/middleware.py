@@ -12,6 +12,7 @@ from framework.postcommit_tasks.handlers import (
     postcommit_after_request,
     postcommit_before_request
 )
+from framework import instrumentation
 from framework.celery_tasks.handlers import (
     celery_before_request,
     celery_after_request,
@@ -107,6 +108,31 @@ class PostcommitTaskMiddleware(object):
         return response
 
 
+class InstrumentationMiddleware(object):
+    """
+    Report the queries and timings of each request, see `framework.instrumentation`.
+    """
+    def process_request(self, request):
+        instrumentation.start_request()
+
+    def process_response(self, request, response):
+        instrumentation.finish_request(request.method, request.path, response.status_code)
+        return response
+
+
+class ThrottleHeadersMiddleware(object):
+    """
+    Tell clients how much of their rate limit is left, as recorded by the request's throttles.
+    """
+    def process_response(self, request, response):
+        quota = getattr(request, 'throttle_quota', None)
+        if quota:
+            response['X-RateLimit-Limit'] = quota['limit']
+            response['X-RateLimit-Remaining'] = quota['remaining']
+            response['X-RateLimit-Reset'] = quota['reset']
+        return response
+
+
 # Adapted from http://www.djangosnippets.org/snippets/186/
 # Original author: udfalkso
 # Modified by: Shwagroo Team and Gun.io
@@ -122,18 +148,19 @@ class ProfileMiddleware(object):
     """
     def process_request(self, request):
         if (settings.DEBUG or request.user.is_superuser) and 'prof' in request.GET:
-            self.prof = cProfile.Profile()
+            # Kept on the request, as one middleware instance serves all threads
+            request._profile = cProfile.Profile()
 
     def process_view(self, request, callback, callback_args, callback_kwargs):
         if (settings.DEBUG or request.user.is_superuser) and 'prof' in request.GET:
-            self.prof.enable()
+            request._profile.enable()
 
     def process_response(self, request, response):
         if (settings.DEBUG or request.user.is_superuser) and 'prof' in request.GET:
-            self.prof.disable()
+            request._profile.disable()
 
             s = StringIO.StringIO()
-            ps = pstats.Stats(self.prof, stream=s).sort_stats('cumtime')
+            ps = pstats.Stats(request._profile, stream=s).sort_stats('cumtime')
             ps.print_stats()
             response.content = s.getvalue()
 
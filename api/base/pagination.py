@@ -209,8 +209,13 @@ class NodeContributorPagination(JSONAPIPagination):
         response_dict = response.data
         kwargs = self.request.parser_context['kwargs'].copy()
         node_id = kwargs.get('node_id', None)
-        node = AbstractNode.load(node_id)
-        total_bibliographic = node.visible_contributors.count()
+        contributors = self.page.paginator.object_list
+        if kwargs.get('is_embedded') and isinstance(contributors, list):
+            # Embedded contributors are unfiltered and already loaded, e.g. by a batched embed
+            total_bibliographic = len([contrib for contrib in contributors if contrib.visible])
+        else:
+            node = AbstractNode.load(node_id)
+            total_bibliographic = node.visible_contributors.count()
         if self.request.version < '2.1':
             response_dict['links']['meta']['total_bibliographic'] = total_bibliographic
         else:
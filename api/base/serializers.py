@@ -21,6 +21,7 @@ from api.base.exceptions import TargetNotSupportedError
 from api.base.exceptions import RelationshipPostMakesNoChanges
 from api.base.settings import BULK_SETTINGS
 from api.base.utils import absolute_reverse, extend_querystring_params, get_user_auth, extend_querystring_if_key_exists
+from framework import instrumentation
 from framework.auth import core as auth_core
 from osf.models import AbstractNode, MaintenanceState
 from website import settings
@@ -177,6 +178,14 @@ class HideIfWithdrawal(ConditionalField):
         return not isinstance(self.field, RelationshipField)
 
 
+def get_log_pointer_node(context, node_id):
+    # Logs serialized in a list have their referenced nodes resolved in bulk
+    resolver = context.get('log_params_resolver')
+    if resolver:
+        return resolver.get_node(node_id)
+    return AbstractNode.load(node_id)
+
+
 class HideIfNotNodePointerLog(ConditionalField):
     """
     This field will not be shown if the log is not a pointer log for a node
@@ -184,7 +193,7 @@ class HideIfNotNodePointerLog(ConditionalField):
     def should_hide(self, instance):
         pointer_param = instance.params.get('pointer', False)
         if pointer_param:
-            node = AbstractNode.load(pointer_param['id'])
+            node = get_log_pointer_node(self.context, pointer_param['id'])
             if node:
                 return node.type != 'osf.node'
         return True
@@ -198,7 +207,7 @@ class HideIfNotRegistrationPointerLog(ConditionalField):
     def should_hide(self, instance):
         pointer_param = instance.params.get('pointer', False)
         if pointer_param:
-            node = AbstractNode.load(pointer_param['id'])
+            node = get_log_pointer_node(self.context, pointer_param['id'])
             if node:
                 return node.type != 'osf.registration'
         return True
@@ -1040,6 +1049,7 @@ class NodeFileHyperLinkField(RelationshipField):
 
 
 class JSONAPIListSerializer(ser.ListSerializer):
+    @instrumentation.timed('serializer')
     def to_representation(self, data):
         enable_esi = self.context.get('enable_esi', False)
         envelope = self.context.update({'envelope': None})
@@ -1055,6 +1065,8 @@ class JSONAPIListSerializer(ser.ListSerializer):
                 self.child.to_esi_representation(item, envelope=None) for item in data
             ]
         else:
+            self.child.prefetch_items(data)
+            self.prefetch_embeds(data)
             ret = [
                 self.child.to_representation(item, envelope=envelope) for item in data
             ]
@@ -1064,6 +1076,16 @@ class JSONAPIListSerializer(ser.ListSerializer):
 
         return ret
 
+    def prefetch_embeds(self, data):
+        """Let each requested embed resolve the whole page of items in bulk before the
+        items are serialized one at a time.
+        """
+        for embed in self.context.get('embed', {}).values():
+            prefetch = getattr(embed, 'prefetch', None)
+            if prefetch:
+                with instrumentation.timer('embed'):
+                    prefetch(data)
+
     # Overrides ListSerializer which doesn't support multiple update by default
     def update(self, instance, validated_data):
 
@@ -1173,6 +1195,12 @@ class JSONAPISerializer(BaseAPISerializer):
         kwargs['child'] = cls(*args, **kwargs)
         return JSONAPIListSerializer(*args, **kwargs)
 
+    def prefetch_items(self, items):
+        """Called by list serializers with the whole page of items before they are serialized
+        one at a time. Override to resolve data the items reference in bulk.
+        """
+        pass
+
     def invalid_embeds(self, fields, embeds):
         fields_check = fields[:]
         for index, field in enumerate(fields_check):
@@ -1194,6 +1222,7 @@ class JSONAPISerializer(BaseAPISerializer):
         return super(JSONAPISerializer, self).to_representation(data)
 
     # overrides Serializer
+    @instrumentation.timed('serializer')
     def to_representation(self, obj, envelope='data'):
         """Serialize to final representation.
 
@@ -1269,7 +1298,8 @@ class JSONAPISerializer(BaseAPISerializer):
                         else:
                             try:
                                 # If a field has an empty representation, it should not be embedded.
-                                result = self.context['embed'][field.field_name](obj)
+                                with instrumentation.timer('embed'):
+                                    result = self.context['embed'][field.field_name](obj)
                             except SkipField:
                                 result = None
 
@@ -162,7 +162,7 @@ REST_FRAMEWORK = {
         'api.base.authentication.drf.OSFCASAuthentication'
     ),
     'DEFAULT_THROTTLE_CLASSES': (
-        'rest_framework.throttling.UserRateThrottle',
+        'api.base.throttling.UserRateThrottle',
         'api.base.throttling.NonCookieAuthThrottle',
     ),
     'DEFAULT_THROTTLE_RATES': {
@@ -185,13 +185,17 @@ CORS_ORIGIN_WHITELIST = (urlparse(osf_settings.DOMAIN).netloc,
 # This needs to remain True to allow cross origin requests that are in CORS_ORIGIN_WHITELIST to
 # use cookies.
 CORS_ALLOW_CREDENTIALS = True
+# Let cross origin clients read how much of their rate limit is left
+CORS_EXPOSE_HEADERS = ('X-RateLimit-Limit', 'X-RateLimit-Remaining', 'X-RateLimit-Reset')
 # Set dynamically on app init
 ORIGINS_WHITELIST = ()
 
 MIDDLEWARE_CLASSES = (
+    'api.base.middleware.InstrumentationMiddleware',
     'api.base.middleware.DjangoGlobalMiddleware',
     'api.base.middleware.CeleryTaskMiddleware',
     'api.base.middleware.PostcommitTaskMiddleware',
+    'api.base.middleware.ThrottleHeadersMiddleware',
     # A profiling middleware. ONLY FOR DEV USE
     # Uncomment and add "prof" to url params to recieve a profile for that url
     # 'api.base.middleware.ProfileMiddleware',
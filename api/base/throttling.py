@@ -1,4 +1,5 @@
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle, SimpleRateThrottle
+from rest_framework import throttling
+from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle
 import logging
 
 from api.base import settings
@@ -7,6 +8,20 @@ logger = logging.getLogger(__name__)
 
 
 class BaseThrottle(SimpleRateThrottle):
+    """Throttle using the generic cell rate algorithm (GCRA).
+
+    Each client has a counter holding the theoretical arrival time (TAT) in milliseconds: the
+    time at which the bucket would be empty again if no more requests came in. Every request
+    moves the TAT forward by one emission interval (duration / number of requests) with an
+    atomic ``incr``, and is allowed while the TAT stays within one duration of now. Unlike
+    DRF's sliding log, concurrent workers never overwrite each other's history.
+
+    The cache only offers ``add`` and ``incr`` atomically, and ``incr`` does not renew a key's
+    expiry. So the counter is never reset in place: when the bucket has refilled, or when the
+    counter is older than one duration, its requests move on to the next generation of the
+    counter, which the first of them creates with ``add``. The key of the client points to the
+    current generation.
+    """
 
     def get_ident(self, request):
         if request.META.get('HTTP_X_THROTTLE_TOKEN'):
@@ -28,16 +43,74 @@ class BaseThrottle(SimpleRateThrottle):
         if self.key is None:
             return True
 
-        self.history = self.cache.get(self.key, [])
-        self.now = self.timer()
+        now = int(self.timer() * 1000)
+        period = self.duration * 1000
+        interval = max(period // self.num_requests, 1)
+        # Counters outlive their TAT, after which the bucket is full anyway, and are replaced
+        # by the next generation before they expire
+        timeout = self.duration * 2
+
+        self.cache.add(self.key, (0, now), timeout)
+        generation, created = self.cache.get(self.key) or (0, now)
+        tat = self._count(generation, now, interval, timeout)
+        if tat is None or tat - interval < now or now - created > period:
+            # The bucket has refilled since the last request, or the counter is getting old.
+            # Requests that raced on the old counter are all counted again on the new one.
+            generation += 1
+            seed = now if tat is None else max(tat - interval, now)
+            self.cache.add(self._tat_key(generation), seed, timeout)
+            self.cache.set(self.key, (generation, now), timeout)
+            tat = self._count(generation, now, interval, timeout) or seed + interval
+        self.tat_key = self._tat_key(generation)
+
+        if tat - now > period:
+            try:
+                self.cache.decr(self.tat_key, interval)
+            except ValueError:
+                pass
+            self.wait_seconds = (tat - now - period) / 1000.0
+            self.record_quota(request, remaining=0, reset=tat - interval - now)
+            return False
+
+        self.wait_seconds = None
+        self.record_quota(request, remaining=(period - (tat - now)) // interval, reset=tat - now)
+        return True
+
+    def _tat_key(self, generation):
+        return '{}:{}'.format(self.key, generation)
+
+    def _count(self, generation, now, interval, timeout):
+        """Count a request on a generation of the counter, starting it from now if it is new.
+
+        :return int: The TAT after the request, or None if the counter expired meanwhile
+        """
+        key = self._tat_key(generation)
+        self.cache.add(key, now, timeout)
+        try:
+            return self.cache.incr(key, interval)
+        except ValueError:
+            return None
+
+    def wait(self):
+        return self.wait_seconds
+
+    def record_quota(self, request, remaining, reset):
+        """Keep the most restrictive quota of the request's throttles, for the rate limit headers
+        added by `api.base.middleware.ThrottleHeadersMiddleware`.
+        """
+        request = getattr(request, '_request', request)
+        quota = getattr(request, 'throttle_quota', None)
+        if quota is None or remaining < quota['remaining']:
+            request.throttle_quota = {
+                'limit': self.num_requests,
+                'remaining': remaining,
+                'reset': -(-reset // 1000),  # Milliseconds to whole seconds, rounding up
+            }
+
 
-        # Drop any requests from the history which have now passed the throttle duration
-        while self.history and self.history[-1] <= self.now - self.duration:
-            self.history.pop()
+class UserRateThrottle(BaseThrottle, throttling.UserRateThrottle):
 
-        if len(self.history) >= self.num_requests:
-            return self.throttle_failure()
-        return self.throttle_success()
+    scope = 'user'
 
 
 class NonCookieAuthThrottle(BaseThrottle, AnonRateThrottle):
@@ -54,7 +127,7 @@ class NonCookieAuthThrottle(BaseThrottle, AnonRateThrottle):
         return super(NonCookieAuthThrottle, self).allow_request(request, view)
 
 
-class AddContributorThrottle(BaseThrottle, UserRateThrottle):
+class AddContributorThrottle(UserRateThrottle):
 
     scope = 'add-contributor'
 
@@ -68,7 +141,7 @@ class AddContributorThrottle(BaseThrottle, UserRateThrottle):
         return super(AddContributorThrottle, self).allow_request(request, view)
 
 
-class CreateGuidThrottle(BaseThrottle, UserRateThrottle):
+class CreateGuidThrottle(UserRateThrottle):
 
     scope = 'create-guid'
 
@@ -82,12 +155,12 @@ class CreateGuidThrottle(BaseThrottle, UserRateThrottle):
         return super(CreateGuidThrottle, self).allow_request(request, view)
 
 
-class RootAnonThrottle(AnonRateThrottle):
+class RootAnonThrottle(BaseThrottle, AnonRateThrottle):
 
     scope = 'root-anon-throttle'
 
 
-class TestUserRateThrottle(BaseThrottle, UserRateThrottle):
+class TestUserRateThrottle(UserRateThrottle):
 
     scope = 'test-user'
 
@@ -4,11 +4,12 @@ from django_bulk_update.helper import bulk_update
 from django.conf import settings as django_settings
 from django.db import transaction
 from django.http import JsonResponse
+from django.utils import timezone
 from rest_framework import generics
 from rest_framework import permissions as drf_permissions
 from rest_framework import status
 from rest_framework.decorators import api_view, throttle_classes
-from rest_framework.exceptions import ValidationError, NotFound
+from rest_framework.exceptions import APIException, ValidationError, NotFound
 from rest_framework.mixins import ListModelMixin
 from rest_framework.response import Response
 
@@ -47,6 +48,11 @@ class JSONAPIBaseView(generics.GenericAPIView):
         """Create a partial function to fetch the values of an embedded field. A basic
         example is to include a Node's children in a single response.
 
+        The partial also carries a ``prefetch`` function, which list serializers call with
+        the whole page of items before serializing them one at a time. If the embedded view
+        implements ``get_embed_batch``, the embedded results for the page are fetched in bulk
+        and the per-item partial serves them from the request's embed cache.
+
         :param str field_name: Name of field of the view's serializer_class to load
         results for
         :return function object -> dict:
@@ -54,21 +60,17 @@ class JSONAPIBaseView(generics.GenericAPIView):
         if getattr(field, 'field', None):
             field = field.field
 
-        def partial(item):
+        def setup_view(item):
             # resolve must be implemented on the field
             v, view_args, view_kwargs = field.resolve(item, field_name, self.request)
             if not v:
-                return None
+                return None, None
 
             if isinstance(self.request, EmbeddedRequest):
                 request = EmbeddedRequest(self.request._request)
             else:
                 request = EmbeddedRequest(self.request)
 
-            if not hasattr(request._request._request, '_embed_cache'):
-                request._request._request._embed_cache = {}
-            cache = request._request._request._embed_cache
-
             request.parents.setdefault(type(item), {})[item._id] = item
 
             view_kwargs.update({
@@ -84,6 +86,22 @@ class JSONAPIBaseView(generics.GenericAPIView):
             view.request = request
             view.request.parser_context['kwargs'] = view_kwargs
             view.format_kwarg = view.get_format_suffix(**view_kwargs)
+            return v, view
+
+        def get_cache(request):
+            if not hasattr(request._request._request, '_embed_cache'):
+                request._request._request._embed_cache = {}
+            return request._request._request._embed_cache
+
+        def batch_cache_key(v, item):
+            return (v.cls, field_name, 'batch', (type(item), item.id))
+
+        def partial(item):
+            v, view = setup_view(item)
+            if not v:
+                return None
+            request = view.request
+            cache = get_cache(request)
 
             if not isinstance(view, ListModelMixin):
                 try:
@@ -110,7 +128,10 @@ class JSONAPIBaseView(generics.GenericAPIView):
                 if not isinstance(view, ListModelMixin):
                     ret = ser.to_representation(item)
                 else:
-                    queryset = view.filter_queryset(view.get_queryset())
+                    # Results fetched in bulk by `prefetch` are already ordered by the embedded view
+                    queryset = cache.pop(batch_cache_key(v, item), None)
+                    if queryset is None:
+                        queryset = view.filter_queryset(view.get_queryset())
                     page = view.paginate_queryset(getattr(queryset, '_results_cache', None) or queryset)
 
                     ret = ser.to_representation(page or queryset)
@@ -132,8 +153,37 @@ class JSONAPIBaseView(generics.GenericAPIView):
 
             return ret
 
+        def prefetch(items):
+            # Only fields that always resolve to the same view can be batched
+            if not isinstance(getattr(field, 'view_name', None), basestring):
+                return
+            items = [item for item in items if getattr(item, 'pk', None) is not None]
+            if len(items) < 2:
+                return
+            v, view = setup_view(items[0])
+            if not v or not isinstance(view, ListModelMixin):
+                return
+            batch = view.get_embed_batch(items)
+            if not batch:
+                return
+            cache = get_cache(view.request)
+            for item in items:
+                if item.pk in batch:
+                    cache[batch_cache_key(v, item)] = batch[item.pk]
+
+        partial.prefetch = prefetch
         return partial
 
+    def get_embed_batch(self, parents):
+        """Fetch the results this list view would return for each of `parents` when embedded,
+        in bulk. Used when embedding this view on a page of resources.
+
+        Returns a dict mapping parent pk to an ordered list of results, or None if the view
+        does not support batching. Parents missing from the dict (e.g. because the user may
+        not view them) fall back to the regular per-item embed.
+        """
+        return None
+
     def get_serializer_context(self):
         """Inject request into the serializer context. Additionally, inject partial functions
         (request, object -> embed items) if the query string contains embeds.  Allows
@@ -815,6 +865,26 @@ class BaseContributorList(JSONAPIBaseView, generics.ListAPIView, ListFilterMixin
 
         return node.contributor_set.all().include('user__guids')
 
+    # overrides JSONAPIBaseView
+    def get_embed_batch(self, parents):
+        """Fetch the contributors of a whole page of nodes in one query, grouped by node."""
+        nodes = []
+        for parent in parents:
+            self.request.parents.setdefault(type(parent), {})[parent._id] = parent
+            self.kwargs[self.node_lookup_url_kwarg] = parent._id
+            try:
+                nodes.append(self.get_node())
+            except APIException:
+                # The per-item embed will render the error for this node
+                continue
+        batch = {node.pk: [] for node in nodes}
+        if not batch:
+            return batch
+        contributors = Contributor.objects.filter(node__in=batch.keys()).include('user__guids').order_by('node_id', '_order')
+        for contributor in contributors:
+            batch[contributor.node_id].append(contributor)
+        return batch
+
     def get_queryset(self):
         queryset = self.get_queryset_from_request()
         # If bulk request, queryset only contains contributors in request
@@ -886,36 +956,56 @@ class WaterButlerMixin(object):
 
     def bulk_get_file_nodes_from_wb_resp(self, files_list):
         """Takes a list of file data from wb response, touches/updates metadata for each, and returns list of file objects.
-        This function mirrors all the actions of get_file_node_from_wb_resp except the create and updates are done in bulk.
+        This function mirrors all the actions of get_file_node_from_wb_resp except the lookups, creates and updates are done
+        in bulk: existing file nodes are looked up with one query per file node class, and only the ones whose metadata
+        changed are written back. The others are only touched.
         The bulk_update and bulk_create do not call the base class update and create so the actions of those functions are
         done here where needed
         """
         node = self.get_node(check_object_permissions=False)
 
+        keys = [
+            (item['attributes']['provider'], BaseFileNode.FOLDER if item['attributes']['kind'] == 'folder' else BaseFileNode.FILE)
+            for item in files_list
+        ]
+        classes = BaseFileNode.resolve_classes(keys)
+
+        items_by_class = defaultdict(list)
+        for key, item in zip(keys, files_list):
+            items_by_class[classes[key]].append(item['attributes'])
+
         objs_to_create = defaultdict(lambda: [])
+        objs_to_update = []
+        ids_to_touch = []
         file_objs = []
 
-        for item in files_list:
-            attrs = item['attributes']
-            base_class = BaseFileNode.resolve_class(
-                attrs['provider'],
-                BaseFileNode.FOLDER if attrs['kind'] == 'folder'
-                else BaseFileNode.FILE
-            )
-
+        for base_class, items in items_by_class.items():
             # mirrors BaseFileNode get_or_create
-            try:
-                file_obj = base_class.objects.get(node=node, _path='/' + attrs['path'].lstrip('/'))
-            except base_class.DoesNotExist:
-                # create method on BaseFileNode appends provider, bulk_create bypasses this step so it is added here
-                file_obj = base_class(node=node, _path='/' + attrs['path'].lstrip('/'), provider=base_class._provider)
-                objs_to_create[base_class].append(file_obj)
-            else:
+            paths = ['/' + attrs['path'].lstrip('/') for attrs in items]
+            existing = {file_obj._path: file_obj for file_obj in base_class.objects.filter(node=node, _path__in=paths)}
+
+            for path, attrs in zip(paths, items):
+                file_obj = existing.get(path)
+                if file_obj is None:
+                    # create method on BaseFileNode appends provider, bulk_create bypasses this step so it is added here
+                    file_obj = base_class(node=node, _path=path, provider=base_class._provider)
+                    file_obj.update(None, attrs, user=self.request.user, save=False)
+                    objs_to_create[base_class].append(file_obj)
+                    continue
+
+                metadata = (file_obj.name, file_obj._materialized_path, len(file_obj._history))
+                file_obj.update(None, attrs, user=self.request.user, save=False)
+                # A new etag or modified time shows up as a new history entry
+                if metadata != (file_obj.name, file_obj._materialized_path, len(file_obj._history)):
+                    objs_to_update.append(file_obj)
+                else:
+                    ids_to_touch.append(file_obj.id)
                 file_objs.append(file_obj)
 
-            file_obj.update(None, attrs, user=self.request.user, save=False)
-
-        bulk_update(file_objs)
+        if objs_to_update:
+            bulk_update(objs_to_update, update_fields=['name', '_materialized_path', '_history', 'last_touched'])
+        if ids_to_touch:
+            BaseFileNode.objects.filter(id__in=ids_to_touch).update(last_touched=timezone.now())
 
         for base_class in objs_to_create:
             base_class.objects.bulk_create(objs_to_create[base_class])
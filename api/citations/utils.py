@@ -1,19 +1,62 @@
+import hashlib
 import os
 import re
+import threading
 import httplib as http
+from collections import OrderedDict
 
 from citeproc import CitationStylesStyle, CitationStylesBibliography
 from citeproc import Citation, CitationItem
 from citeproc import formatter
 from citeproc.source.json import CiteProcJSON
+from django.core.cache import cache
 
 from framework.exceptions import HTTPError
 from framework.auth import utils
 from osf.models import PreprintService
+from website import settings
 from website.citations.utils import datetime_to_csl
 from website.settings import CITATION_STYLES_PATH, BASE_PATH, CUSTOM_CITATIONS
 
 
+class CitationStyleRegistry(object):
+    """Process-wide LRU of parsed citation styles, so each CSL file is read and parsed once."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._styles = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_path(style):
+        custom = CUSTOM_CITATIONS.get(style, False)
+        return os.path.join(BASE_PATH, 'static', custom) if custom else os.path.join(CITATION_STYLES_PATH, style)
+
+    def get(self, style):
+        """Return the parsed `CitationStylesStyle` for `style`.
+
+        :raises ValueError: if there is no such style
+        """
+        with self._lock:
+            bib_style = self._styles.pop(style, None)
+            if bib_style is not None:
+                self._styles[style] = bib_style
+                return bib_style
+        bib_style = CitationStylesStyle(self.get_path(style), validate=False)
+        with self._lock:
+            self._styles[style] = bib_style
+            while len(self._styles) > self.max_size:
+                self._styles.popitem(last=False)
+        return bib_style
+
+    def clear(self):
+        with self._lock:
+            self._styles.clear()
+
+
+style_registry = CitationStyleRegistry(settings.CITATION_STYLE_REGISTRY_SIZE)
+
+
 def clean_up_common_errors(cit):
     cit = re.sub(r"\.+", '.', cit)
     cit = re.sub(r" +", ' ', cit)
@@ -70,20 +113,51 @@ def process_name(node, user):
     }
 
 
+def citation_cache_key(node, style):
+    """Key under which the citation of `node` in `style` is cached.
+
+    The key changes whenever the node (or preprint), its logs, or its visible contributors and
+    their names change, so cached citations never need to be invalidated explicitly.
+    """
+    cit_node = node.node if isinstance(node, PreprintService) else node
+    parts = [
+        style,
+        node._id,
+        node.modified.isoformat(),
+        cit_node.modified.isoformat(),
+        cit_node.last_logged.isoformat() if cit_node.last_logged else '',
+    ]
+    parts.extend(
+        u'{}:{}'.format(user_id, modified.isoformat())
+        for user_id, modified in cit_node.visible_contributors.values_list('guids___id', 'modified')
+    )
+    return 'citation:{}'.format(hashlib.sha256(u'|'.join(parts).encode('utf-8')).hexdigest())
+
+
 def render_citation(node, style='apa'):
     """Given a node, return a citation"""
+    if not settings.CITATION_CACHE_TIMEOUT:
+        return _render_citation(node, style)
+    key = citation_cache_key(node, style)
+    cit = cache.get(key)
+    if cit is None:
+        cit = _render_citation(node, style)
+        cache.set(key, cit, settings.CITATION_CACHE_TIMEOUT)
+    return cit
+
+
+def _render_citation(node, style):
     csl = None
     if isinstance(node, PreprintService):
         csl = preprint_csl(node, node.node)
         data = [csl, ]
     else:
-        data = [node.csl, ]
+        csl = node.csl
+        data = [csl, ]
 
     bib_source = CiteProcJSON(data)
 
-    custom = CUSTOM_CITATIONS.get(style, False)
-    path = os.path.join(BASE_PATH, 'static', custom) if custom else os.path.join(CITATION_STYLES_PATH, style)
-    bib_style = CitationStylesStyle(path, validate=False)
+    bib_style = style_registry.get(style)
 
     bibliography = CitationStylesBibliography(bib_style, bib_source, formatter.plain)
 
@@ -94,7 +168,7 @@ def render_citation(node, style='apa'):
     bib = bibliography.bibliography()
     cit = unicode(bib[0] if len(bib) else '')
 
-    title = csl['title'] if csl else node.csl['title']
+    title = csl['title']
     if cit.count(title) == 1:
         i = cit.index(title)
         prefix = clean_up_common_errors(cit[0:i])
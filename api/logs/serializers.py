@@ -1,3 +1,6 @@
+from collections import namedtuple
+
+from django.utils.functional import cached_property
 from rest_framework import serializers as ser
 
 from api.base.serializers import (
@@ -12,7 +15,73 @@ from api.base.serializers import (
 )
 
 from osf.models import OSFUser, AbstractNode, PreprintService
-from website.util import permissions as osf_permissions
+
+
+LoggedNode = namedtuple('LoggedNode', ['id', '_id', 'title', 'type', 'is_public', 'is_deleted'])
+
+
+class NodeLogParamsResolver(object):
+    """Resolves the nodes, users and preprints referenced by the params of a page of logs,
+    and the viewing user's read permission on those nodes, with one query per kind.
+    """
+
+    USER_FIELDS = ('fullname', 'given_name', 'middle_names', 'family_name', 'unclaimed_records', 'is_active')
+
+    def __init__(self, log_params, user):
+        node_ids, user_ids, preprint_ids = set(), set(), set()
+        for params in log_params:
+            node_ids.update([params.get('node'), params.get('project'), (params.get('pointer') or {}).get('id')])
+            for key in ('source', 'destination', 'target'):
+                node_ids.add(((params.get(key) or {}).get('node') or {}).get('_id'))
+            user_ids.update(params.get('contributors') or [])
+            preprint_ids.add(params.get('preprint'))
+        # Old logs may hold other values under these keys
+        node_ids = {each for each in node_ids if isinstance(each, basestring)}
+        user_ids = {each for each in user_ids if isinstance(each, basestring)}
+        preprint_ids = {each for each in preprint_ids if isinstance(each, basestring)}
+
+        self.nodes = {}
+        if node_ids:
+            rows = AbstractNode.objects.filter(guids___id__in=node_ids).values_list(
+                'id', 'guids___id', 'title', 'type', 'is_public', 'is_deleted'
+            )
+            self.nodes = {row[1]: LoggedNode(*row) for row in rows}
+
+        self.readable_node_ids = set()
+        if self.nodes and user.is_authenticated:
+            self.readable_node_ids = set(
+                AbstractNode.objects.filter(id__in=[node.id for node in self.nodes.values()])
+                .with_read_permission(user).values_list('id', flat=True)
+            )
+
+        # Users are ordered by full name, as the contributors of each log are listed
+        self.users = {}
+        if user_ids:
+            rows = OSFUser.objects.filter(guids___id__in=user_ids).order_by('fullname').values('guids___id', *self.USER_FIELDS)
+            self.users = {row.pop('guids___id'): dict(row, rank=rank) for rank, row in enumerate(rows)}
+
+        self.preprint_providers = {}
+        if preprint_ids:
+            rows = PreprintService.objects.filter(guids___id__in=preprint_ids).values_list(
+                'guids___id', 'provider__external_url', 'provider__name'
+            )
+            self.preprint_providers = {guid: {'url': url, 'name': name} for guid, url, name in rows}
+
+    def get_node(self, node_id):
+        return self.nodes.get(node_id)
+
+    def can_read(self, node):
+        return node.id in self.readable_node_ids
+
+    def get_users(self, user_ids):
+        users = {
+            user_id: self.users[user_id] for user_id in user_ids
+            if isinstance(user_id, basestring) and user_id in self.users
+        }
+        return sorted(users.items(), key=lambda each: each[1]['rank'])
+
+    def get_preprint_provider(self, preprint_id):
+        return self.preprint_providers.get(preprint_id)
 
 
 class NodeLogIdentifiersSerializer(RestrictedDictSerializer):
@@ -36,11 +105,14 @@ class NodeLogFileParamsSerializer(RestrictedDictSerializer):
     def get_node_title(self, obj):
         user = self.context['request'].user
         node_title = obj['node']['title']
-        node = AbstractNode.load(obj['node']['_id'])
+        resolver = self.parent.log_params_resolver
+        node = resolver.get_node(obj['node']['_id'])
+        if not node:
+            return 'Private Component'
         if not user.is_authenticated:
             if node.is_public:
                 return node_title
-        elif node.has_permission(user, osf_permissions.READ):
+        elif resolver.can_read(node):
             return node_title
         return 'Private Component'
 
@@ -102,27 +174,36 @@ class NodeLogParamsSerializer(RestrictedDictSerializer):
                 return view
         return None
 
+    @cached_property
+    def log_params_resolver(self):
+        # Logs serialized in a list share a resolver for the whole page
+        resolver = self.context.get('log_params_resolver')
+        if resolver is None:
+            resolver = NodeLogParamsResolver([self.instance], self.context['request'].user)
+        return resolver
+
     def get_params_node(self, obj):
         node_id = obj.get('node', None)
         if node_id:
-            node = AbstractNode.objects.filter(guids___id=node_id).values('title').get()
-            return {'id': node_id, 'title': node['title']}
+            node = self.log_params_resolver.get_node(node_id)
+            return {'id': node_id, 'title': node.title if node else None}
         return None
 
     def get_params_project(self, obj):
         project_id = obj.get('project', None)
         if project_id:
-            node = AbstractNode.objects.filter(guids___id=project_id).values('title').get()
-            return {'id': project_id, 'title': node['title']}
+            node = self.log_params_resolver.get_node(project_id)
+            return {'id': project_id, 'title': node.title if node else None}
         return None
 
     def get_pointer(self, obj):
         user = self.context['request'].user
         pointer = obj.get('pointer', None)
         if pointer:
-            pointer_node = AbstractNode.objects.get(guids___id=pointer['id'])
-            if not pointer_node.is_deleted:
-                if pointer_node.is_public or (user.is_authenticated and pointer_node.has_permission(user, osf_permissions.READ)):
+            resolver = self.log_params_resolver
+            pointer_node = resolver.get_node(pointer['id'])
+            if pointer_node and not pointer_node.is_deleted:
+                if pointer_node.is_public or (user.is_authenticated and resolver.can_read(pointer_node)):
                     pointer['title'] = pointer_node.title
                     return pointer
         return None
@@ -138,36 +219,26 @@ class NodeLogParamsSerializer(RestrictedDictSerializer):
         params_node = obj.get('node', None)
 
         if contributor_ids:
-            users = (
-                OSFUser.objects.filter(guids___id__in=contributor_ids)
-                .only('fullname', 'given_name',
-                      'middle_names', 'family_name',
-                      'unclaimed_records', 'is_active')
-                .order_by('fullname')
-            )
-            for user in users:
+            for user_id, user in self.log_params_resolver.get_users(contributor_ids):
                 unregistered_name = None
-                if user.unclaimed_records.get(params_node):
-                    unregistered_name = user.unclaimed_records[params_node].get('name', None)
+                if user['unclaimed_records'].get(params_node):
+                    unregistered_name = user['unclaimed_records'][params_node].get('name', None)
 
                 contributor_info.append({
-                    'id': user._id,
-                    'full_name': user.fullname,
-                    'given_name': user.given_name,
-                    'middle_names': user.middle_names,
-                    'family_name': user.family_name,
+                    'id': user_id,
+                    'full_name': user['fullname'],
+                    'given_name': user['given_name'],
+                    'middle_names': user['middle_names'],
+                    'family_name': user['family_name'],
                     'unregistered_name': unregistered_name,
-                    'active': user.is_active
+                    'active': user['is_active']
                 })
         return contributor_info
 
     def get_preprint_provider(self, obj):
         preprint_id = obj.get('preprint', None)
         if preprint_id:
-            preprint = PreprintService.load(preprint_id)
-            if preprint:
-                provider = preprint.provider
-                return {'url': provider.external_url, 'name': provider.name}
+            return self.log_params_resolver.get_preprint_provider(preprint_id)
         return None
 
 class NodeLogSerializer(JSONAPISerializer):
@@ -223,6 +294,11 @@ class NodeLogSerializer(JSONAPISerializer):
         related_view_kwargs={'node_id': '<params.template_node.id>'}
     )
 
+    def prefetch_items(self, items):
+        self.context['log_params_resolver'] = NodeLogParamsResolver(
+            [log.params for log in items], self.context['request'].user
+        )
+
     def get_absolute_url(self, obj):
         return obj.absolute_url
 
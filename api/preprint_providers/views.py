@@ -20,6 +20,7 @@ from api.preprints.serializers import PreprintSerializer
 from api.preprints.permissions import PreprintPublishedOrAdmin
 from framework.auth.oauth_scopes import CoreScopes
 from osf.models import AbstractNode, Subject, PreprintProvider
+from osf.utils.subject_index import get_subject_index
 
 class PreprintProviderList(JSONAPIBaseView, generics.ListAPIView, ListFilterMixin):
     """
@@ -305,13 +306,8 @@ class PreprintProviderTaxonomies(JSONAPIBaseView, generics.ListAPIView):
         # TODO: Delet this when all PreprintProviders have a mapping
         if sub._id in allowed_parents:
             return True
-        if sub.parent:
-            if sub.parent._id in allows_children:
-                return True
-            if sub.parent.parent:
-                if sub.parent.parent._id in allows_children:
-                    return True
-        return False
+        # The parent and grandparent, read from the subject index
+        return any(ancestor in allows_children for ancestor in sub.hierarchy[-3:-1])
 
     def get_queryset(self):
         parent = self.request.query_params.get('filter[parents]', None) or self.request.query_params.get('filter[parent]', None)
@@ -319,7 +315,7 @@ class PreprintProviderTaxonomies(JSONAPIBaseView, generics.ListAPIView):
         if parent:
             if parent == 'null':
                 return provider.top_level_subjects
-            if provider.subjects.exists():
+            if get_subject_index().has_subjects(provider.id):
                 return optimize_subject_query(provider.subjects.filter(parent___id=parent))
             else:
                 # TODO: Delet this when all PreprintProviders have a mapping
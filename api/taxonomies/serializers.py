@@ -40,8 +40,7 @@ class TaxonomySerializer(JSONAPISerializer):
     })
 
     def get_child_count(self, obj):
-        children_count = getattr(obj, 'children_count', None)
-        return children_count if children_count is not None else obj.child_count
+        return obj.child_count
 
     def get_parents(self, obj):
         if not obj.parent:
@@ -227,6 +227,38 @@ class TestOAuthValidation(ApiTestCase):
         )
         assert_equal(res.status_code, 403, msg=res.json)
 
+    @mock.patch('framework.auth.cas.CasClient.profile')
+    def test_valid_token_profile_is_cached(self, mock_user_info):
+        mock_user_info.return_value = cas.CasResponse(
+            authenticated=True, user=self.user1._id,
+            attributes={'accessTokenScope': ['osf.full_read']}
+        )
+
+        for _ in range(2):
+            res = self.app.get(
+                self.reachable_url,
+                auth='some_valid_token',
+                auth_type='jwt'
+            )
+            assert_equal(res.status_code, 200, msg=res.json)
+        assert_equal(mock_user_info.call_count, 1)
+
+    @mock.patch('framework.auth.cas.CasClient.profile')
+    def test_invalid_token_is_not_cached(self, mock_user_info):
+        mock_user_info.return_value = cas.CasResponse(
+            authenticated=False, user=None,
+            attributes={'accessTokenScope': ['osf.full_read']}
+        )
+
+        for _ in range(2):
+            res = self.app.get(
+                self.reachable_url,
+                auth='invalid_token', auth_type='jwt',
+                expect_errors=True
+            )
+            assert_equal(res.status_code, 401, msg=res.json)
+        assert_equal(mock_user_info.call_count, 2)
+
 
 class TestOAuthScopedAccess(ApiTestCase):
     """Verify that OAuth2 scopes restrict APIv2 access for a few sample views. These tests cover basic mechanics,
@@ -0,0 +1,118 @@
+import mock
+import pytest
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.base.middleware import ThrottleHeadersMiddleware
+from api.base.throttling import TestAnonRateThrottle
+
+
+class ClockedThrottle(TestAnonRateThrottle):
+    rate = '3/minute'
+
+
+@pytest.fixture()
+def clock():
+    return mock.Mock(return_value=1000.0)
+
+
+@pytest.fixture()
+def throttle(clock):
+    throttle = ClockedThrottle()
+    throttle.cache = LocMemCache('throttle-tests', {})
+    throttle.timer = clock
+    return throttle
+
+
+@pytest.fixture()
+def request_factory():
+    def make_request():
+        return Request(APIRequestFactory().get('/', REMOTE_ADDR='10.0.0.1'))
+    return make_request
+
+
+class TestGCRAThrottle:
+
+    def test_allows_burst_then_throttles(self, throttle, request_factory):
+        assert all(throttle.allow_request(request_factory(), None) for _ in range(3))
+        assert not throttle.allow_request(request_factory(), None)
+        # One request is allowed again after one emission interval
+        assert throttle.wait() == 20
+
+    def test_bucket_refills_over_time(self, throttle, clock, request_factory):
+        for _ in range(3):
+            throttle.allow_request(request_factory(), None)
+        clock.return_value += 20
+        assert throttle.allow_request(request_factory(), None)
+        assert not throttle.allow_request(request_factory(), None)
+        clock.return_value += 60
+        assert all(throttle.allow_request(request_factory(), None) for _ in range(3))
+
+    def test_key_holds_a_single_counter(self, throttle, request_factory):
+        request = request_factory()
+        throttle.allow_request(request, None)
+        throttle.allow_request(request, None)
+        assert throttle.cache.get(throttle.tat_key) == 1000 * 1000 + 2 * 20 * 1000
+
+    def test_refill_starts_a_new_counter(self, throttle, clock, request_factory):
+        throttle.allow_request(request_factory(), None)
+        old_key = throttle.tat_key
+        clock.return_value += 60
+        throttle.allow_request(request_factory(), None)
+        assert throttle.tat_key != old_key
+        assert throttle.cache.get(throttle.tat_key) == 1060 * 1000 + 20 * 1000
+        # A request still counting on the old counter is counted on the new one as well
+        throttle.cache.set(throttle.key, (0, 1000 * 1000))
+        throttle.allow_request(request_factory(), None)
+        assert throttle.cache.get(throttle.tat_key) == 1060 * 1000 + 2 * 20 * 1000
+
+    def test_counter_is_renewed_without_refilling_the_bucket(self, throttle, clock, request_factory):
+        for _ in range(3):
+            throttle.allow_request(request_factory(), None)
+        clock.return_value += 40
+        assert throttle.allow_request(request_factory(), None)
+        assert throttle.allow_request(request_factory(), None)
+        old_key = throttle.tat_key
+        # The counter is now older than one duration, while the client kept its bucket empty
+        clock.return_value += 40
+        assert throttle.allow_request(request_factory(), None)
+        assert throttle.tat_key != old_key
+        assert throttle.allow_request(request_factory(), None)
+        assert not throttle.allow_request(request_factory(), None)
+
+    def test_throttled_requests_do_not_consume_quota(self, throttle, clock, request_factory):
+        for _ in range(10):
+            throttle.allow_request(request_factory(), None)
+        clock.return_value += 20
+        assert throttle.allow_request(request_factory(), None)
+
+    def test_records_quota(self, throttle, request_factory):
+        request = request_factory()
+        throttle.allow_request(request, None)
+        assert request._request.throttle_quota == {'limit': 3, 'remaining': 2, 'reset': 20}
+        throttle.allow_request(request, None)
+        throttle.allow_request(request, None)
+        throttle.allow_request(request, None)
+        assert request._request.throttle_quota == {'limit': 3, 'remaining': 0, 'reset': 60}
+
+    def test_bypass_token(self, throttle):
+        request = Request(APIRequestFactory().get('/', HTTP_X_THROTTLE_TOKEN='test-token'))
+        assert all(throttle.allow_request(request, None) for _ in range(5))
+
+
+class TestThrottleHeadersMiddleware:
+
+    def test_adds_rate_limit_headers(self, throttle, request_factory):
+        request = request_factory()
+        throttle.allow_request(request, None)
+        response = ThrottleHeadersMiddleware().process_response(request._request, HttpResponse())
+        assert response['X-RateLimit-Limit'] == '3'
+        assert response['X-RateLimit-Remaining'] == '2'
+        assert response['X-RateLimit-Reset'] == '20'
+
+    def test_no_headers_without_throttles(self, request_factory):
+        response = ThrottleHeadersMiddleware().process_response(request_factory()._request, HttpResponse())
+        assert 'X-RateLimit-Limit' not in response
@@ -1,6 +1,7 @@
 import logging
 import pytest
 
+from framework.auth import cas
 from website.app import init_app
 from tests.json_api_test_app import JSONAPITestApp
 
@@ -35,3 +36,9 @@ def app():
 @pytest.fixture(autouse=True, scope='session')
 def app_init():
     init_app(routes=False, set_backends=False)
+
+
+@pytest.fixture(autouse=True)
+def clear_cas_token_cache():
+    # Tests reuse the same fake bearer tokens with different mocked CAS responses
+    cas.get_token_cache().clear()
@@ -154,3 +154,32 @@ class TestNodeEmbeds:
         res = app.get(url, auth=write_contrib_one.auth)
         assert res.status_code == 200
         assert res.json['data']['embeds']['contributors']['meta']['total_bibliographic'] == 3
+
+    def test_node_list_embed_contributors(
+            self, app, user, write_contrib_one,
+            write_contrib_two, root_node, child_two):
+
+        url = '/{}nodes/?embed=contributors&version=2.1'.format(API_BASE)
+        res = app.get(url, auth=user.auth)
+        assert res.status_code == 200
+
+        embedded = {
+            node['id']: node['embeds']['contributors']
+            for node in res.json['data']
+        }
+        root_contrib_ids = [
+            contrib['id'] for contrib in embedded[root_node._id]['data']
+        ]
+        assert root_contrib_ids == [
+            '{}-{}'.format(root_node._id, contrib._id)
+            for contrib in [user, write_contrib_one, write_contrib_two]
+        ]
+        assert embedded[root_node._id]['meta']['total'] == 3
+        assert embedded[root_node._id]['meta']['total_bibliographic'] == 3
+
+        child_contrib_ids = [
+            contrib['id'] for contrib in embedded[child_two._id]['data']
+        ]
+        assert child_contrib_ids == ['{}-{}'.format(child_two._id, user._id)]
+        assert embedded[child_two._id]['meta']['total_bibliographic'] == 1
+        assert embedded[child_two._id]['data'][0]['embeds']['users']['data']['id'] == user._id
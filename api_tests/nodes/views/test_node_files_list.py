@@ -8,6 +8,7 @@ from nose.tools import *  # flake8: noqa
 
 from framework.auth.core import Auth
 
+from addons.github.models import GithubFile
 from addons.github.tests.factories import GitHubAccountFactory
 from website.util import waterbutler_api_url_for
 from api.base.settings.defaults import API_BASE
@@ -297,6 +298,30 @@ class TestNodeFilesList(ApiTestCase):
         assert_equal(res.json['data'][0]['attributes']['name'], 'NewFile')
         assert_equal(res.json['data'][0]['attributes']['provider'], 'github')
 
+    def test_node_files_list_only_updates_changed_files(self):
+        self.add_github()
+        url = '/{}nodes/{}/files/github/'.format(API_BASE, self.project._id)
+        self._prepare_mock_wb_response(provider='github', files=[
+            {'name': 'abc', 'path': '/abc', 'etag': 'a1'},
+            {'name': 'xyz', 'path': '/xyz', 'etag': 'x1'},
+        ])
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(len(res.json['data']), 2)
+
+        self._prepare_mock_wb_response(provider='github', files=[
+            {'name': 'abc', 'path': '/abc', 'etag': 'a1'},
+            {'name': 'xyz', 'path': '/xyz', 'etag': 'x2'},
+        ])
+        res = self.app.get(url, auth=self.user.auth)
+        assert_equal(len(res.json['data']), 2)
+
+        assert_equal(GithubFile.objects.filter(node=self.project).count(), 2)
+        unchanged = GithubFile.objects.get(node=self.project, _path='/abc')
+        changed = GithubFile.objects.get(node=self.project, _path='/xyz')
+        assert_equal([entry['etag'] for entry in unchanged.history], ['a1'])
+        assert_equal([entry['etag'] for entry in changed.history], ['x1', 'x2'])
+        assert_true(unchanged.last_touched)
+
     def test_returns_node_file(self):
         self._prepare_mock_wb_response(
             provider='github', files=[{'name': 'NewFile'}],
@@ -1,6 +1,8 @@
 import pytest
 
 from dateutil.parser import parse as parse_date
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from api.base.settings.defaults import API_BASE
 from framework.auth.core import Auth
@@ -155,6 +157,25 @@ class TestNodeLogList:
         assert res.json['data'][API_LATEST]['attributes']['action'] == 'contributor_removed'
         assert res.json['data'][1]['attributes']['action'] == 'contributor_added'
 
+    def test_log_params_are_resolved_in_bulk(
+            self, app, user, user_auth, public_project, public_url):
+
+        def add_logs():
+            public_project.add_contributor(AuthUserFactory(), auth=user_auth, save=True)
+            public_project.add_pointer(ProjectFactory(creator=user, is_public=True), auth=user_auth, save=True)
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                res = app.get(public_url, auth=user.auth)
+            assert res.status_code == 200
+            return len(ctx.captured_queries)
+
+        add_logs()
+        few_logs = count_queries()
+        for _ in range(3):
+            add_logs()
+        assert count_queries() == few_logs
+
     def test_remove_addon(
             self, app, user, user_auth,
             public_project, public_url):
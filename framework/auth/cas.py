@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 
 import furl
+import hashlib
 import httplib as http
 import json
+import threading
+import time
 import urllib
+from collections import OrderedDict
 
 from lxml import etree
 import requests
@@ -184,11 +188,119 @@ class CasClient(object):
 
         resp = requests.post(url, data=payload)
         if resp.status_code == 204:
+            if payload.get('token'):
+                get_token_cache().invalidate(payload['token'])
+            else:
+                # All tokens of an application were revoked, we can't tell which ones they are
+                get_token_cache().clear()
             return True
         else:
             self._handle_error(resp)
 
 
+class CasTokenCache(object):
+    """Bounded, TTL-based cache of CAS profile responses for OAuth2 access tokens.
+
+    Entries are kept in an in-process LRU and, if `backend` names a Django cache, in that
+    shared cache as well. Keys are a hash of the token; the token itself is never stored.
+    Revoking a token clears it from this process and from the shared cache; other processes
+    may keep serving it from memory for at most `ttl` seconds.
+    """
+
+    KEY_PREFIX = 'cas-token'
+    GENERATION_KEY = 'cas-token-generation'
+
+    def __init__(self, max_size, ttl, backend=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = backend
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0
+
+    @property
+    def shared(self):
+        if not self.backend:
+            return None
+        from django.core.cache import caches
+        return caches[self.backend]
+
+    @staticmethod
+    def hash_token(access_token):
+        return hashlib.sha256(access_token).hexdigest()
+
+    def _shared_key(self, token_hash):
+        generation = self.shared.get(self.GENERATION_KEY, 0)
+        return '{}:{}:{}'.format(self.KEY_PREFIX, generation, token_hash)
+
+    def get(self, access_token):
+        """Return the cached `CasResponse` for `access_token`, or `None`."""
+        if not self.enabled:
+            return None
+        token_hash = self.hash_token(access_token)
+        with self._lock:
+            entry = self._entries.pop(token_hash, None)
+            if entry and entry[0] > time.time():
+                self._entries[token_hash] = entry
+                return self._to_response(entry[1], access_token)
+        if self.shared is not None:
+            data = self.shared.get(self._shared_key(token_hash))
+            if data is not None:
+                self._store(token_hash, data)
+                return self._to_response(data, access_token)
+        return None
+
+    def set(self, access_token, cas_response):
+        """Cache an authenticated `CasResponse` for `access_token`."""
+        if not self.enabled or not cas_response.authenticated:
+            return
+        token_hash = self.hash_token(access_token)
+        attributes = dict(cas_response.attributes)
+        attributes.pop('accessToken', None)
+        data = {
+            'status': cas_response.status,
+            'user': cas_response.user,
+            'attributes': attributes,
+        }
+        self._store(token_hash, data)
+        if self.shared is not None:
+            self.shared.set(self._shared_key(token_hash), data, self.ttl)
+
+    def invalidate(self, access_token):
+        token_hash = self.hash_token(access_token)
+        with self._lock:
+            self._entries.pop(token_hash, None)
+        if self.shared is not None:
+            self.shared.delete(self._shared_key(token_hash))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.shared is not None:
+            # Bumping the generation orphans every shared entry, they expire on their own
+            try:
+                self.shared.incr(self.GENERATION_KEY)
+            except ValueError:
+                self.shared.set(self.GENERATION_KEY, 1, None)
+
+    def _store(self, token_hash, data):
+        with self._lock:
+            self._entries.pop(token_hash, None)
+            self._entries[token_hash] = (time.time() + self.ttl, data)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _to_response(data, access_token):
+        resp = CasResponse(authenticated=True, status=data['status'], user=data['user'],
+                           attributes=dict(data['attributes']))
+        resp.attributes['accessToken'] = access_token
+        return resp
+
+
 def parse_auth_header(header):
     """
     Given an Authorization header string, e.g. 'Bearer abc123xyz',
@@ -212,6 +324,20 @@ def get_client():
     return CasClient(settings.CAS_SERVER_URL)
 
 
+_token_cache = None
+
+
+def get_token_cache():
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = CasTokenCache(
+            max_size=settings.CAS_TOKEN_CACHE_SIZE,
+            ttl=settings.CAS_TOKEN_CACHE_TTL,
+            backend=settings.CAS_TOKEN_CACHE_BACKEND,
+        )
+    return _token_cache
+
+
 def get_login_url(*args, **kwargs):
     """
     Convenience function for getting a login URL for a service.
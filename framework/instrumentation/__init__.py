@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""Per-request instrumentation for the Flask app and the Django API.
+
+With ``settings.INSTRUMENT_REQUESTS``, every request reports the number and
+total time of its SQL queries, the queries repeated often enough to look like
+an N+1 (grouped by a fingerprint with the literals stripped out), and the time
+spent in named sections such as API serializers and embeds.
+
+A fraction ``settings.PROFILE_SAMPLE_RATE`` of requests is also profiled by
+sampling the request thread's stack from a background thread every
+``settings.PROFILE_SAMPLE_INTERVAL`` seconds, which leaves the request itself
+untraced. Samples are written as folded stacks (one ``frame;frame;frame count``
+line per stack, as read by flamegraph tools) to ``settings.PROFILE_OUTPUT_DIR``,
+or logged if it is not set.
+
+Reports are logged as JSON by this module's logger, for aggregation.
+"""
+import collections
+import functools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.db import connection
+from flask import request
+
+from website import settings
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+FINGERPRINT_PATTERNS = [
+    # String literals, including escaped quotes
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    # Numbers that are not part of an identifier
+    (re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b'), '?'),
+    # IN (?, ?, ...) lists of any length
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?)'),
+]
+
+
+def fingerprint(sql):
+    """Return `sql` with its literals replaced by placeholders, so that queries which
+    only differ by their parameters have the same fingerprint.
+    """
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+class StackSampler(threading.Thread):
+    """Samples the stack of another thread at a fixed interval."""
+
+    def __init__(self, thread_id, interval):
+        super(StackSampler, self).__init__(name='stack-sampler-{}'.format(thread_id))
+        self.daemon = True
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stopped = False
+
+    def run(self):
+        while not self._stopped:
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self.fold(frame)] += 1
+
+    def stop(self):
+        self._stopped = True
+        self.join()
+
+    @staticmethod
+    def fold(frame):
+        frames = []
+        while frame is not None:
+            frames.append('{}:{}'.format(frame.f_code.co_filename, frame.f_code.co_name))
+            frame = frame.f_back
+        return ';'.join(reversed(frames))
+
+
+class RequestMetrics(object):
+
+    def __init__(self, profile=False):
+        self.id = uuid.uuid4().hex
+        self.started = time.time()
+        self.timings = collections.defaultdict(float)
+        self._depths = collections.defaultdict(int)
+        # Django only records the queries of a connection while this flag is set;
+        # connections are per thread, so this only affects the current request
+        self._initial_queries = len(connection.queries_log)
+        connection.force_debug_cursor = True
+        self.sampler = None
+        if profile:
+            self.sampler = StackSampler(threading.current_thread().ident, settings.PROFILE_SAMPLE_INTERVAL)
+            self.sampler.start()
+
+    @contextmanager
+    def timer(self, name):
+        # Only the outermost of nested sections with the same name is timed
+        self._depths[name] += 1
+        started = time.time()
+        try:
+            yield
+        finally:
+            self._depths[name] -= 1
+            if not self._depths[name]:
+                self.timings[name] += time.time() - started
+
+    def stop(self):
+        connection.force_debug_cursor = False
+        if self.sampler is not None:
+            self.sampler.stop()
+
+    def report(self, method, path, status_code):
+        queries = list(connection.queries_log)[self._initial_queries:]
+        self.stop()
+        counts = collections.Counter(fingerprint(query['sql']) for query in queries)
+        report = {
+            'id': self.id,
+            'method': method,
+            'path': path,
+            'status': status_code,
+            'duration': round(time.time() - self.started, 4),
+            'queries': {
+                'count': len(queries),
+                'duration': round(sum(float(query['time']) for query in queries), 4),
+                'repeated': [
+                    {'count': count, 'sql': sql}
+                    for sql, count in counts.most_common()
+                    if count >= settings.N_PLUS_ONE_QUERY_THRESHOLD
+                ],
+            },
+            'timings': {name: round(duration, 4) for name, duration in self.timings.items()},
+        }
+        if self.sampler is not None:
+            report['profile'] = self.write_profile()
+        return report
+
+    def write_profile(self):
+        lines = ['{} {}'.format(stack, count) for stack, count in self.sampler.stacks.most_common()]
+        if not settings.PROFILE_OUTPUT_DIR:
+            logger.info('Profile of request %s:\n%s', self.id, '\n'.join(lines))
+            return None
+        path = os.path.join(settings.PROFILE_OUTPUT_DIR, '{}.folded'.format(self.id))
+        with open(path, 'w') as fp:
+            fp.write('\n'.join(lines))
+        return path
+
+
+def get_metrics():
+    """Return the `RequestMetrics` of the current request, or None if it is not instrumented."""
+    return getattr(_local, 'metrics', None)
+
+
+@contextmanager
+def timer(name):
+    """Add the time spent in this block to the section `name` of the current request's report."""
+    metrics = get_metrics()
+    if metrics is None:
+        yield
+        return
+    with metrics.timer(name):
+        yield
+
+
+def timed(name):
+    """Decorator version of `timer`."""
+    def wrapper(func):
+        @functools.wraps(func)
+        def wrapped(*args, **kwargs):
+            with timer(name):
+                return func(*args, **kwargs)
+        return wrapped
+    return wrapper
+
+
+def start_request():
+    discard_request()
+    profile = bool(settings.PROFILE_SAMPLE_RATE) and random.random() < settings.PROFILE_SAMPLE_RATE
+    if settings.INSTRUMENT_REQUESTS or profile:
+        _local.metrics = RequestMetrics(profile=profile)
+
+
+def finish_request(method, path, status_code):
+    """Log and return the report of the current request, if it is instrumented."""
+    metrics = get_metrics()
+    if metrics is None:
+        return None
+    _local.metrics = None
+    report = metrics.report(method, path, status_code)
+    logger.info(json.dumps(report))
+    return report
+
+
+def discard_request(error=None):
+    """Stop instrumenting the current request without reporting it, e.g. after an unhandled error."""
+    metrics = get_metrics()
+    if metrics is not None:
+        _local.metrics = None
+        metrics.stop()
+
+
+def instrumentation_before_request():
+    start_request()
+
+
+def instrumentation_after_request(response):
+    finish_request(request.method, request.path, response.status_code)
+    return response
+
+
+handlers = {
+    'before_request': instrumentation_before_request,
+    'after_request': instrumentation_after_request,
+    'teardown_request': discard_request,
+}
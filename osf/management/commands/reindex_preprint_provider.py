@@ -3,14 +3,13 @@ import logging
 
 from django.core.management.base import BaseCommand
 from osf.models import PreprintProvider
-from website.preprints.tasks import update_preprint_share
+from scripts.share_pipeline import backfill
 
 logger = logging.getLogger(__name__)
 
 def reindex_provider(provider):
     logger.info('Sending {} preprints to SHARE...'.format(provider.preprint_services.count()))
-    for preprint in provider.preprint_services.all():
-        update_preprint_share(preprint, old_subjects=None, share_type=None)
+    backfill('preprint', provider.preprint_services.all(), dry_run=False)
 
 class Command(BaseCommand):
     def add_arguments(self, parser):
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0077_add_maintenance_permissions'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='draftregistrationapproval',
+            index_together=set([('state', 'initiation_date'), ('state', 'end_date')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='embargo',
+            index_together=set([('state', 'initiation_date'), ('state', 'end_date')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='embargoterminationapproval',
+            index_together=set([('state', 'initiation_date'), ('state', 'end_date')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='registrationapproval',
+            index_together=set([('state', 'initiation_date'), ('state', 'end_date')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='retraction',
+            index_together=set([('state', 'initiation_date'), ('state', 'end_date')]),
+        ),
+    ]
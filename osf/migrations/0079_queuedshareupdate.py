@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+import django_extensions.db.fields
+import osf.utils.datetime_aware_jsonfield
+import osf.utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('osf', '0078_sanction_due_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedShareUpdate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('kind', models.CharField(choices=[('node', 'node'), ('preprint', 'preprint')], max_length=32)),
+                ('target_id', models.CharField(max_length=255)),
+                ('share_type', models.CharField(blank=True, max_length=255, null=True)),
+                ('old_subjects', osf.utils.datetime_aware_jsonfield.DateTimeAwareJSONField(blank=True, default=list)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('send_after', osf.utils.fields.NonNaiveDateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='queuedshareupdate',
+            unique_together=set([('kind', 'target_id')]),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+import logging
+
+from django.db import migrations, models
+from django.db.models import Max
+
+logger = logging.getLogger(__file__)
+
+BACKFILL_BATCH_SIZE = 10000
+
+BACKFILL_SQL = """
+    UPDATE osf_fileversion
+    SET sha256 = metadata ->> 'sha256'
+    WHERE id >= %s AND id < %s AND metadata ? 'sha256';
+"""
+
+
+def populate_sha256(state, schema):
+    # Not atomic, so that every batch is committed on its own
+    FileVersion = state.get_model('osf', 'fileversion')
+    max_id = FileVersion.objects.aggregate(Max('id'))['id__max'] or 0
+    with schema.connection.cursor() as cursor:
+        for start in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+            cursor.execute(BACKFILL_SQL, [start, start + BACKFILL_BATCH_SIZE])
+            logger.info('Populated sha256 of file versions {} to {}'.format(start, min(start + BACKFILL_BATCH_SIZE, max_id + 1)))
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY cannot be run in a txn
+
+    dependencies = [
+        ('osf', '0079_queuedshareupdate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileversion',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(populate_sha256, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL([
+                    'CREATE INDEX CONCURRENTLY osf_fileversion_sha256 ON osf_fileversion (sha256);',
+                ], [
+                    'DROP INDEX IF EXISTS osf_fileversion_sha256, RESTRICT;'
+                ]),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='fileversion',
+                    name='sha256',
+                    field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+                ),
+            ],
+        ),
+    ]
@@ -14,6 +14,7 @@ from osf.models.conference import Conference, MailRecord  # noqa
 from osf.models.citation import CitationStyle  # noqa
 from osf.models.archive import ArchiveJob, ArchiveTarget  # noqa
 from osf.models.queued_mail import QueuedMail  # noqa
+from osf.models.queued_share_update import QueuedShareUpdate  # noqa
 from osf.models.external import ExternalAccount, ExternalProvider  # noqa
 from osf.models.oauth import ApiOAuth2Application, ApiOAuth2PersonalToken, ApiOAuth2Scope  # noqa
 from osf.models.licenses import NodeLicense, NodeLicenseRecord  # noqa
@@ -1,19 +1,100 @@
+import atexit
+import json
 import logging
+import threading
+import time
 
 from dateutil import parser
-from django.db import models, transaction
+from django.db import connection, models
 from django.utils import timezone
 
 from framework.sessions import session
 from osf.models.base import BaseModel
 from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
+from website import settings
 
 logger = logging.getLogger(__name__)
 
 
+def merge_counts(counts, delta):
+    """Add the (possibly nested) counts in ``delta`` to ``counts``, in place."""
+    for key, value in delta.items():
+        if isinstance(value, dict):
+            merge_counts(counts.setdefault(key, {}), value)
+        else:
+            counts[key] = counts.get(key, 0) + value
+    return counts
+
+
+class CounterBuffer(object):
+    """Per-process write-behind buffer for counter increments.
+
+    Increments to the same counter are merged in memory and written with a single upsert
+    per counter once ANALYTICS_COUNTER_FLUSH_INTERVAL seconds have passed since the last
+    flush. With an interval of 0 every increment is written straight away. Whatever is
+    still buffered is flushed when the process exits.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._pending = {}
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+
+    def add(self, key, delta):
+        with self._lock:
+            merge_counts(self._pending.setdefault(key, {}), delta)
+            due = time.time() - self._last_flush >= settings.ANALYTICS_COUNTER_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.time()
+        # Upsert in key order so that concurrent flushes cannot deadlock each other
+        keys = sorted(pending)
+        for i, key in enumerate(keys):
+            try:
+                self.model.upsert_counts(key, pending[key])
+            except Exception:
+                with self._lock:
+                    for unsaved in keys[i:]:
+                        merge_counts(self._pending.setdefault(unsaved, {}), pending[unsaved])
+                raise
+
+    def __len__(self):
+        return len(self._pending)
+
+
 class UserActivityCounter(BaseModel):
     primary_identifier_name = '_id'
 
+    UPSERT_QUERY = """
+    INSERT INTO osf_useractivitycounter (_id, action, date, total, created, modified)
+    VALUES (%s, %s::jsonb, %s::jsonb, %s, now(), now())
+    ON CONFLICT (_id) DO UPDATE SET
+        total = osf_useractivitycounter.total + EXCLUDED.total,
+        modified = EXCLUDED.modified,
+        action = osf_useractivitycounter.action || COALESCE((
+            SELECT jsonb_object_agg(a.key, jsonb_build_object(
+                'total', COALESCE((osf_useractivitycounter.action -> a.key ->> 'total')::int, 0) + (a.value ->> 'total')::int,
+                'date', COALESCE(osf_useractivitycounter.action -> a.key -> 'date', '{}'::jsonb) || COALESCE((
+                    SELECT jsonb_object_agg(d.key, COALESCE((osf_useractivitycounter.action -> a.key -> 'date' ->> d.key)::int, 0) + d.value::int)
+                    FROM jsonb_each_text(a.value -> 'date') AS d
+                ), '{}'::jsonb)
+            ))
+            FROM jsonb_each(EXCLUDED.action) AS a
+        ), '{}'::jsonb),
+        date = osf_useractivitycounter.date || COALESCE((
+            SELECT jsonb_object_agg(d.key, COALESCE(osf_useractivitycounter.date -> d.key, '{}'::jsonb) || COALESCE((
+                SELECT jsonb_object_agg(f.key, COALESCE((osf_useractivitycounter.date -> d.key ->> f.key)::int, 0) + f.value::int)
+                FROM jsonb_each_text(d.value) AS f
+            ), '{}'::jsonb))
+            FROM jsonb_each(EXCLUDED.date) AS d
+        ), '{}'::jsonb);
+    """
+
     _id = models.CharField(max_length=5, null=False, blank=False, db_index=True,
                            unique=True)  # 5 in prod
     action = DateTimeAwareJSONField(default=dict)
@@ -30,32 +111,44 @@ class UserActivityCounter(BaseModel):
     @classmethod
     def increment(cls, user_id, action, date_string):
         date = parser.parse(date_string).strftime('%Y/%m/%d')
-        with transaction.atomic():
-            # select_for_update locks the row but only inside a transaction
-            uac, created = cls.objects.select_for_update().get_or_create(_id=user_id)
-            if uac.total > 0:
-                uac.total += 1
-            else:
-                uac.total = 1
-            if action in uac.action:
-                uac.action[action]['total'] += 1
-                if date in uac.action[action]['date']:
-                    uac.action[action]['date'][date] += 1
-                else:
-                    uac.action[action]['date'][date] = 1
-            else:
-                uac.action[action] = dict(total=1, date={date: 1})
-            if date in uac.date:
-                uac.date[date]['total'] += 1
-            else:
-                uac.date[date] = dict(total=1)
-            uac.save()
+        user_activity_counter_buffer.add(user_id, {
+            'total': 1,
+            'action': {action: {'total': 1, 'date': {date: 1}}},
+            'date': {date: {'total': 1}},
+        })
         return True
 
+    @classmethod
+    def upsert_counts(cls, user_id, delta):
+        """Add the merged increments in ``delta`` to the counter of ``user_id`` in one statement."""
+        with connection.cursor() as cursor:
+            cursor.execute(cls.UPSERT_QUERY, [
+                user_id,
+                json.dumps(delta.get('action', {})),
+                json.dumps(delta.get('date', {})),
+                delta.get('total', 0),
+            ])
+
 
 class PageCounter(BaseModel):
     primary_identifier_name = '_id'
 
+    UPSERT_QUERY = """
+    INSERT INTO osf_pagecounter (_id, date, total, "unique", created, modified)
+    VALUES (%s, %s::jsonb, %s, %s, now(), now())
+    ON CONFLICT (_id) DO UPDATE SET
+        total = osf_pagecounter.total + EXCLUDED.total,
+        "unique" = osf_pagecounter."unique" + EXCLUDED."unique",
+        modified = EXCLUDED.modified,
+        date = osf_pagecounter.date || COALESCE((
+            SELECT jsonb_object_agg(d.key, COALESCE(osf_pagecounter.date -> d.key, '{}'::jsonb) || COALESCE((
+                SELECT jsonb_object_agg(f.key, COALESCE((osf_pagecounter.date -> d.key ->> f.key)::int, 0) + f.value::int)
+                FROM jsonb_each_text(d.value) AS f
+            ), '{}'::jsonb))
+            FROM jsonb_each(EXCLUDED.date) AS d
+        ), '{}'::jsonb);
+    """
+
     _id = models.CharField(max_length=300, null=False, blank=False, db_index=True,
                            unique=True)  # 272 in prod
     date = DateTimeAwareJSONField(default=dict)
@@ -77,63 +170,54 @@ class PageCounter(BaseModel):
         date = timezone.now()
         date_string = date.strftime('%Y/%m/%d')
         visited_by_date = session.data.get('visited_by_date', {'date': date_string, 'pages': []})
+        counts = {'total': 1}
+        delta = {'date': {date_string: counts}}
+
+        # if they visited something today
+        if date_string == visited_by_date['date']:
+            # if they haven't visited this page today, count a unique visitor for today
+            if cleaned_page not in visited_by_date['pages']:
+                counts['unique'] = 1
+        # if they haven't visited something today
+        else:
+            # set their visited by date to blank
+            visited_by_date['date'] = date_string
+            visited_by_date['pages'] = []
+            counts['unique'] = 1
+
+        # update their sessions
+        visited_by_date['pages'].append(cleaned_page)
+        session.data['visited_by_date'] = visited_by_date
+
+        # if a download counter is being updated, only perform the update
+        # if the user who is downloading isn't a contributor to the project
+        page_type = cleaned_page.split(':')[0]
+        if page_type == 'download' and node_info:
+            if node_info['contributors'].filter(guids___id__isnull=False, guids___id=session.data.get('auth_user_id')).exists():
+                page_counter_buffer.add(cleaned_page, delta)
+                return
+
+        visited = session.data.get('visited', [])
+        if page not in visited:
+            delta['unique'] = 1
+            visited.append(page)
+            session.data['visited'] = visited
+
+        session.save()
+        delta['total'] = 1
+
+        page_counter_buffer.add(cleaned_page, delta)
 
-        with transaction.atomic():
-            model_instance, created = cls.objects.select_for_update().get_or_create(_id=cleaned_page)
-
-            # if they visited something today
-            if date_string == visited_by_date['date']:
-                # if they haven't visited this page today
-                if cleaned_page not in visited_by_date['pages']:
-                    # if the model_instance has today in it
-                    if date_string in model_instance.date.keys():
-                        # increment the number of unique visitors for today
-                        model_instance.date[date_string]['unique'] += 1
-                    else:
-                        # set the number of unique visitors for today to 1
-                        model_instance.date[date_string] = dict(unique=1)
-            # if they haven't visited something today
-            else:
-                # set their visited by date to blank
-                visited_by_date['date'] = date_string
-                visited_by_date['pages'] = []
-                # if the model_instance has today in it
-                if date_string in model_instance.date.keys():
-                    # increment the number of unique visitors for today
-                    model_instance.date[date_string]['unique'] += 1
-                else:
-                    # set the number of unique visitors to 1
-                    model_instance.date[date_string] = dict(unique=1)
-
-            # update their sessions
-            visited_by_date['pages'].append(cleaned_page)
-            session.data['visited_by_date'] = visited_by_date
-
-            if date_string in model_instance.date.keys():
-                if 'total' not in model_instance.date[date_string].keys():
-                    model_instance.date[date_string].update(total=0)
-                model_instance.date[date_string]['total'] += 1
-            else:
-                model_instance.date[date_string] = dict(total=1)
-
-            # if a download counter is being updated, only perform the update
-            # if the user who is downloading isn't a contributor to the project
-            page_type = cleaned_page.split(':')[0]
-            if page_type == 'download' and node_info:
-                if node_info['contributors'].filter(guids___id__isnull=False, guids___id=session.data.get('auth_user_id')).exists():
-                    model_instance.save()
-                    return
-
-            visited = session.data.get('visited', [])
-            if page not in visited:
-                model_instance.unique += 1
-                visited.append(page)
-                session.data['visited'] = visited
-
-            session.save()
-            model_instance.total += 1
-
-            model_instance.save()
+    @classmethod
+    def upsert_counts(cls, page, delta):
+        """Add the merged increments in ``delta`` to the counter of ``page`` in one statement."""
+        with connection.cursor() as cursor:
+            cursor.execute(cls.UPSERT_QUERY, [
+                page,
+                json.dumps(delta.get('date', {})),
+                delta.get('total', 0),
+                delta.get('unique', 0),
+            ])
 
     @classmethod
     def get_basic_counters(cls, page):
@@ -142,3 +226,18 @@ class PageCounter(BaseModel):
             return (counter.unique, counter.total)
         except cls.DoesNotExist:
             return (None, None)
+
+
+user_activity_counter_buffer = CounterBuffer(UserActivityCounter)
+page_counter_buffer = CounterBuffer(PageCounter)
+
+
+@atexit.register
+def flush_counters():
+    """Write any buffered counter increments to the database."""
+    for buffer in (user_activity_counter_buffer, page_counter_buffer):
+        if len(buffer):
+            try:
+                buffer.flush()
+            except Exception:
+                logger.exception('Could not flush buffered {} increments'.format(buffer.model.__name__))
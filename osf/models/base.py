@@ -9,11 +9,12 @@ from django.core.exceptions import MultipleObjectsReturned
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import models
 from django.db.models import ForeignKey
-from django.db.models.signals import post_save
+from django.db.models.signals import class_prepared, post_delete, post_save
 from django.dispatch import receiver
 from django_extensions.db.models import TimeStampedModel
 from include import IncludeQuerySet
 
+from osf.utils import guid_cache
 from osf.utils.caching import cached_property
 from osf.exceptions import ValidationError
 from osf.utils.fields import LowercaseCharField, NonNaiveDateTimeField
@@ -151,6 +152,23 @@ class Guid(BaseModel):
         except cls.DoesNotExist:
             return None
 
+    @classmethod
+    def load_referents(cls, guids):
+        """Load the referents of many GUIDs, with one query per referent model.
+        Returns a dict mapping each GUID that resolves to its referent.
+        """
+        pks_by_content_type = {}
+        for entry in guid_cache.resolve_guids(guids).values():
+            pks_by_content_type.setdefault(entry.content_type_id, {})[entry.object_id] = entry._id
+        referents = {}
+        for content_type_id, guids_by_pk in pks_by_content_type.items():
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            if model is None:
+                continue
+            for pk, referent in model.objects.in_bulk(list(guids_by_pk)).items():
+                referents[guids_by_pk[pk]] = referent
+        return referents
+
     class Meta:
         ordering = ['-created']
         get_latest_by = 'created'
@@ -329,3 +347,23 @@ def ensure_guid(sender, instance, created, **kwargs):
             del instance._prefetched_objects_cache['guids']
         Guid.objects.create(object_id=instance.pk, content_type=ContentType.objects.get_for_model(instance),
                             _id=generate_guid(instance.__guid_min_length__))
+
+
+@receiver(post_save, sender=Guid)
+@receiver(post_delete, sender=Guid)
+def invalidate_cached_guid(sender, instance, **kwargs):
+    guid_cache.invalidate_guid(instance._id)
+
+
+def invalidate_cached_guid_referent(sender, instance, **kwargs):
+    # Saving a referent may change its deep url, e.g. when a file is moved
+    guid_cache.invalidate_referent(ContentType.objects.get_for_model(instance).id, instance.pk)
+
+
+@receiver(class_prepared)
+def connect_guid_referent(sender, **kwargs):
+    # Connected to each referent model, including proxies, which send signals as themselves,
+    # rather than to the saves of every model
+    if issubclass(sender, (GuidMixin, OptionalGuidMixin)):
+        post_save.connect(invalidate_cached_guid_referent, sender=sender)
+        post_delete.connect(invalidate_cached_guid_referent, sender=sender)
@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from include import IncludeManager
 
 from osf.utils.fields import NonNaiveDateTimeField
+from osf.utils.permission_cache import clear_permission_cache
 from website.util.permissions import (
     READ,
     WRITE,
@@ -54,6 +57,13 @@ class Contributor(AbstractBaseContributor):
         # NOTE: Adds an _order column
         order_with_respect_to = 'node'
 
+
+@receiver(post_save, sender=Contributor)
+@receiver(post_delete, sender=Contributor)
+def clear_cached_permissions(sender, instance, **kwargs):
+    clear_permission_cache()
+
+
 class InstitutionalContributor(AbstractBaseContributor):
     institution = models.ForeignKey('Institution', on_delete=models.CASCADE)
 
@@ -5,12 +5,14 @@ import os
 
 import requests
 from dateutil.parser import parse as parse_date
-from django.db import models
+from django.db import connection, models
 from django.db.models import Manager
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
 from typedmodels.models import TypedModel, TypedModelManager
 from include import IncludeManager
+from psycopg2._psycopg import AsIs
 
 from framework.analytics import get_basic_counters
 from framework import sentry
@@ -18,6 +20,7 @@ from osf.models.base import BaseModel, OptionalGuidMixin, ObjectIDMixin
 from osf.models.comment import CommentableMixin
 from osf.models.mixins import Taggable
 from osf.models.validators import validate_location
+from osf.utils import guid_cache
 from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
 from osf.utils.fields import NonNaiveDateTimeField
 from website.files import utils
@@ -32,9 +35,88 @@ __all__ = (
     'TrashedFileNode',
 )
 
+# (provider, kind) -> the file node class that `BaseFileNode.resolve_class` returns for them,
+# see `_get_provider_map`
 PROVIDER_MAP = {}
+# Number of file node classes registered when PROVIDER_MAP was built
+_provider_map_size = None
 logger = logging.getLogger(__name__)
 
+# Subtree operations. Each one walks the descendants of a folder with a recursive CTE
+# and updates all of them with a single statement.
+
+# Trash the live descendants of a folder. Descendants that were already trashed are left
+# alone, along with their own descendants, so that they can still be restored separately.
+# With %(store_paths)s, _path and _materialized_path are filled in from the tree, for
+# providers that compute them instead of storing them
+TRASH_DESCENDANTS_SQL = """
+    WITH RECURSIVE descendants_cte(id, materialized_path) AS (
+      SELECT
+        T.id,
+        %(root_path)s || T.name || CASE WHEN T.type = ANY(%(file_types)s) THEN '' ELSE '/' END
+      FROM %(table)s AS T
+      WHERE T.parent_id = %(root_id)s AND NOT T.type = ANY(%(trashed_types)s)
+      UNION ALL
+      SELECT
+        T.id,
+        R.materialized_path || T.name || CASE WHEN T.type = ANY(%(file_types)s) THEN '' ELSE '/' END
+      FROM descendants_cte AS R
+        JOIN %(table)s AS T ON T.parent_id = R.id
+      WHERE NOT T.type = ANY(%(trashed_types)s)
+    )
+    UPDATE %(table)s AS F
+    SET
+      type = CASE WHEN F.type = ANY(%(file_types)s) THEN %(trashed_file_type)s ELSE %(trashed_folder_type)s END,
+      deleted_on = %(deleted_on)s,
+      deleted_by_id = %(deleted_by_id)s,
+      modified = %(modified)s,
+      _path = CASE WHEN %(store_paths)s
+        THEN '/' || F._id || CASE WHEN F.type = ANY(%(file_types)s) THEN '' ELSE '/' END
+        ELSE F._path END,
+      _materialized_path = CASE WHEN %(store_paths)s THEN R.materialized_path ELSE F._materialized_path END
+    FROM descendants_cte AS R
+    WHERE F.id = R.id
+    RETURNING F.id, F._id, F.type;
+"""
+
+# Restore the descendants of a trashed folder that were trashed along with it
+RESTORE_DESCENDANTS_SQL = """
+    WITH RECURSIVE descendants_cte(id) AS (
+      SELECT T.id
+      FROM %(table)s AS T
+      WHERE T.parent_id = %(root_id)s AND T.type = ANY(%(trashed_types)s) AND T.deleted_on = %(deleted_on)s
+      UNION ALL
+      SELECT T.id
+      FROM descendants_cte AS R
+        JOIN %(table)s AS T ON T.parent_id = R.id
+      WHERE T.type = ANY(%(trashed_types)s) AND T.deleted_on = %(deleted_on)s
+    )
+    UPDATE %(table)s AS F
+    SET type = CASE WHEN F.type = %(trashed_file_type)s THEN %(file_type)s ELSE %(folder_type)s END
+    FROM descendants_cte AS R
+    WHERE F.id = R.id
+    RETURNING F.id, F._id, F.type;
+"""
+
+# Re-home the live descendants of a folder on another node
+MOVE_DESCENDANTS_SQL = """
+    WITH RECURSIVE descendants_cte(id) AS (
+      SELECT T.id
+      FROM %(table)s AS T
+      WHERE T.parent_id = %(root_id)s AND NOT T.type = ANY(%(trashed_types)s)
+      UNION ALL
+      SELECT T.id
+      FROM descendants_cte AS R
+        JOIN %(table)s AS T ON T.parent_id = R.id
+      WHERE NOT T.type = ANY(%(trashed_types)s)
+    )
+    UPDATE %(table)s AS F
+    SET node_id = %(node_id)s, modified = %(modified)s
+    FROM descendants_cte AS R
+    WHERE F.id = R.id AND F.node_id IS DISTINCT FROM %(node_id)s
+    RETURNING F.id, F._id, F.type;
+"""
+
 
 class BaseFileNodeManager(TypedModelManager, IncludeManager):
 
@@ -227,28 +309,27 @@ class BaseFileNode(TypedModel, CommentableMixin, OptionalGuidMixin, Taggable, Ob
 
     @classmethod
     def resolve_class(cls, provider, type_integer):
-        type_mapping = {0: Folder, 1: File, 2: None}
-        type_cls = type_mapping[type_integer]
+        try:
+            return _get_provider_map()[(provider, type_integer)]
+        except KeyError:
+            type_cls = {0: Folder, 1: File, 2: None}[type_integer]
+            raise UnableToResolveFileClass('Could not resolve class for {} and {}'.format(provider, type_cls))
 
-        for subclass in BaseFileNode.__subclasses__():
-            if type_cls:
-                for subsubclass in subclass.__subclasses__():
-                    if issubclass(subsubclass, type_cls) and subsubclass._provider == provider:
-                        return subsubclass
-            else:
-                if subclass._provider == provider:
-                    return subclass
-        raise UnableToResolveFileClass('Could not resolve class for {} and {}'.format(provider, type_cls))
+    @classmethod
+    def resolve_classes(cls, keys):
+        """Resolve many (provider, type_integer) pairs at once, as `resolve_class` does.
+
+        :return dict: The file node class of each pair
+        """
+        provider_map = _get_provider_map()
+        return {
+            key: provider_map[key] if key in provider_map else cls.resolve_class(*key)
+            for key in set(keys)
+        }
 
     def _resolve_class(self, type_cls):
-        for subclass in BaseFileNode.__subclasses__():
-            if type_cls:
-                for subsubclass in subclass.__subclasses__():
-                    if issubclass(subsubclass, type_cls) and subsubclass._provider == self.provider:
-                        return subsubclass
-            else:
-                if subclass._provider == self.provider:
-                    return subclass
+        type_integer = {Folder: self.FOLDER, File: self.FILE, None: self.ANY}[type_cls]
+        return _get_provider_map().get((self.provider, type_integer))
 
     def get_version(self, revision, required=False):
         """Find a version with identifier revision
@@ -359,15 +440,84 @@ class BaseFileNode(TypedModel, CommentableMixin, OptionalGuidMixin, Taggable, Ob
             self.node = self.parent.node
         if save:
             self.save()
-        if recursive and not self.is_file:
-            for child in self.children:
-                child._update_node(save=save)
+            if recursive and not self.is_file:
+                self._move_descendants()
+
+    def _run_subtree_query(self, sql, **params):
+        """Run one of the subtree queries on the descendants of this folder.
+
+        The queries bypass `save`, so the GUID directory entries of the updated descendants,
+        which hold their deep URLs, are invalidated here instead of by `post_save`.
+
+        :return list: (_id, new type) of the updated descendants
+        """
+        params.update(
+            table=AsIs(self._meta.db_table),
+            root_id=self.id,
+            trashed_types=list(TrashedFileNode._typedmodels_subtypes),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            updated = cursor.fetchall()
+        guid_cache.invalidate_referents(
+            ContentType.objects.get_for_model(BaseFileNode).id,
+            [pk for pk, _id, type_ in updated]
+        )
+        return [(_id, type_) for pk, _id, type_ in updated]
+
+    def _trash_descendants(self, user, deleted_on, store_paths=False):
+        """Trash the live descendants of this folder, as `delete` does one at a time.
+
+        :return list: `_id`s of the trashed files
+        """
+        updated = self._run_subtree_query(
+            TRASH_DESCENDANTS_SQL,
+            root_path=self._materialized_path or '/',
+            file_types=_get_file_types(),
+            trashed_file_type=TrashedFile._typedmodels_type,
+            trashed_folder_type=TrashedFolder._typedmodels_type,
+            deleted_on=deleted_on,
+            deleted_by_id=user.id if user else None,
+            modified=timezone.now(),
+            store_paths=store_paths,
+        )
+        return [_id for _id, type_ in updated if type_ == TrashedFile._typedmodels_type]
+
+    def _move_descendants(self):
+        """Move the live descendants of this folder to the node of this folder.
+
+        :return list: `_id`s of the files that changed nodes
+        """
+        file_types = _get_file_types()
+        updated = self._run_subtree_query(MOVE_DESCENDANTS_SQL, node_id=self.node_id, modified=timezone.now())
+        return [_id for _id, type_ in updated if type_ in file_types]
+
+    def _copy_descendants(self, src, batch_size=None):
+        """Copy the live descendants of the folder `src` under this copy of it, see `utils.copy_descendants`.
+
+        :return list: `_id`s of the copied files
+        """
+        return utils.copy_descendants(src, self, batch_size=batch_size)
+
+    def _restore_descendants(self, deleted_on, file_type, folder_type):
+        """Restore the descendants of this folder that were trashed along with it.
+
+        :return list: `_id`s of the restored files
+        """
+        updated = self._run_subtree_query(
+            RESTORE_DESCENDANTS_SQL,
+            deleted_on=deleted_on,
+            trashed_file_type=TrashedFile._typedmodels_type,
+            file_type=file_type,
+            folder_type=folder_type,
+        )
+        return [_id for _id, type_ in updated if type_ == file_type]
 
     # TODO: Remove unused parent param
     def delete(self, user=None, parent=None, save=True, deleted_on=None):
         """
         Recast a Folder to TrashedFolder, set fields related to deleting,
-        and recast children.
+        and recast children. Children are trashed with one query, see `_trash_descendants`.
         :param user:
         :param parent:
         :param save:
@@ -378,10 +528,9 @@ class BaseFileNode(TypedModel, CommentableMixin, OptionalGuidMixin, Taggable, Ob
         self.deleted_on = deleted_on = deleted_on or timezone.now()
 
         if not self.is_file:
+            if save:
+                self._trash_descendants(user, deleted_on)
             self.recast(TrashedFolder._typedmodels_type)
-
-            for child in BaseFileNode.objects.filter(parent=self.id).exclude(type__in=TrashedFileNode._typedmodels_subtypes):
-                child.delete(user=user, save=save, deleted_on=deleted_on)
         else:
             self.recast(TrashedFile._typedmodels_type)
 
@@ -447,6 +596,22 @@ class File(models.Model):
         if revision is not None:
             version.save()
             self.versions.add(version)
+
+        # A file that did not change since it was last listed matches the newest entry,
+        # so the rest of the history is only walked for new or older metadata
+        latest = self.history[-1] if self.history else {}
+        if not ('etag' in latest and 'etag' in data and latest['etag'] == data['etag']):
+            self._add_history_entry(data)
+
+        # Finally update last touched
+        self.last_touched = timezone.now()
+
+        if save:
+            self.save()
+        return version
+
+    def _add_history_entry(self, data):
+        """Append the metadata `data` to the history, unless an entry with its etag is already there"""
         for entry in self.history:
             # Some entry might have an undefined modified field
             if data['modified'] is not None and entry['modified'] is not None and data['modified'] < entry['modified']:
@@ -456,13 +621,6 @@ class File(models.Model):
         else:
             self.history.append(data)
 
-        # Finally update last touched
-        self.last_touched = timezone.now()
-
-        if save:
-            self.save()
-        return version
-
     def serialize(self):
         newest_version = self.versions.all().last()
 
@@ -606,15 +764,46 @@ class TrashedFolder(TrashedFileNode):
         :param deleted_on:
         :return:
         """
+        # Resolved before self is recast
+        file_type = self._resolve_class(File)._typedmodels_type
+        folder_type = self._resolve_class(Folder)._typedmodels_type
         tf = super(TrashedFolder, self).restore(recursive=True, parent=None, save=True, deleted_on=None)
 
         if not self.is_file and recursive:
-            deleted_on = deleted_on or self.deleted_on
-            for child in TrashedFileNode.objects.filter(parent=self.id, deleted_on=deleted_on):
-                child.restore(recursive=True, save=save, deleted_on=deleted_on)
+            # self is recast by now, so this dispatches to the restored folder's class
+            self._restore_descendants(deleted_on or self.deleted_on, file_type, folder_type)
         return tf
 
 
+def _get_file_types():
+    """Return the type strings of all file classes. Read on every call, as addons may
+    register file classes late.
+    """
+    return [type_ for type_, cls in BaseFileNode._typedmodels_registry.items() if issubclass(cls, File)]
+
+
+def _get_provider_map():
+    """Return `PROVIDER_MAP`, built from the file node classes registered so far.
+
+    The class of a provider is a direct subclass of `BaseFileNode`, and its file and folder
+    classes are subclasses of that one. The map is rebuilt when file node classes were
+    registered since it was built, as addons may register file classes late.
+    """
+    global PROVIDER_MAP, _provider_map_size
+    if _provider_map_size != len(BaseFileNode._typedmodels_registry):
+        provider_map = {}
+        for subclass in BaseFileNode.__subclasses__():
+            provider_map.setdefault((subclass._provider, BaseFileNode.ANY), subclass)
+            for subsubclass in subclass.__subclasses__():
+                if issubclass(subsubclass, Folder):
+                    provider_map.setdefault((subsubclass._provider, BaseFileNode.FOLDER), subsubclass)
+                if issubclass(subsubclass, File):
+                    provider_map.setdefault((subsubclass._provider, BaseFileNode.FILE), subsubclass)
+        PROVIDER_MAP = provider_map
+        _provider_map_size = len(BaseFileNode._typedmodels_registry)
+    return PROVIDER_MAP
+
+
 class FileVersion(ObjectIDMixin, BaseModel):
     """A version of an OsfStorageFileNode. contains information
     about where the file is located, hashes and datetimes
@@ -638,6 +827,8 @@ class FileVersion(ObjectIDMixin, BaseModel):
 
     metadata = DateTimeAwareJSONField(blank=True, default=dict)
     location = DateTimeAwareJSONField(default=None, blank=True, null=True, validators=[validate_location])
+    # Copy of metadata['sha256'], kept in step on save, so that versions can be looked up by content
+    sha256 = models.CharField(max_length=64, blank=True, null=True, db_index=True)
 
     includable_objects = IncludeManager()
 
@@ -677,22 +868,36 @@ class FileVersion(ObjectIDMixin, BaseModel):
             # Shouldn't ever happen, but we already have an archive
             return True  # We've found ourself
 
-        other = self.__class__.objects.filter(
-            metadata__sha256=self.metadata['sha256']
-        ).exclude(
-            _id=self._id, metadata__archive__is_null=True, metadata__vault__is_null=True
-        )
-        if not other.exists():
-            return False
-        try:
-            other = other.first()
-            self.metadata['vault'] = other.metadata['vault']
-            self.metadata['archive'] = other.metadata['archive']
-        except KeyError:
+        archive = self.find_archives([self.metadata['sha256']]).get(self.metadata['sha256'])
+        if archive is None:
             return False
+        self.metadata['vault'], self.metadata['archive'] = archive
         if save:
             self.save()
         return True
 
+    @classmethod
+    def find_archives(cls, hashes):
+        """Find which of the contents `hashes` were already archived, with one query.
+
+        :param iterable hashes: sha256 hashes of file contents
+        :return dict: The (vault, archive) that a version with that content was archived to,
+            for each hash that was archived
+        """
+        archived = cls.objects.filter(sha256__in=set(hashes), metadata__has_keys=['vault', 'archive'])
+        # Versions with an empty vault or archive are skipped before picking one per hash,
+        # as they could otherwise hide an archived version with the same content
+        for key in ('vault', 'archive'):
+            for empty in (None, ''):
+                archived = archived.exclude(metadata__contains={key: empty})
+        return {
+            sha256: (metadata['vault'], metadata['archive'])
+            for sha256, metadata in archived.order_by('sha256').distinct('sha256').values_list('sha256', 'metadata')
+        }
+
+    def save(self, *args, **kwargs):
+        self.sha256 = self.metadata.get('sha256')
+        return super(FileVersion, self).save(*args, **kwargs)
+
     class Meta:
         ordering = ('-created',)
@@ -39,13 +39,14 @@ from osf.models.node_relation import NodeRelation
 from osf.models.nodelog import NodeLog
 from osf.models.sanctions import RegistrationApproval
 from osf.models.private_link import PrivateLink
-from osf.models.spam import SpamMixin
+from osf.models.spam import SpamMixin, SpamStatus
 from osf.models.tag import Tag
 from osf.models.user import OSFUser
 from osf.models.validators import validate_doi, validate_title
 from framework.auth.core import Auth, get_user
 from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
 from osf.utils.fields import NonNaiveDateTimeField
+from osf.utils.permission_cache import clear_permission_cache, get_permission_cache
 from osf.utils.requests import DummyRequest, get_request_and_user_id
 from osf.utils.workflows import DefaultStates
 from website import language, settings
@@ -124,6 +125,34 @@ class AbstractNodeQuerySet(GuidMixinQuerySet):
                     return AbstractNode.objects.none()
                 return AbstractNode.objects.filter(id__in=row)
 
+    def with_read_permission(self, user):
+        """Nodes that `user` may read as a contributor, or as an admin on one of their parents.
+        Matches `AbstractNode.has_permission(user, 'read')`, but for a whole queryset.
+        """
+        if isinstance(user, OSFUser):
+            user = user.pk
+        if not isinstance(user, int):
+            raise TypeError('"user" must be either {} or {}. Got {!r}'.format(int, OSFUser, user))
+
+        sqs = Contributor.objects.filter(node=models.OuterRef('pk'), user__id=user, read=True)
+        qs = self.annotate(can_view=models.Exists(sqs)).filter(can_view=True)
+        qs |= self.extra(where=['''
+            "osf_abstractnode".id in (
+                WITH RECURSIVE implicit_read AS (
+                    SELECT "osf_contributor"."node_id"
+                    FROM "osf_contributor"
+                    WHERE "osf_contributor"."user_id" = %s
+                    AND "osf_contributor"."admin" is TRUE
+                UNION ALL
+                    SELECT "osf_noderelation"."child_id"
+                    FROM "implicit_read"
+                    LEFT JOIN "osf_noderelation" ON "osf_noderelation"."parent_id" = "implicit_read"."node_id"
+                    WHERE "osf_noderelation"."is_node_link" IS FALSE
+                ) SELECT * FROM implicit_read
+            )
+        '''], params=(user, ))
+        return qs
+
     def can_view(self, user=None, private_link=None):
         qs = self.filter(is_public=True)
 
@@ -136,28 +165,7 @@ class AbstractNodeQuerySet(GuidMixinQuerySet):
             qs |= self.filter(private_links__is_deleted=False, private_links__key=private_link)
 
         if user is not None:
-            if isinstance(user, OSFUser):
-                user = user.pk
-            if not isinstance(user, int):
-                raise TypeError('"user" must be either {} or {}. Got {!r}'.format(int, OSFUser, user))
-
-            sqs = Contributor.objects.filter(node=models.OuterRef('pk'), user__id=user, read=True)
-            qs |= self.annotate(can_view=models.Exists(sqs)).filter(can_view=True)
-            qs |= self.extra(where=['''
-                "osf_abstractnode".id in (
-                    WITH RECURSIVE implicit_read AS (
-                        SELECT "osf_contributor"."node_id"
-                        FROM "osf_contributor"
-                        WHERE "osf_contributor"."user_id" = %s
-                        AND "osf_contributor"."admin" is TRUE
-                    UNION ALL
-                        SELECT "osf_noderelation"."child_id"
-                        FROM "implicit_read"
-                        LEFT JOIN "osf_noderelation" ON "osf_noderelation"."parent_id" = "implicit_read"."node_id"
-                        WHERE "osf_noderelation"."is_node_link" IS FALSE
-                    ) SELECT * FROM implicit_read
-                )
-            '''], params=(user, ))
+            qs |= self.with_read_permission(user)
 
         return qs
 
@@ -228,6 +236,14 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         'preprint_file',
     }
 
+    # Node fields that are copied into the search documents of the node's files
+    FILE_SEARCH_UPDATE_FIELDS = {
+        'title',
+        'is_public',
+        'is_deleted',
+        'retraction',
+    }
+
     # Node fields that trigger a check to the spam filter on save
     SPAM_CHECK_FIELDS = {
         'title',
@@ -268,6 +284,23 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
     ) SELECT {fields} FROM "{nodelicenserecord}"
     WHERE id = (SELECT node_license_id FROM ascendants WHERE node_license_id IS NOT NULL) LIMIT 1;''')
 
+    # Primary keys of a node's parents, top-most first
+    LINEAGE_QUERY = re.sub(r'\s+', ' ', '''WITH RECURSIVE ascendants AS (
+            SELECT
+                R.parent_id,
+                1 AS depth
+            FROM "{noderelation}" AS R
+            WHERE R.is_node_link IS FALSE
+                AND R.child_id = %s
+        UNION ALL
+            SELECT
+                R.parent_id,
+                A.depth + 1
+            FROM ascendants AS A
+                JOIN "{noderelation}" AS R ON A.parent_id = R.child_id
+            WHERE R.is_node_link IS FALSE
+    ) SELECT parent_id FROM ascendants ORDER BY depth DESC;''')
+
     affiliated_institutions = models.ManyToManyField('Institution', related_name='nodes')
     category = models.CharField(max_length=255,
                                 choices=CATEGORY_MAP.items(),
@@ -682,20 +715,20 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         return csl
 
     @classmethod
-    def bulk_update_search(cls, nodes, index=None):
+    def bulk_update_search(cls, nodes, index=None, saved_fields=None):
         from website import search
         try:
-            serialize = functools.partial(search.search.update_node, index=index, bulk=True, async=False)
+            serialize = functools.partial(search.search.update_node, index=index, bulk=True, async=False, saved_fields=saved_fields)
             search.search.bulk_update_nodes(serialize, nodes, index=index)
         except search.exceptions.SearchUnavailableError as e:
             logger.exception(e)
             log_exception()
 
-    def update_search(self):
+    def update_search(self, saved_fields=None):
         from website import search
 
         try:
-            search.search.update_node(self, bulk=False, async=True)
+            search.search.update_node(self, bulk=False, async=True, saved_fields=saved_fields)
         except search.exceptions.SearchUnavailableError as e:
             logger.exception(e)
             log_exception()
@@ -814,6 +847,10 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         return self.absolute_api_v2_url
 
     def get_permissions(self, user):
+        permission_cache = get_permission_cache()
+        if permission_cache and self.pk:
+            permissions = permission_cache.get_permissions(user, self)
+            return get_contributor_permissions(permissions) if permissions else []
         if hasattr(self.contributor_set.all(), '_result_cache'):
             for contrib in self.contributor_set.all():
                 if contrib.user_id == user.id:
@@ -840,8 +877,12 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         """
         if not user:
             return False
-        query = {'node': self, permission: True}
-        has_permission = user.contributor_set.filter(**query).exists()
+        permission_cache = get_permission_cache()
+        if permission_cache and self.pk:
+            has_permission = permission_cache.has_permission(user, self, permission)
+        else:
+            query = {'node': self, permission: True}
+            has_permission = user.contributor_set.filter(**query).exists()
         if not has_permission and permission == 'read' and check_parent:
             return self.is_admin_parent(user)
         return has_permission
@@ -858,6 +899,9 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         return False
 
     def is_admin_parent(self, user):
+        permission_cache = get_permission_cache()
+        if user and permission_cache and self.pk:
+            return permission_cache.is_admin_parent(user, self)
         if self.has_permission(user, 'admin', check_parent=False):
             return True
         parent = self.parent_node
@@ -886,6 +930,16 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             return [self.parent_node] + self.parent_node.parents
         return []
 
+    def get_lineage(self):
+        """Return this node's parents followed by the node itself, from the top-most parent
+        down. Unlike ``parents``, resolves the whole chain with one recursive query.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(self.LINEAGE_QUERY.format(noderelation=NodeRelation._meta.db_table), [self.pk])
+            parent_pks = [row[0] for row in cursor.fetchall()]
+        parents = AbstractNode.objects.in_bulk(parent_pks) if parent_pks else {}
+        return [parents[pk] for pk in parent_pks if pk in parents] + [self]
+
     @property
     def admin_contributor_ids(self):
         return self._get_admin_contributor_ids(include_self=True)
@@ -1640,6 +1694,8 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             contrib.node = self
             contribs.append(contrib)
         Contributor.objects.bulk_create(contribs)
+        # bulk_create doesn't send the signals that clear cached permissions
+        clear_permission_cache()
 
     def register_node(self, schema, auth, data, parent=None):
         """Make a frozen copy of a node.
@@ -2323,13 +2379,12 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             children = list(self.descendants.filter(node_license=None, is_public=True, is_deleted=False))
             while len(children):
                 batch = children[:99]
-                self.bulk_update_search(batch)
+                self.bulk_update_search(batch, saved_fields=['node_license'])
                 children = children[99:]
 
         return ret
 
     def on_update(self, first_save, saved_fields):
-        User = apps.get_model('osf.OSFUser')
         request, user_id = get_request_and_user_id()
         request_headers = {}
         if not isinstance(request, DummyRequest):
@@ -2348,10 +2403,29 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
             for preprint in PreprintService.objects.filter(node_id=self.id, is_published=True):
                 enqueue_task(on_preprint_updated.s(preprint._id))
 
-        user = User.load(user_id)
-        if user and self.check_spam(user, saved_fields, request_headers):
+        if user_id and self._should_check_spam(saved_fields):
+            enqueue_task(node_tasks.check_node_spam.s(self._id, user_id, list(saved_fields), request_headers))
+
+    def _should_check_spam(self, saved_fields):
+        """Local checks that decide whether a spam check is queued after `saved_fields` changed;
+        must stay cheap, as they run on every save.
+        """
+        if not settings.SPAM_CHECK_ENABLED:
+            return False
+        if settings.SPAM_CHECK_PUBLIC_ONLY and not self.is_public:
+            return False
+        if self.spam_status == SpamStatus.HAM:
+            return False
+        return bool(self.SPAM_CHECK_FIELDS.intersection(saved_fields)) or (self.is_public and 'is_public' in saved_fields)
+
+    def check_spam_and_save(self, user, saved_fields, request_headers):
+        if self.check_spam(user, saved_fields, request_headers):
             # Specifically call the super class save method to avoid recursion into model save method.
-            super(AbstractNode, self).save()
+            # Only the fields that flagging spam changes are saved: this runs off the request, and
+            # saving the whole row would undo the edits made since the node was loaded.
+            super(AbstractNode, self).save(update_fields=[
+                'spam_status', 'spam_pro_tip', 'spam_data', 'is_public', 'keenio_read_key', 'last_logged'
+            ])
 
     def _get_spam_content(self, saved_fields):
         NodeWikiPage = apps.get_model('addons_wiki.NodeWikiPage')
@@ -2360,13 +2434,9 @@ class AbstractNode(DirtyFieldsMixin, TypedModel, AddonModelMixin, IdentifierMixi
         content = []
         for field in spam_fields:
             if field == 'wiki_pages_current':
-                newest_wiki_page = None
-                for wiki_page_id in self.wiki_pages_current.values():
-                    wiki_page = NodeWikiPage.load(wiki_page_id)
-                    if not newest_wiki_page:
-                        newest_wiki_page = wiki_page
-                    elif wiki_page.date > newest_wiki_page.date:
-                        newest_wiki_page = wiki_page
+                newest_wiki_page = NodeWikiPage.objects.filter(
+                    guids___id__in=self.wiki_pages_current.values()
+                ).order_by('-date').first() if self.wiki_pages_current else None
                 if newest_wiki_page:
                     content.append(newest_wiki_page.raw_text(self).encode('utf-8'))
             else:
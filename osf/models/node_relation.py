@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
+from osf.utils.permission_cache import clear_permission_cache
 from .base import BaseModel, ObjectIDMixin
 
 
@@ -25,3 +28,9 @@ class NodeRelation(ObjectIDMixin, BaseModel):
         index_together = (
             ('is_node_link', 'child', 'parent'),
         )
+
+
+@receiver(post_save, sender=NodeRelation)
+@receiver(post_delete, sender=NodeRelation)
+def clear_cached_lineages(sender, instance, **kwargs):
+    clear_permission_cache()
@@ -2,7 +2,7 @@
 from django.contrib.postgres import fields
 from api.taxonomies.utils import optimize_subject_query
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from api.preprint_providers.permissions import GroupHelper, PERMISSIONS
@@ -12,6 +12,7 @@ from osf.models.mixins import ReviewProviderMixin
 from osf.models.subject import Subject
 from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
 from osf.utils.fields import EncryptedTextField
+from osf.utils.subject_index import clear_subject_index, get_subject_index
 from website import settings
 from website.util import api_v2_url
 
@@ -71,7 +72,7 @@ class PreprintProvider(ObjectIDMixin, ReviewProviderMixin, BaseModel):
 
     @property
     def has_highlighted_subjects(self):
-        return self.subjects.filter(highlighted=True).exists()
+        return bool(get_subject_index().highlighted_ids.get(self.id))
 
     @property
     def highlighted_subjects(self):
@@ -82,18 +83,19 @@ class PreprintProvider(ObjectIDMixin, ReviewProviderMixin, BaseModel):
 
     @property
     def top_level_subjects(self):
-        if self.subjects.exists():
+        index = get_subject_index()
+        if index.has_subjects(self.id):
             return optimize_subject_query(self.subjects.filter(parent__isnull=True))
         else:
             # TODO: Delet this when all PreprintProviders have a mapping
             if len(self.subjects_acceptable) == 0:
                 return optimize_subject_query(Subject.objects.filter(parent__isnull=True, provider___id='osf'))
             tops = set([sub[0][0] for sub in self.subjects_acceptable])
-            return [Subject.load(sub) for sub in tops]
+            return list(optimize_subject_query(Subject.objects.filter(_id__in=tops)))
 
     @property
     def all_subjects(self):
-        if self.subjects.exists():
+        if get_subject_index().has_subjects(self.id):
             return self.subjects.all()
         else:
             # TODO: Delet this when all PreprintProviders have a mapping
@@ -115,21 +117,29 @@ class PreprintProvider(ObjectIDMixin, ReviewProviderMixin, BaseModel):
 def rules_to_subjects(rules):
     if not rules:
         return Subject.objects.filter(provider___id='osf')
-    q = []
+    index = get_subject_index()
+    subject_ids = set()
     for rule in rules:
-        parent_from_rule = Subject.load(rule[0][-1])
-        if rule[1]:
-            q.append(models.Q(parent=parent_from_rule))
+        parent_from_rule = index.get_by_guid(rule[0][-1])
+        if rule[1] and parent_from_rule is not None:
+            # A rule allowing children allows the grandchildren of a top level subject too
+            children = parent_from_rule.children
+            subject_ids.update(children)
             if len(rule[0]) == 1:
-                potential_parents = Subject.objects.filter(parent=parent_from_rule)
-                for parent in potential_parents:
-                    q.append(models.Q(parent=parent))
-        for sub in rule[0]:
-            q.append(models.Q(_id=sub))
-    return Subject.objects.filter(reduce(lambda x, y: x | y, q)) if len(q) > 1 else (Subject.objects.filter(q[0]) if len(q) else Subject.objects.all())
+                for child_id in children:
+                    subject_ids.update(index.get(child_id).children)
+        subject_ids.update(index.ids[sub] for sub in rule[0] if sub in index.ids)
+    return Subject.objects.filter(id__in=subject_ids)
 
 
 @receiver(post_save, sender=PreprintProvider)
 def create_provider_auth_groups(sender, instance, created, **kwargs):
     if created:
         GroupHelper(instance).update_provider_auth_groups()
+
+
+@receiver(post_save, sender=PreprintProvider)
+@receiver(post_delete, sender=PreprintProvider)
+def clear_subject_index_on_provider_change(sender, instance, **kwargs):
+    # Subject paths start with the provider's share_title
+    clear_subject_index()
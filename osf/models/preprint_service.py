@@ -11,6 +11,7 @@ from framework.postcommit_tasks.handlers import enqueue_postcommit_task
 from framework.exceptions import PermissionsError
 from osf.models import NodeLog, Subject
 from osf.models.mixins import ReviewableMixin
+from osf.models.subject import load_object_hierarchies
 from osf.models.validators import validate_subject_hierarchy
 from osf.utils.fields import NonNaiveDateTimeField
 from osf.utils.workflows import DefaultStates
@@ -79,9 +80,7 @@ class PreprintService(DirtyFieldsMixin, GuidMixin, IdentifierMixin, ReviewableMi
 
     @cached_property
     def subject_hierarchy(self):
-        return [
-            s.object_hierarchy for s in self.subjects.exclude(children__in=self.subjects.all())
-        ]
+        return load_object_hierarchies(self.subjects.exclude(children__in=self.subjects.all()))
 
     @property
     def deep_url(self):
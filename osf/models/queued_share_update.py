@@ -0,0 +1,84 @@
+import json
+
+from django.db import connection, models
+from django.utils import timezone
+
+from osf.models.base import BaseModel
+from osf.utils.datetime_aware_jsonfield import DateTimeAwareJSONField
+from osf.utils.fields import NonNaiveDateTimeField
+
+
+class QueuedShareUpdate(BaseModel):
+    """A node or preprint waiting to be pushed to SHARE by `scripts/send_queued_share_updates.py`.
+
+    There is at most one row per object: queueing an object that is already queued only
+    bumps `modified` and adds to its `old_subjects`, so a burst of edits is sent once.
+    """
+    NODE = 'node'
+    PREPRINT = 'preprint'
+    KIND_CHOICES = (
+        (NODE, 'node'),
+        (PREPRINT, 'preprint'),
+    )
+
+    UPSERT_QUERY = """
+    INSERT INTO osf_queuedshareupdate (kind, target_id, share_type, old_subjects, attempts, send_after, created, modified)
+    VALUES (%s, %s, %s, %s::jsonb, 0, %s, clock_timestamp(), clock_timestamp())
+    ON CONFLICT (kind, target_id) DO UPDATE SET
+        modified = EXCLUDED.modified,
+        share_type = COALESCE(EXCLUDED.share_type, osf_queuedshareupdate.share_type),
+        old_subjects = (
+            SELECT COALESCE(jsonb_agg(DISTINCT s.value), '[]'::jsonb)
+            FROM jsonb_array_elements(osf_queuedshareupdate.old_subjects || EXCLUDED.old_subjects) AS s
+        );
+    """
+
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    # Guid of the node or preprint
+    target_id = models.CharField(max_length=255)
+    # Preprints only: the SHARE type to publish as, and the ids of subjects that were removed
+    share_type = models.CharField(max_length=255, null=True, blank=True)
+    old_subjects = DateTimeAwareJSONField(default=list, blank=True)
+    # Failed pushes are retried with a backoff, see `reschedule`
+    attempts = models.PositiveIntegerField(default=0)
+    send_after = NonNaiveDateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = ('kind', 'target_id')
+
+    def __repr__(self):
+        return '<QueuedShareUpdate {} {} after {}>'.format(self.kind, self.target_id, self.send_after)
+
+    @classmethod
+    def enqueue(cls, kind, target_id, old_subjects=None, share_type=None, delay=None):
+        """Queue a push of the object `target_id`, or merge it into the one already queued.
+
+        :param list old_subjects: Ids of subjects that were removed from a preprint
+        :param timedelta delay: Leave the object alone for this long, defaults to
+            `settings.SHARE_UPDATE_COALESCE_WINDOW` seconds. Only applies if it is not queued yet.
+        """
+        from website import settings
+        if delay is None:
+            delay = timezone.timedelta(seconds=settings.SHARE_UPDATE_COALESCE_WINDOW)
+        with connection.cursor() as cursor:
+            cursor.execute(cls.UPSERT_QUERY, [
+                kind,
+                target_id,
+                share_type,
+                json.dumps(list(old_subjects or [])),
+                timezone.now() + delay,
+            ])
+
+    def reschedule(self, countdown):
+        """Retry the push in `countdown` seconds. Updates queued in the meantime are kept."""
+        self.attempts += 1
+        self.send_after = timezone.now() + timezone.timedelta(seconds=countdown)
+        QueuedShareUpdate.objects.filter(id=self.id).update(attempts=self.attempts, send_after=self.send_after)
+
+    def dequeue(self):
+        """Remove this row, unless the object was queued again after this row was read.
+
+        :return bool: Whether the row was removed
+        """
+        deleted, _ = QueuedShareUpdate.objects.filter(id=self.id, modified=self.modified).delete()
+        return bool(deleted)
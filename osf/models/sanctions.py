@@ -125,6 +125,11 @@ class Sanction(ObjectIDMixin, BaseModel):
 
     class Meta:
         abstract = True
+        # Lets the nightly scripts select only the sanctions that are due
+        index_together = (
+            ('state', 'initiation_date'),
+            ('state', 'end_date'),
+        )
 
 
 class TokenApprovableSanction(Sanction):
@@ -248,7 +253,7 @@ class TokenApprovableSanction(Sanction):
             else:
                 self._notify_non_authorizer(contrib, node)
 
-    class Meta:
+    class Meta(Sanction.Meta):
         abstract = True
 
 
@@ -341,7 +346,7 @@ class EmailApprovableSanction(TokenApprovableSanction):
         if self.notify_initiator_on_complete:
             self._notify_initiator()
 
-    class Meta:
+    class Meta(TokenApprovableSanction.Meta):
         abstract = True
 
 
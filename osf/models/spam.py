@@ -1,6 +1,8 @@
 import abc
+import hashlib
 import logging
 
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
 from osf.exceptions import ValidationValueError, ValidationTypeError
@@ -22,6 +24,17 @@ def _get_client():
     )
 
 
+def spam_verdict_cache_key(author, author_email, remote_addr, content):
+    # Akismet weighs the submitter as well as the content, so both go into the key
+    digest = hashlib.sha256()
+    for part in (author, author_email, remote_addr, content):
+        if isinstance(part, unicode):
+            part = part.encode('utf-8')
+        digest.update(part or '')
+        digest.update('\0')
+    return 'spam-verdict:{}'.format(digest.hexdigest())
+
+
 def _validate_reports(value, *args, **kwargs):
     from osf.models import OSFUser
     for key, val in value.iteritems():
@@ -190,22 +203,29 @@ class SpamMixin(models.Model):
         if self.is_spammy:
             return True
 
-        client = _get_client()
         remote_addr = request_headers['Remote-Addr']
         user_agent = request_headers.get('User-Agent')
         referer = request_headers.get('Referer')
-        try:
-            is_spam, pro_tip = client.check_comment(
-                user_ip=remote_addr,
-                user_agent=user_agent,
-                referrer=referer,
-                comment_content=content,
-                comment_author=author,
-                comment_author_email=author_email
-            )
-        except AkismetClientError:
-            logger.exception('Error performing SPAM check')
-            return False
+        # Unchanged content from the same submitter is not submitted to Akismet again
+        key = spam_verdict_cache_key(author, author_email, remote_addr, content)
+        verdict = cache.get(key) if settings.SPAM_VERDICT_CACHE_TIMEOUT else None
+        if verdict is None:
+            client = _get_client()
+            try:
+                verdict = client.check_comment(
+                    user_ip=remote_addr,
+                    user_agent=user_agent,
+                    referrer=referer,
+                    comment_content=content,
+                    comment_author=author,
+                    comment_author_email=author_email
+                )
+            except AkismetClientError:
+                logger.exception('Error performing SPAM check')
+                return False
+            if settings.SPAM_VERDICT_CACHE_TIMEOUT:
+                cache.set(key, verdict, settings.SPAM_VERDICT_CACHE_TIMEOUT)
+        is_spam, pro_tip = verdict
         if update:
             self.spam_pro_tip = pro_tip
             self.spam_data['headers'] = {
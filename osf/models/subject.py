@@ -2,6 +2,8 @@
 from dirtyfields import DirtyFieldsMixin
 from django.db import models
 from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.core.exceptions import ValidationError
 from django.utils.functional import cached_property
 from include import IncludeQuerySet
@@ -9,6 +11,7 @@ from include import IncludeQuerySet
 from website.util import api_v2_url
 
 from osf.models.base import BaseModel, ObjectIDMixin
+from osf.utils.subject_index import clear_subject_index, get_subject_index, has_uncommitted_changes
 from osf.models.validators import validate_subject_hierarchy_length, validate_subject_provider_mapping, validate_subject_highlighted_count
 
 class SubjectQuerySet(IncludeQuerySet):
@@ -45,13 +48,24 @@ class Subject(ObjectIDMixin, BaseModel, DirtyFieldsMixin):
     @property
     def child_count(self):
         """For v1 compat."""
+        if self.is_indexed:
+            return len(get_subject_index().get(self.id).children)
         return self.children.count()
 
+    @property
+    def is_indexed(self):
+        """Whether the subject index holds this subject as it is."""
+        index = get_subject_index(build=not has_uncommitted_changes())
+        indexed = index.get(self.id) if index is not None else None
+        return indexed is not None and (indexed.parent_id, indexed.text) == (self.parent_id, self.text)
+
     def get_absolute_url(self):
         return self.absolute_api_v2_url
 
     @cached_property
     def path(self):
+        if self.is_indexed:
+            return get_subject_index().path(self.id)
         return '{}|{}'.format(self.provider.share_title, '|'.join([s.text for s in self.object_hierarchy]))
 
     @cached_property
@@ -62,15 +76,15 @@ class Subject(ObjectIDMixin, BaseModel, DirtyFieldsMixin):
 
     @cached_property
     def hierarchy(self):
+        if self.is_indexed:
+            return get_subject_index().hierarchy(self.id)
         if self.parent:
             return self.parent.hierarchy + [self._id]
         return [self._id]
 
     @cached_property
     def object_hierarchy(self):
-        if self.parent:
-            return self.parent.object_hierarchy + [self]
-        return [self]
+        return load_object_hierarchies([self])[0]
 
     def save(self, *args, **kwargs):
         saved_fields = self.get_dirty_fields() or []
@@ -84,3 +98,28 @@ class Subject(ObjectIDMixin, BaseModel, DirtyFieldsMixin):
         if self.preprint_services.exists():
             raise ValidationError('Cannot delete a used Subject')
         return super(Subject, self).delete()
+
+
+def load_object_hierarchies(subjects):
+    """Return the hierarchy of each subject as a list of `Subject`s, top level first,
+    loading the parents of all subjects with one query.
+    """
+    index = get_subject_index(build=not has_uncommitted_changes())
+    # Subjects that are not indexed as they are fall back to walking their parents
+    lineages = [index.lineage(subject.id)[:-1] if index is not None and subject.is_indexed else None for subject in subjects]
+    parent_ids = set(id_ for lineage in lineages if lineage for id_ in lineage)
+    parents = Subject.objects.in_bulk(parent_ids) if parent_ids else {}
+    hierarchies = []
+    for subject, lineage in zip(subjects, lineages):
+        if lineage is None:
+            hierarchy = subject.parent.object_hierarchy + [subject] if subject.parent else [subject]
+        else:
+            hierarchy = [parents[id_] for id_ in lineage if id_ in parents] + [subject]
+        hierarchies.append(hierarchy)
+    return hierarchies
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def clear_subject_index_on_subject_change(sender, instance, **kwargs):
+    clear_subject_index()
@@ -32,6 +32,7 @@ from framework.auth.exceptions import (ChangePasswordError, ExpiredTokenError,
                                        MergeConflictError)
 from framework.exceptions import PermissionsError
 from framework.sessions.utils import remove_sessions_for_user
+from osf.utils.permission_cache import clear_permission_cache
 from osf.utils.requests import get_current_request
 from osf.exceptions import reraise_django_validation_errors, MaxRetriesError
 from osf.models.base import BaseModel, GuidMixin, GuidMixinQuerySet
@@ -683,6 +684,8 @@ class OSFUser(DirtyFieldsMixin, GuidMixin, BaseModel, AbstractBaseUser, Permissi
                 node.contributor_set.filter(user=user).update(user=self)
 
             node.save()
+        # Contributor rows were moved in bulk, bypassing the signals that clear cached permissions
+        clear_permission_cache()
 
         from osf.models import QuickFilesNode
         from osf.models import BaseFileNode
@@ -0,0 +1,145 @@
+"""
+A directory of GUIDs, mapping a GUID to the content type, primary key and deep URL of its referent.
+
+Resolving a short link needs a `Guid` lookup and a query for its referent. The directory keeps
+both answers in the Django cache named by `settings.GUID_CACHE_BACKEND`, which must be shared
+by all processes: entries are removed when a `Guid` or its referent is saved or deleted, and
+again when that transaction is committed.
+Without a backend the directory reads from the database on every call.
+
+Entries are stored under two keys, so that saving a referent invalidates it without a query
+for its GUIDs:
+- `guid:<_id>` holds the content type and primary key of the referent;
+- `guid-referent:<content type>:<pk>` holds the referent's deep URL.
+"""
+from collections import defaultdict, namedtuple
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from website import settings
+
+
+class GuidEntry(namedtuple('GuidEntry', ['_id', 'content_type_id', 'object_id', 'deep_url'])):
+
+    @property
+    def model(self):
+        """The referent's model class, or None if its content type no longer has one."""
+        return ContentType.objects.get_for_id(self.content_type_id).model_class()
+
+    def get_referent(self):
+        model = self.model
+        if model is None:
+            return None
+        return model.objects.filter(pk=self.object_id).first()
+
+
+def _get_cache():
+    if not settings.GUID_CACHE_BACKEND:
+        return None
+    from django.core.cache import caches
+    return caches[settings.GUID_CACHE_BACKEND]
+
+
+def _guid_key(guid_id):
+    return 'guid:{}'.format(guid_id)
+
+
+def _referent_key(content_type_id, object_id):
+    return 'guid-referent:{}:{}'.format(content_type_id, object_id)
+
+
+def _get_deep_urls(referents):
+    """Load the deep URLs of `referents`, a list of (content type id, object id), grouped by model."""
+    pks_by_content_type = defaultdict(set)
+    for content_type_id, object_id in referents:
+        pks_by_content_type[content_type_id].add(object_id)
+    deep_urls = {}
+    for content_type_id, pks in pks_by_content_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        for pk, referent in model.objects.in_bulk(list(pks)).items():
+            # A model that was once GuidStoredObject-like may have referents
+            # without a deep_url; they resolve like referents with no url
+            if not hasattr(referent, 'deep_url'):
+                from framework import sentry
+                sentry.log_message('Guid resolved to an object with no deep_url', dict(content_type_id=content_type_id, object_id=pk))
+            deep_urls[(content_type_id, pk)] = getattr(referent, 'deep_url', None)
+    return deep_urls
+
+
+def resolve_guids(guid_ids):
+    """Resolve many GUIDs at once. Returns a dict mapping each GUID that exists to its `GuidEntry`,
+    with one query for the GUIDs and one per referent model for the entries not cached.
+    """
+    Guid = apps.get_model('osf.Guid')
+    cache = _get_cache()
+    guid_ids = set(guid_ids)
+
+    targets = {}
+    if cache is not None:
+        cached = cache.get_many([_guid_key(guid_id) for guid_id in guid_ids])
+        for guid_id in guid_ids:
+            if _guid_key(guid_id) in cached:
+                targets[guid_id] = cached[_guid_key(guid_id)]
+    missing = guid_ids - set(targets)
+    if missing:
+        rows = Guid.objects.filter(_id__in=missing, content_type__isnull=False, object_id__isnull=False).values_list(
+            '_id', 'content_type_id', 'object_id'
+        )
+        loaded = {guid_id: (content_type_id, object_id) for guid_id, content_type_id, object_id in rows}
+        if cache is not None and loaded:
+            cache.set_many({_guid_key(guid_id): target for guid_id, target in loaded.items()}, settings.GUID_CACHE_TIMEOUT)
+        targets.update(loaded)
+
+    referents = set(targets.values())
+    deep_urls = {}
+    if cache is not None and referents:
+        cached = cache.get_many([_referent_key(*referent) for referent in referents])
+        for referent in referents:
+            if _referent_key(*referent) in cached:
+                deep_urls[referent] = cached[_referent_key(*referent)]
+    missing = referents - set(deep_urls)
+    if missing:
+        loaded = _get_deep_urls(missing)
+        if cache is not None and loaded:
+            cache.set_many({_referent_key(*referent): url for referent, url in loaded.items()}, settings.GUID_CACHE_TIMEOUT)
+        deep_urls.update(loaded)
+
+    return {
+        guid_id: GuidEntry(guid_id, target[0], target[1], deep_urls[target])
+        for guid_id, target in targets.items()
+        # The referent of a GUID may have been deleted
+        if target in deep_urls
+    }
+
+
+def resolve_guid(guid_id):
+    """Return the `GuidEntry` of `guid_id`, or None if there is no such GUID or referent."""
+    if not guid_id:
+        return None
+    return resolve_guids([guid_id]).get(guid_id)
+
+
+def _invalidate(keys):
+    cache = _get_cache()
+    if cache is None or not keys:
+        return
+    cache.delete_many(keys)
+    # Another request may cache the old rows again before this transaction is committed
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_guid(guid_id):
+    _invalidate([_guid_key(guid_id)])
+
+
+def invalidate_referent(content_type_id, object_id):
+    _invalidate([_referent_key(content_type_id, object_id)])
+
+
+def invalidate_referents(content_type_id, object_ids):
+    """Invalidate the entries of many referents of one model, e.g. after a bulk update."""
+    _invalidate([_referent_key(content_type_id, object_id) for object_id in object_ids])
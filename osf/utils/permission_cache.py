@@ -0,0 +1,88 @@
+"""
+A request-scoped cache of node permissions.
+
+Permission checks on nested projects ask the same questions many times in one
+request, and `AbstractNode.is_admin_parent` walks up the parents one query at a
+time. The cache loads a user's contributor rows for a node and all of its
+parents with a single query and answers every later check on that lineage from
+memory.
+
+The cache is stored on the current Flask or Django request, so it never
+outlives one; outside of a request no cache is used. It is cleared whenever a
+contributor or a node relation is saved or deleted.
+"""
+from collections import namedtuple
+
+from django.apps import apps
+from django.db import connection
+
+from osf.utils.requests import DummyRequest, get_current_request
+
+# The permission flags of a contributor row; quacks like a `Contributor` for
+# `get_contributor_permissions`
+Permissions = namedtuple('Permissions', ['read', 'write', 'admin'])
+
+
+class PermissionCache(object):
+
+    def __init__(self):
+        # Node id -> ids of the node and its parents, closest first
+        self._lineages = {}
+        # (User id, node id) -> `Permissions`, or None if the user is not a contributor
+        self._permissions = {}
+
+    def clear(self):
+        self._lineages.clear()
+        self._permissions.clear()
+
+    def get_lineage_ids(self, node):
+        if node.id not in self._lineages:
+            AbstractNode = apps.get_model('osf.AbstractNode')
+            NodeRelation = apps.get_model('osf.NodeRelation')
+            with connection.cursor() as cursor:
+                cursor.execute(AbstractNode.LINEAGE_QUERY.format(noderelation=NodeRelation._meta.db_table), [node.id])
+                lineage = [node.id] + [row[0] for row in reversed(cursor.fetchall())]
+            # The lineage of every parent is a suffix of this one
+            for index, node_id in enumerate(lineage):
+                self._lineages.setdefault(node_id, lineage[index:])
+        return self._lineages[node.id]
+
+    def get_permissions(self, user, node):
+        """Return the `Permissions` of `user` on `node`, or None if they are not a contributor."""
+        key = (user.id, node.id)
+        if key not in self._permissions:
+            Contributor = apps.get_model('osf.Contributor')
+            missing = [node_id for node_id in self.get_lineage_ids(node) if (user.id, node_id) not in self._permissions]
+            for node_id in missing:
+                self._permissions[(user.id, node_id)] = None
+            rows = Contributor.objects.filter(user_id=user.id, node_id__in=missing).values_list('node_id', 'read', 'write', 'admin')
+            for node_id, read, write, admin in rows:
+                self._permissions[(user.id, node_id)] = Permissions(read, write, admin)
+        return self._permissions[key]
+
+    def has_permission(self, user, node, permission):
+        return bool(getattr(self.get_permissions(user, node), permission, False))
+
+    def is_admin_parent(self, user, node):
+        self.get_permissions(user, node)  # Loads the whole lineage
+        return any(
+            getattr(self._permissions[(user.id, node_id)], 'admin', False)
+            for node_id in self.get_lineage_ids(node)
+        )
+
+
+def get_permission_cache():
+    """Return the permission cache of the current request, or None if not in a request."""
+    request = get_current_request()
+    if isinstance(request, DummyRequest):
+        return None
+    cache = getattr(request, '_permission_cache', None)
+    if cache is None:
+        cache = request._permission_cache = PermissionCache()
+    return cache
+
+
+def clear_permission_cache():
+    cache = getattr(get_current_request(), '_permission_cache', None)
+    if cache is not None:
+        cache.clear()
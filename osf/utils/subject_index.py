@@ -0,0 +1,187 @@
+"""
+An in-memory index of the subject taxonomies of all preprint providers.
+
+Taxonomies are read on every preprint page and change rarely, but walking
+`Subject.parent` costs a query per level and the taxonomy endpoints return
+thousands of subjects. The index holds every subject's parent, children,
+depth, provider and bepress mapping, and is built with two queries the first
+time it is needed in a process.
+
+Saving or deleting a `Subject` or a `PreprintProvider` clears the index of
+this process. Other processes notice through a generation counter kept in
+the Django cache named by `settings.SUBJECT_INDEX_CACHE_BACKEND`, which they
+read at most every `settings.SUBJECT_INDEX_CHECK_INTERVAL` seconds; without
+one, they rebuild their index after `settings.SUBJECT_INDEX_TTL` seconds.
+
+A thread that changes subjects in a transaction does not rebuild the index for
+each change: until the transaction is committed, subjects that are not in the
+index as they are walk their parents in the database instead.
+"""
+import threading
+import time
+
+from django.apps import apps
+from django.db import connection, transaction
+
+from website import settings
+
+GENERATION_KEY = 'subject-index-generation'
+
+
+class IndexedSubject(object):
+    __slots__ = ('id', '_id', 'text', 'parent_id', 'provider_id', 'bepress_subject_id', 'highlighted', 'children', 'depth')
+
+    def __init__(self, id, _id, text, parent_id, provider_id, bepress_subject_id, highlighted):
+        self.id = id
+        self._id = _id
+        self.text = text
+        self.parent_id = parent_id
+        self.provider_id = provider_id
+        self.bepress_subject_id = bepress_subject_id
+        self.highlighted = highlighted
+        self.children = []
+        self.depth = 0
+
+
+class SubjectIndex(object):
+
+    def __init__(self, subjects, share_titles):
+        """
+        :param subjects: `IndexedSubject`s of all providers
+        :param dict share_titles: Provider id -> share_title
+        """
+        self.share_titles = share_titles
+        self.subjects = {subject.id: subject for subject in subjects}
+        self.ids = {subject._id: subject.id for subject in subjects}
+        self.top_level_ids = {}
+        self.highlighted_ids = {}
+        for subject in sorted(self.subjects.values(), key=lambda s: s.text):
+            parent = self.subjects.get(subject.parent_id)
+            if parent is not None:
+                parent.children.append(subject.id)
+            else:
+                self.top_level_ids.setdefault(subject.provider_id, []).append(subject.id)
+            if subject.highlighted:
+                self.highlighted_ids.setdefault(subject.provider_id, []).append(subject.id)
+        for subject in self.subjects.values():
+            subject.depth = len(self.lineage(subject.id)) - 1
+
+    def get(self, subject_id):
+        """Return the `IndexedSubject` with primary key `subject_id`, or None."""
+        return self.subjects.get(subject_id)
+
+    def get_by_guid(self, subject_guid):
+        return self.subjects.get(self.ids.get(subject_guid))
+
+    def lineage(self, subject_id):
+        """Return the ids of the subject and its parents, top level first."""
+        lineage = []
+        subject = self.subjects.get(subject_id)
+        while subject is not None:
+            lineage.append(subject.id)
+            subject = self.subjects.get(subject.parent_id)
+        return lineage[::-1]
+
+    def hierarchy(self, subject_id):
+        return [self.subjects[id_]._id for id_ in self.lineage(subject_id)]
+
+    def path(self, subject_id):
+        return '{}|{}'.format(
+            self.share_titles.get(self.subjects[subject_id].provider_id),
+            '|'.join(self.subjects[id_].text for id_ in self.lineage(subject_id))
+        )
+
+    def descendant_ids(self, subject_id):
+        descendants = []
+        to_visit = list(self.subjects[subject_id].children)
+        while to_visit:
+            id_ = to_visit.pop()
+            descendants.append(id_)
+            to_visit.extend(self.subjects[id_].children)
+        return descendants
+
+    def provider_ids(self, provider_id):
+        """Return the ids of all subjects of a provider."""
+        return [
+            id_ for top_level_id in self.top_level_ids.get(provider_id, [])
+            for id_ in [top_level_id] + self.descendant_ids(top_level_id)
+        ]
+
+    def has_subjects(self, provider_id):
+        return bool(self.top_level_ids.get(provider_id))
+
+
+_lock = threading.Lock()
+_state = {'index': None, 'generation': None, 'built': 0, 'checked': 0}
+_local = threading.local()
+
+
+def _get_shared_cache():
+    if not settings.SUBJECT_INDEX_CACHE_BACKEND:
+        return None
+    from django.core.cache import caches
+    return caches[settings.SUBJECT_INDEX_CACHE_BACKEND]
+
+
+def _build_index():
+    Subject = apps.get_model('osf.Subject')
+    PreprintProvider = apps.get_model('osf.PreprintProvider')
+    subjects = [
+        IndexedSubject(*row) for row in Subject.objects.values_list(
+            'id', '_id', 'text', 'parent_id', 'provider_id', 'bepress_subject_id', 'highlighted'
+        )
+    ]
+    return SubjectIndex(subjects, dict(PreprintProvider.objects.values_list('id', 'share_title')))
+
+
+def get_subject_index(build=True):
+    """Return the subject index of this process, building it if it is missing or stale.
+    With `build` False, return None instead of building it.
+    """
+    now = time.time()
+    index = _state['index']
+    # Subjects read the index on every property access; don't ask the shared cache each time
+    if index is not None and now - _state['checked'] < settings.SUBJECT_INDEX_CHECK_INTERVAL:
+        return index
+    shared = _get_shared_cache()
+    generation = shared.get(GENERATION_KEY, 0) if shared is not None else None
+    with _lock:
+        index = _state['index']
+        if (
+            index is None or
+            generation != _state['generation'] or
+            (shared is None and now - _state['built'] > settings.SUBJECT_INDEX_TTL)
+        ):
+            if not build:
+                return None
+            index = _build_index()
+            _state.update(index=index, generation=generation, built=now)
+        _state['checked'] = now
+        return index
+
+
+def _clear_subject_index():
+    with _lock:
+        _state['index'] = None
+    shared = _get_shared_cache()
+    if shared is not None:
+        # `incr` fails on a missing key
+        shared.add(GENERATION_KEY, 0, None)
+        shared.incr(GENERATION_KEY)
+
+
+def has_uncommitted_changes():
+    """Whether this thread changed subjects or providers in the transaction it is in."""
+    return getattr(_local, 'changed', False) and connection.in_atomic_block
+
+
+def _on_commit():
+    _local.changed = False
+    _clear_subject_index()
+
+
+def clear_subject_index():
+    _clear_subject_index()
+    _local.changed = True
+    # Another thread may rebuild the index before this transaction is committed
+    transaction.on_commit(_on_commit)
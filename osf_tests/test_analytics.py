@@ -5,6 +5,7 @@ Unit tests for analytics logic in framework/analytics/__init__.py
 
 import unittest
 
+import mock
 import pytest
 from django.utils import timezone
 from nose.tools import *  # flake8: noqa  (PEP8 asserts)
@@ -14,7 +15,8 @@ from datetime import datetime
 
 from framework import analytics, sessions
 from framework.sessions import session
-from osf.models import PageCounter, Session
+from osf.models import PageCounter, Session, UserActivityCounter
+from osf.models.analytics import page_counter_buffer, user_activity_counter_buffer
 
 from tests.base import OsfTestCase
 from osf_tests.factories import UserFactory, ProjectFactory
@@ -45,6 +47,31 @@ class TestAnalytics(OsfTestCase):
         analytics.increment_user_activity_counters(user._id, 'project_created', date.isoformat())
         assert_equal(user.get_activity_points(), 1)
 
+    @mock.patch('osf.models.analytics.settings.ANALYTICS_COUNTER_FLUSH_INTERVAL', 3600)
+    def test_increment_user_activity_counters_buffered(self):
+        user = UserFactory()
+        date = timezone.now()
+
+        analytics.increment_user_activity_counters(user._id, 'project_created', date.isoformat())
+        analytics.increment_user_activity_counters(user._id, 'project_created', date.isoformat())
+        analytics.increment_user_activity_counters(user._id, 'file_added', date.isoformat())
+        assert_equal(user.get_activity_points(), 0)
+
+        user_activity_counter_buffer.flush()
+        counter = UserActivityCounter.objects.get(_id=user._id)
+        day = date.strftime('%Y/%m/%d')
+        assert_equal(counter.total, 3)
+        assert_equal(counter.action['project_created'], {'total': 2, 'date': {day: 2}})
+        assert_equal(counter.action['file_added'], {'total': 1, 'date': {day: 1}})
+        assert_equal(counter.date, {day: {'total': 3}})
+
+        analytics.increment_user_activity_counters(user._id, 'project_created', date.isoformat())
+        user_activity_counter_buffer.flush()
+        counter.reload()
+        assert_equal(counter.total, 4)
+        assert_equal(counter.action['project_created'], {'total': 3, 'date': {day: 3}})
+        assert_equal(counter.date, {day: {'total': 4}})
+
 
 class UpdateCountersTestCase(OsfTestCase):
 
@@ -160,6 +187,24 @@ class TestUpdateCounters(UpdateCountersTestCase):
         count = analytics.get_basic_counters('download:{0}:{1}:{2}'.format(self.node._id, self.fid, self.vid))
         assert_equal(count, (1, 2))
 
+    @mock.patch('osf.models.analytics.settings.ANALYTICS_COUNTER_FLUSH_INTERVAL', 3600)
+    def test_update_counters_buffered(self):
+        @analytics.update_counters('download:{target_id}:{fid}')
+        def download_file_(**kwargs):
+            return kwargs.get('node') or kwargs.get('project')
+
+        page = 'download:{0}:{1}'.format(self.node._id, self.fid)
+        PageCounter.objects.create(_id=PageCounter.clean_page(page), total=5, unique=3)
+
+        download_file_(node=self.node, fid=self.fid)
+        download_file_(node=self.node, fid=self.fid)
+        assert_equal(analytics.get_basic_counters(page), (3, 5))
+
+        page_counter_buffer.flush()
+        assert_equal(analytics.get_basic_counters(page), (4, 7))
+        counter = PageCounter.objects.get(_id=PageCounter.clean_page(page))
+        assert_equal(counter.date, {timezone.now().strftime('%Y/%m/%d'): {'total': 2, 'unique': 1}})
+
     def test_get_basic_counters(self):
         page = 'node:' + str(self.node._id)
         PageCounter.objects.create(_id=page, total=5, unique=3)
@@ -6,6 +6,7 @@ import json
 import logging
 import random
 import re
+import time
 from contextlib import nested
 
 import celery
@@ -44,6 +45,7 @@ from website.util import waterbutler_api_url_for
 from website.util.sanitize import strip_html
 from osf.models import MetaSchema
 from addons.base.models import BaseStorageAddon
+from addons.base.utils import TokenBucket, crawl_file_tree
 
 from osf_tests import factories
 from tests.base import OsfTestCase, fake
@@ -461,6 +463,67 @@ class TestStorageAddonBase(ArchiverTestCase):
         for addon in [a for a in settings.ADDONS_ARCHIVABLE if a not in ['wiki', 'forward']]:
             self._test_addon(addon)
 
+class TestFileTreeCrawler(OsfTestCase):
+
+    def setUp(self):
+        super(TestFileTreeCrawler, self).setUp()
+        self.file_tree = file_tree_factory(3, 3, 3)
+        self.listed = []
+
+        def list_children(folder):
+            self.listed.append(folder['path'])
+            return [{k: v for k, v in child.items() if k != 'children'} for child in self._find(folder['path'])['children']]
+        self.list_children = list_children
+
+    def _find(self, path, tree=None):
+        tree = tree or self.file_tree
+        if tree['path'] == path:
+            return tree
+        for child in tree.get('children', []):
+            found = self._find(path, child)
+            if found:
+                return found
+
+    def test_crawl_builds_the_tree(self):
+        root = {k: v for k, v in self.file_tree.items() if k != 'children'}
+        pairs = list(crawl_file_tree(root, self.list_children, workers=3))
+
+        assert_equal(root, self.file_tree)
+        assert_equal(len(pairs), len(self.listed))
+        assert_equal(len(set(self.listed)), len(self.listed))
+
+    def test_crawl_retries_server_errors(self):
+        failures = []
+
+        def flaky(folder):
+            if not failures:
+                failures.append(folder['path'])
+                raise HTTPError(503)
+            return self.list_children(folder)
+
+        root = {k: v for k, v in self.file_tree.items() if k != 'children'}
+        list(crawl_file_tree(root, flaky, retries=1, backoff=0))
+        assert_equal(root, self.file_tree)
+
+    def test_crawl_does_not_retry_client_errors(self):
+        calls = []
+
+        def forbidden(folder):
+            calls.append(folder)
+            raise HTTPError(403)
+
+        with assert_raises(HTTPError):
+            list(crawl_file_tree({'path': '/', 'kind': 'folder'}, forbidden, retries=3, backoff=0))
+        assert_equal(len(calls), 1)
+
+    def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        start = time.time()
+        for _ in range(6):
+            bucket.acquire()
+        assert_greater_equal(time.time() - start, 0.04)
+
+
 class TestArchiverTasks(ArchiverTestCase):
 
     @mock.patch('framework.celery_tasks.handlers.enqueue_task')
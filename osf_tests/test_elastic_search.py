@@ -14,6 +14,7 @@ from framework.auth.core import Auth
 from website import settings
 import website.search.search as search
 from website.search import elastic_search
+from website.search import util as search_util
 from website.search.util import build_query
 from website.search_migration.migrate import migrate
 from osf.models import Retraction, NodeLicense, Tag, QuickFilesNode
@@ -962,6 +963,32 @@ class TestSearchFiles(OsfTestCase):
         find = query_file('The Dock of the Bay.mp3')['results']
         assert_equal(len(find), 0)
 
+    def test_update_node_title_updates_files(self):
+        self.root.append_file('Respect.mp3')
+        self.node.title = 'Otis Blue'
+        with run_celery_tasks():
+            self.node.save()
+        find = query_file('Respect.mp3')['results']
+        assert_equal(find[0]['node_title'], 'Otis Blue')
+
+    def test_update_node_description_does_not_touch_files(self):
+        self.root.append_file('Mr. Pitiful.mp3')
+        self.node.description = 'Otis Redding Sings Soul'
+        with mock.patch('website.search.elastic_search.bulk_update_files') as mock_update_files:
+            with run_celery_tasks():
+                self.node.save()
+        assert_false(mock_update_files.called)
+
+    def test_bulk_update_files_uses_one_bulk_request(self):
+        for name in ('Satisfaction.mp3', 'Fa-Fa-Fa-Fa-Fa.mp3', 'Ton of Joy.mp3'):
+            self.root.append_file(name)
+        with mock.patch('website.search.elastic_search.helpers.bulk', return_value=(3, [])) as mock_bulk:
+            elastic_search.bulk_update_files(self.node)
+        assert_equal(mock_bulk.call_count, 1)
+        actions = list(mock_bulk.call_args[0][1])
+        assert_equal(len(actions), 3)
+        assert_true(all(action['_op_type'] == 'index' for action in actions))
+
     def test_file_download_url_guid(self):
         file_ = self.root.append_file('Timber.mp3')
         file_guid = file_.get_guid(create=True)
@@ -1001,3 +1028,27 @@ class TestSearchFiles(OsfTestCase):
 
         find = query_file('GreenLight.mp3')['results']
         assert_equal(len(find), 0)
+
+
+class TestSearchUpdateCoalescing(unittest.TestCase):
+
+    def test_mark_dirty_schedules_once(self):
+        with mock.patch.object(settings, 'SEARCH_UPDATE_COALESCE_WINDOW', 60):
+            assert_true(search_util.mark_dirty('node', 'abc12'))
+            assert_false(search_util.mark_dirty('node', 'abc12', files=True))
+            assert_false(search_util.mark_dirty('node', 'abc12'))
+
+            assert_true(search_util.pop_dirty('node', 'abc12'))
+            assert_true(search_util.mark_dirty('node', 'abc12'))
+            assert_false(search_util.pop_dirty('node', 'abc12'))
+
+    @mock.patch('website.search.search.enqueue_task')
+    def test_update_node_coalesces_within_window(self, mock_enqueue):
+        node = mock.Mock(_id='def34', FILE_SEARCH_UPDATE_FIELDS={'title'})
+        with mock.patch.object(settings, 'SEARCH_UPDATE_COALESCE_WINDOW', 60), \
+                mock.patch.object(settings, 'USE_CELERY', True):
+            search.update_node(node, saved_fields=['description'])
+            search.update_node(node, saved_fields=['title'])
+            assert_equal(mock_enqueue.call_count, 1)
+            # The scheduled task reindexes files because a later update changed the title
+            assert_true(search_util.pop_dirty('node', 'def34'))
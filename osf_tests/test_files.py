@@ -1,7 +1,12 @@
+import timeit
+
 import pytest
 
+from addons.github.models import GithubFile, GithubFileNode, GithubFolder
 from addons.osfstorage import settings as osfstorage_settings
+from addons.osfstorage.models import OsfStorageFile
 from osf.models import BaseFileNode, Folder, File
+from osf.models.files import UnableToResolveFileClass
 from osf_tests.factories import (
     UserFactory,
     ProjectFactory,
@@ -61,3 +66,45 @@ def test_folder_update_calls_folder_update_method(project, create_test_file):
     assert parent_folder.__class__.update != File.update
     # the file update method should be the File update method
     assert file.__class__.update == File.update
+
+
+def test_resolve_class():
+    assert BaseFileNode.resolve_class('github', BaseFileNode.FILE) is GithubFile
+    assert BaseFileNode.resolve_class('github', BaseFileNode.FOLDER) is GithubFolder
+    assert BaseFileNode.resolve_class('github', BaseFileNode.ANY) is GithubFileNode
+    with pytest.raises(UnableToResolveFileClass):
+        BaseFileNode.resolve_class('nope', BaseFileNode.FILE)
+
+def test_resolve_classes():
+    resolved = BaseFileNode.resolve_classes([
+        ('github', BaseFileNode.FILE),
+        ('osfstorage', BaseFileNode.FILE),
+        ('github', BaseFileNode.FILE),
+    ])
+    assert resolved == {
+        ('github', BaseFileNode.FILE): GithubFile,
+        ('osfstorage', BaseFileNode.FILE): OsfStorageFile,
+    }
+    with pytest.raises(UnableToResolveFileClass):
+        BaseFileNode.resolve_classes([('github', BaseFileNode.FILE), ('nope', BaseFileNode.FILE)])
+
+def test_resolve_class_of_late_registered_provider():
+    BaseFileNode.resolve_class('github', BaseFileNode.FILE)
+
+    class LateFileNode(BaseFileNode):
+        _provider = 'late'
+
+    class LateFile(LateFileNode, File):
+        pass
+
+    assert BaseFileNode.resolve_class('late', BaseFileNode.FILE) is LateFile
+    assert BaseFileNode.resolve_class('late', BaseFileNode.ANY) is LateFileNode
+    assert LateFile(name='late', provider='late')._resolve_class(File) is LateFile
+
+def test_resolve_class_is_a_lookup():
+    # Micro-benchmark: resolving is done for every listed file, it must not walk the class tree
+    seconds = min(timeit.repeat(
+        lambda: BaseFileNode.resolve_class('github', BaseFileNode.FILE),
+        number=10000, repeat=3
+    ))
+    assert seconds < 0.5
@@ -1,9 +1,11 @@
 import mock
 import pytest
 import urllib
+from django.core.cache import cache
 from django.core.exceptions import MultipleObjectsReturned
 
 from osf.models import Guid, NodeLicenseRecord, OSFUser
+from osf.utils import guid_cache
 from osf_tests.factories import AuthUserFactory, UserFactory, NodeFactory, NodeLicenseRecordFactory, \
     RegistrationFactory, PreprintFactory, PreprintProviderFactory
 from tests.base import OsfTestCase
@@ -127,6 +129,93 @@ class TestReferent:
             pytest.fail('Multiple objects returned for {} with multiple guids. {}'.format(Factory._meta.model, ex))
 
 
+@pytest.yield_fixture()
+def cached_guids():
+    cache.clear()
+    with mock.patch('website.settings.GUID_CACHE_BACKEND', 'default'):
+        yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('cached_guids')
+class TestGuidCache:
+
+    @pytest.mark.django_assert_num_queries
+    def test_resolved_guids_are_cached(self, django_assert_num_queries):
+        node = NodeFactory()
+        entry = guid_cache.resolve_guid(node._id)
+        assert entry.object_id == node.id
+        assert entry.deep_url == node.deep_url
+        assert entry.model is node.__class__._meta.concrete_model
+        with django_assert_num_queries(0):
+            assert guid_cache.resolve_guid(node._id) == entry
+
+    def test_unknown_guid(self):
+        assert guid_cache.resolve_guid('nope1') is None
+
+    def test_saving_the_referent_invalidates_its_url(self):
+        user = UserFactory()
+        assert guid_cache.resolve_guid(user._id).deep_url == '/profile/{}/'.format(user._id)
+        with mock.patch('osf.models.user.OSFUser.deep_url', '/moved/'):
+            user.save()
+            assert guid_cache.resolve_guid(user._id).deep_url == '/moved/'
+
+    def test_entries_cached_before_the_commit_are_invalidated_again(self):
+        user = UserFactory()
+        stale = guid_cache.resolve_guid(user._id)
+        with mock.patch('osf.utils.guid_cache.transaction') as mock_transaction:
+            with mock.patch('osf.models.user.OSFUser.deep_url', '/moved/'):
+                user.save()
+                # A request that still reads the old row caches it again
+                cache.set(guid_cache._referent_key(stale.content_type_id, stale.object_id), stale.deep_url)
+                for call in mock_transaction.on_commit.call_args_list:
+                    call[0][0]()
+                assert guid_cache.resolve_guid(user._id).deep_url == '/moved/'
+
+    def test_only_referent_models_invalidate_entries(self):
+        user = UserFactory()
+        with mock.patch('osf.utils.guid_cache.invalidate_referent') as mock_invalidate:
+            user.save()
+            assert mock_invalidate.call_count == 1
+            Guid.load(user._id).save()
+            NodeLicenseRecordFactory()
+            assert mock_invalidate.call_count == 1
+
+    def test_repointing_the_guid_invalidates_it(self):
+        node, other = NodeFactory(), NodeFactory()
+        guid = Guid.load(node._id)
+        assert guid_cache.resolve_guid(guid._id).object_id == node.id
+        guid.referent = other
+        guid.save()
+        assert guid_cache.resolve_guid(guid._id).object_id == other.id
+
+    def test_deleting_the_guid_invalidates_it(self):
+        node = NodeFactory()
+        assert guid_cache.resolve_guid(node._id)
+        Guid.load(node._id).delete()
+        assert guid_cache.resolve_guid(node._id) is None
+
+    def test_moving_a_folder_invalidates_the_urls_of_its_descendants(self):
+        node, other = NodeFactory(), NodeFactory()
+        folder = node.get_addon('osfstorage').get_root().append_folder('folder')
+        guid = folder.append_file('file.txt').get_guid(create=True)
+        assert guid_cache.resolve_guid(guid._id).deep_url.startswith('/{}/'.format(node._id))
+        folder.move_under(other.get_addon('osfstorage').get_root())
+        assert guid_cache.resolve_guid(guid._id).deep_url.startswith('/{}/'.format(other._id))
+
+    @pytest.mark.django_assert_num_queries
+    def test_load_referents(self, django_assert_num_queries):
+        nodes = [NodeFactory() for _ in range(3)]
+        users = [UserFactory() for _ in range(2)]
+        guids = [obj._id for obj in nodes + users] + ['nope1']
+        referents = Guid.load_referents(guids)
+        assert referents == {obj._id: obj for obj in nodes + users}
+        # The directory is cached; one query per referent model remains
+        with django_assert_num_queries(2):
+            Guid.load_referents(guids)
+
+
 class TestResolveGuid(OsfTestCase):
 
     def setUp(self):
@@ -33,6 +33,7 @@ from osf.models import (
 )
 from osf.models.node import AbstractNodeQuerySet
 from osf.models.spam import SpamStatus
+from osf.utils.requests import dummy_request
 from addons.wiki.models import NodeWikiPage
 from osf.exceptions import ValidationError, ValidationValueError
 from framework.auth.core import Auth
@@ -1946,6 +1947,80 @@ class TestNodeSpam:
                 assert project.check_spam(user, None, None) is True
                 assert project.is_public is True
 
+    @mock.patch.object(settings, 'SPAM_CHECK_ENABLED', True)
+    def test_spam_check_is_queued_for_spam_fields_only(self, project):
+        assert project._should_check_spam({'description'}) is True
+        assert project._should_check_spam({'is_public'}) is True
+        assert project._should_check_spam({'category'}) is False
+        project.spam_status = SpamStatus.HAM
+        assert project._should_check_spam({'description'}) is False
+
+    @mock.patch.object(settings, 'SPAM_CHECK_ENABLED', True)
+    def test_saving_runs_spam_check_in_task(self, project, user):
+        with mock.patch('osf.models.node.get_request_and_user_id', return_value=(dummy_request, user._id)):
+            with mock.patch('osf.models.AbstractNode.check_spam_and_save') as mock_check:
+                project.description = 'Not spam'
+                project.save()
+        assert mock_check.call_count == 1
+        checked_user, saved_fields, request_headers = mock_check.call_args[0]
+        assert checked_user == user
+        assert 'description' in saved_fields
+
+    def test_spam_verdicts_are_cached_by_content_and_submitter(self, project):
+        headers = {'Remote-Addr': '127.0.0.1'}
+        with mock.patch('osf.models.spam._get_client') as mock_get_client:
+            mock_get_client.return_value.check_comment.return_value = (True, 'pro tip')
+            assert project.do_check_spam('Hamlet', 'ham@let.com', 'Buy cheap {}'.format(project._id), headers) is True
+            project.spam_status = SpamStatus.UNKNOWN
+            assert project.do_check_spam('Hamlet', 'ham@let.com', 'Buy cheap {}'.format(project._id), headers) is True
+            assert mock_get_client.return_value.check_comment.call_count == 1
+            project.spam_status = SpamStatus.UNKNOWN
+            project.do_check_spam('Hamlet', 'ham@let.com', 'Buy cheaper {}'.format(project._id), headers)
+            assert mock_get_client.return_value.check_comment.call_count == 2
+            project.spam_status = SpamStatus.UNKNOWN
+            project.do_check_spam('Ophelia', 'oph@elia.com', 'Buy cheaper {}'.format(project._id), headers)
+            assert mock_get_client.return_value.check_comment.call_count == 3
+            project.spam_status = SpamStatus.UNKNOWN
+            project.do_check_spam('Ophelia', 'oph@elia.com', 'Buy cheaper {}'.format(project._id), {'Remote-Addr': '127.0.0.2'})
+            assert mock_get_client.return_value.check_comment.call_count == 4
+
+    @mock.patch.object(settings, 'SPAM_CHECK_ENABLED', True)
+    def test_spam_check_keeps_concurrent_edits(self, project, user):
+        stale = AbstractNode.load(project._id)
+        stale.description = 'Buy cheap'
+        project.title = 'Edited meanwhile'
+        project.save()
+        with mock.patch('osf.models.spam._get_client') as mock_get_client:
+            mock_get_client.return_value.check_comment.return_value = (True, 'pro tip')
+            stale.check_spam_and_save(user, {'description'}, {'Remote-Addr': '127.0.0.1'})
+        project.reload()
+        assert project.title == 'Edited meanwhile'
+        assert project.spam_pro_tip == 'pro tip'
+        assert project.is_spammy
+
+    @mock.patch.object(settings, 'SPAM_CHECK_ENABLED', True)
+    @mock.patch.object(settings, 'SPAM_FLAGGED_MAKE_NODE_PRIVATE', True)
+    def test_spam_check_saves_privacy_and_last_logged(self, project, user):
+        project.description = 'Buy cheap'
+        last_logged = project.last_logged
+        with mock.patch('osf.models.spam._get_client') as mock_get_client:
+            mock_get_client.return_value.check_comment.return_value = (True, 'pro tip')
+            project.check_spam_and_save(user, {'description'}, {'Remote-Addr': '127.0.0.1'})
+        project.reload()
+        assert project.is_public is False
+        assert project.last_logged > last_logged
+        assert project.last_logged == project.logs.first().date
+
+    def test_spam_content_only_renders_newest_wiki_page(self, project):
+        auth = Auth(project.creator)
+        project.update_node_wiki('home', 'Old home', auth)
+        project.update_node_wiki('other', 'Newest page', auth)
+        with mock.patch('addons.wiki.models.NodeWikiPage.raw_text', autospec=True, return_value=u'Newest page') as mock_raw_text:
+            content = project._get_spam_content({'wiki_pages_current'})
+        assert content == 'Newest page'
+        assert mock_raw_text.call_count == 1
+        assert mock_raw_text.call_args[0][0].page_name == 'other'
+
     def test_flag_spam_make_node_private(self, project):
         assert project.is_public
         with mock.patch.object(settings, 'SPAM_FLAGGED_MAKE_NODE_PRIVATE', True):
@@ -0,0 +1,124 @@
+import mock
+import pytest
+
+from framework.auth.core import Auth
+from osf.models import NodeRelation
+from osf.utils.permission_cache import PermissionCache, get_permission_cache
+from osf.utils.requests import dummy_request
+from website.util.permissions import READ, WRITE, ADMIN, expand_permissions
+
+from osf_tests.factories import (
+    NodeFactory,
+    ProjectFactory,
+    UserFactory,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+class FakeRequest(object):
+    pass
+
+
+@pytest.yield_fixture()
+def request_context():
+    with mock.patch('osf.utils.permission_cache.get_current_request', return_value=FakeRequest()):
+        yield
+
+
+@pytest.fixture()
+def user():
+    return UserFactory()
+
+
+@pytest.fixture()
+def project():
+    return ProjectFactory()
+
+
+@pytest.fixture()
+def grandchild(project):
+    return NodeFactory(parent=NodeFactory(parent=project, creator=project.creator), creator=project.creator)
+
+
+class TestPermissionCache:
+
+    def test_no_cache_outside_of_a_request(self):
+        with mock.patch('osf.utils.permission_cache.get_current_request', return_value=dummy_request):
+            assert get_permission_cache() is None
+
+    def test_cache_is_scoped_to_the_request(self):
+        request = FakeRequest()
+        with mock.patch('osf.utils.permission_cache.get_current_request', return_value=request):
+            assert get_permission_cache() is get_permission_cache()
+        with mock.patch('osf.utils.permission_cache.get_current_request', return_value=FakeRequest()):
+            assert get_permission_cache() is not request._permission_cache
+
+    @pytest.mark.django_assert_num_queries
+    def test_lineage_is_loaded_with_one_query(self, project, grandchild, user, django_assert_num_queries):
+        project.add_contributor(user, permissions=expand_permissions(ADMIN), auth=Auth(project.creator), save=True)
+        child = grandchild.parent_node
+        cache = PermissionCache()
+        # One query for the lineage and one for the contributor rows
+        with django_assert_num_queries(2):
+            assert cache.is_admin_parent(user, grandchild)
+            assert cache.is_admin_parent(user, child)
+            assert not cache.has_permission(user, grandchild, READ)
+            assert cache.has_permission(user, project, WRITE)
+
+    def test_non_contributor(self, project, user):
+        cache = PermissionCache()
+        assert cache.get_permissions(user, project) is None
+        assert not cache.has_permission(user, project, READ)
+        assert not cache.is_admin_parent(user, project)
+
+
+@pytest.mark.usefixtures('request_context')
+class TestNodePermissionsWithCache:
+
+    @pytest.mark.django_assert_num_queries
+    def test_repeated_checks_are_memoized(self, project, grandchild, user, django_assert_num_queries):
+        project.add_contributor(user, permissions=expand_permissions(ADMIN), auth=Auth(project.creator), save=True)
+        child = grandchild.parent_node
+        grandchild.has_permission(user, READ)
+        with django_assert_num_queries(0):
+            assert grandchild.has_permission(user, READ)
+            assert not grandchild.has_permission(user, WRITE)
+            assert grandchild.is_admin_parent(user)
+            assert child.is_admin_parent(user)
+            assert grandchild.get_permissions(user) == []
+            assert project.get_permissions(user) == [READ, WRITE, ADMIN]
+
+    def test_add_contributor_clears_cache(self, project, user):
+        assert not project.has_permission(user, READ)
+        project.add_contributor(user, permissions=[READ], auth=Auth(project.creator), save=True)
+        assert project.has_permission(user, READ)
+        assert not project.has_permission(user, WRITE)
+
+    def test_set_permissions_clears_cache(self, project, user):
+        project.add_contributor(user, permissions=[READ], auth=Auth(project.creator), save=True)
+        assert not project.has_permission(user, ADMIN)
+        project.set_permissions(user, expand_permissions(ADMIN), save=True)
+        assert project.has_permission(user, ADMIN)
+
+    def test_remove_contributor_clears_cache(self, project, grandchild, user):
+        project.add_contributor(user, permissions=expand_permissions(ADMIN), auth=Auth(project.creator), save=True)
+        assert grandchild.is_admin_parent(user)
+        project.remove_contributor(user, auth=Auth(project.creator))
+        assert not grandchild.is_admin_parent(user)
+        assert not grandchild.can_view(Auth(user))
+
+    def test_moving_a_node_clears_cache(self, project, user):
+        project.add_contributor(user, permissions=expand_permissions(ADMIN), auth=Auth(project.creator), save=True)
+        component = ProjectFactory(creator=project.creator)
+        assert not component.is_admin_parent(user)
+        NodeRelation.objects.create(parent=project, child=component)
+        assert component.is_admin_parent(user)
+
+    def test_copy_contributors_from_clears_cache(self, project, user):
+        project.add_contributor(user, permissions=[READ], auth=Auth(project.creator), save=True)
+        # Another creator, as contributors are unique per node
+        copy = ProjectFactory()
+        assert not copy.has_permission(user, READ)
+        copy.copy_contributors_from(project)
+        assert copy.has_permission(user, READ)
@@ -0,0 +1,166 @@
+import mock
+import pytest
+from django.utils import timezone
+
+from osf.models import QueuedShareUpdate, Registration
+from scripts import share_pipeline
+from website.preprints.tasks import queue_preprint_share
+from website.project.tasks import queue_node_share
+
+from osf_tests.factories import PreprintFactory, ProjectFactory, RegistrationFactory, SubjectFactory
+from osf_tests.utils import MockShareResponse
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def node():
+    return ProjectFactory(is_public=True)
+
+
+@pytest.fixture()
+def registrations():
+    return [RegistrationFactory(is_public=True) for _ in range(3)]
+
+
+@pytest.fixture()
+def preprint():
+    preprint = PreprintFactory()
+    preprint.provider.access_token = 'Token'
+    preprint.provider.save()
+    return preprint
+
+
+@pytest.fixture()
+def share_settings(node, registrations, preprint):
+    # Objects are created first, so that saving them does not queue them
+    with mock.patch.multiple(
+        'website.settings',
+        USE_CELERY=True,
+        SHARE_UPDATE_OUTBOX=True,
+        SHARE_UPDATE_COALESCE_WINDOW=0,
+        SHARE_URL='https://share.osf.io/',
+        SHARE_API_TOKEN='Token',
+    ):
+        yield
+
+
+@pytest.fixture()
+def session():
+    session = mock.Mock()
+    session.post.return_value = MockShareResponse(200)
+    with mock.patch('scripts.share_pipeline.requests.Session', return_value=session):
+        yield session
+
+
+@pytest.mark.usefixtures('share_settings')
+class TestQueuedShareUpdate:
+
+    def test_repeated_updates_are_coalesced(self, node):
+        queue_node_share(node)
+        queue_node_share(node)
+        assert QueuedShareUpdate.objects.filter(kind='node', target_id=node._id).count() == 1
+
+    def test_removed_subjects_are_merged(self, preprint):
+        queue_preprint_share(preprint, old_subjects=[1, 2])
+        queue_preprint_share(preprint, old_subjects=[2, 3], share_type='thesis')
+        update = QueuedShareUpdate.objects.get(kind='preprint', target_id=preprint._id)
+        assert sorted(update.old_subjects) == [1, 2, 3]
+        assert update.share_type == 'thesis'
+
+    def test_pushes_without_the_outbox(self, node):
+        with mock.patch('website.settings.USE_CELERY', False), \
+                mock.patch('website.project.tasks.send_share_node_data') as mock_send:
+            mock_send.return_value = MockShareResponse(200)
+            queue_node_share(node)
+        assert mock_send.called
+        assert not QueuedShareUpdate.objects.exists()
+
+    def test_send_queued_updates(self, node, registrations, session):
+        queue_node_share(node)
+        queue_node_share(registrations[0])
+        assert share_pipeline.send_queued_updates(dry_run=False) == 2
+        assert session.post.call_count == 2
+        assert not QueuedShareUpdate.objects.exists()
+
+    def test_dry_run(self, node, session):
+        queue_node_share(node)
+        assert share_pipeline.send_queued_updates(dry_run=True) == 0
+        assert not session.post.called
+        assert QueuedShareUpdate.objects.count() == 1
+
+    def test_updates_are_held_for_the_coalesce_window(self, node, session):
+        with mock.patch('website.settings.SHARE_UPDATE_COALESCE_WINDOW', 60):
+            queue_node_share(node)
+        share_pipeline.send_queued_updates(dry_run=False)
+        assert not session.post.called
+
+    def test_update_queued_while_pushing_is_kept(self, node, session):
+        queue_node_share(node)
+
+        def post(*args, **kwargs):
+            queue_node_share(node)
+            return MockShareResponse(200)
+        session.post.side_effect = post
+
+        share_pipeline.send_queued_updates(dry_run=False)
+        assert QueuedShareUpdate.objects.filter(target_id=node._id).exists()
+
+    def test_server_errors_are_retried_with_backoff(self, node, session):
+        session.post.return_value = MockShareResponse(503)
+        queue_node_share(node)
+        share_pipeline.send_queued_updates(dry_run=False)
+        update = QueuedShareUpdate.objects.get(target_id=node._id)
+        assert update.attempts == 1
+        assert update.send_after > timezone.now()
+
+    @mock.patch('website.project.tasks.send_desk_share_error')
+    def test_server_errors_are_reported_after_the_last_retry(self, mock_mail, node, session):
+        session.post.return_value = MockShareResponse(503)
+        queue_node_share(node)
+        QueuedShareUpdate.objects.update(attempts=4)
+        with mock.patch('website.settings.SHARE_UPDATE_MAX_RETRIES', 4):
+            share_pipeline.send_queued_updates(dry_run=False)
+        assert mock_mail.called
+        assert not QueuedShareUpdate.objects.exists()
+
+    @mock.patch('website.project.tasks.send_desk_share_error')
+    def test_client_errors_are_reported(self, mock_mail, node, session):
+        session.post.return_value = MockShareResponse(400)
+        queue_node_share(node)
+        share_pipeline.send_queued_updates(dry_run=False)
+        assert mock_mail.called
+        assert not QueuedShareUpdate.objects.exists()
+
+    def test_send_removed_subjects(self, preprint, session):
+        removed = SubjectFactory(provider=preprint.provider)
+        queue_preprint_share(preprint, old_subjects=[removed.id])
+        share_pipeline.send_queued_updates(dry_run=False)
+        graph = session.post.call_args[1]['json']['data']['attributes']['data']['@graph']
+        deleted = [item for item in graph if item['@type'] == 'throughsubjects' and item['is_deleted']]
+        assert len(deleted) == 1
+
+    def test_backfill(self, registrations, session):
+        session.post.side_effect = [MockShareResponse(200), MockShareResponse(502), MockShareResponse(200)]
+        pushed = share_pipeline.backfill(
+            'node', Registration.objects.filter(id__in=[r.id for r in registrations]),
+            dry_run=False, batch_size=2
+        )
+        assert pushed == 2
+        assert session.post.call_count == 3
+        assert list(QueuedShareUpdate.objects.values_list('target_id', flat=True)) == [registrations[1]._id]
+
+    @pytest.mark.parametrize('share_url, share_api_token', [(None, 'Token'), ('https://share.osf.io/', None)])
+    def test_backfill_without_share(self, share_url, share_api_token, registrations, session):
+        with mock.patch.multiple('website.settings', SHARE_URL=share_url, SHARE_API_TOKEN=share_api_token):
+            pushed = share_pipeline.backfill('node', Registration.objects.filter(id__in=[r.id for r in registrations]), dry_run=False)
+        assert pushed == 0
+        assert not session.post.called
+        assert not QueuedShareUpdate.objects.exists()
+
+    def test_queued_updates_are_kept_without_share(self, node, session):
+        queue_node_share(node)
+        with mock.patch('website.settings.SHARE_URL', None):
+            assert share_pipeline.send_queued_updates(dry_run=False) == 0
+        assert not session.post.called
+        assert QueuedShareUpdate.objects.filter(target_id=node._id).exists()
@@ -0,0 +1,119 @@
+import time
+
+import mock
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from osf.models import Subject
+from osf.models.preprint_provider import rules_to_subjects
+from osf.utils import subject_index
+from osf.utils.subject_index import get_subject_index
+from website import settings
+from website.util.share import format_subject
+
+from osf_tests.factories import PreprintProviderFactory, SubjectFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def osf_provider():
+    return PreprintProviderFactory(_id='osf', share_title='OSF')
+
+
+@pytest.fixture()
+def root(osf_provider):
+    return SubjectFactory(text='Root', provider=osf_provider)
+
+
+@pytest.fixture()
+def child(root, osf_provider):
+    return SubjectFactory(text='Child', parent=root, provider=osf_provider)
+
+
+@pytest.fixture()
+def grandchild(child, osf_provider):
+    return SubjectFactory(text='Grandchild', parent=child, provider=osf_provider)
+
+
+class TestSubjectIndex:
+
+    def test_index(self, root, child, grandchild, osf_provider):
+        index = get_subject_index()
+        assert index.get(root.id).children == [child.id]
+        assert index.get(grandchild.id).depth == 2
+        assert index.lineage(grandchild.id) == [root.id, child.id, grandchild.id]
+        assert index.get_by_guid(child._id).id == child.id
+        assert set(index.provider_ids(osf_provider.id)) == {root.id, child.id, grandchild.id}
+        assert index.has_subjects(osf_provider.id)
+        assert not index.has_subjects(PreprintProviderFactory().id)
+
+    @pytest.mark.django_assert_num_queries
+    def test_hierarchy_and_path_are_read_from_the_index(self, root, child, grandchild, django_assert_num_queries):
+        get_subject_index()
+        with django_assert_num_queries(0):
+            assert grandchild.hierarchy == [root._id, child._id, grandchild._id]
+            assert grandchild.path == 'OSF|Root|Child|Grandchild'
+            assert root.child_count == 1
+        with django_assert_num_queries(1):
+            assert grandchild.object_hierarchy == [root, child, grandchild]
+
+    def test_saving_a_subject_clears_the_index(self, root, child):
+        index = get_subject_index()
+        new_child = SubjectFactory(text='New child', parent=root, provider=root.provider)
+        assert get_subject_index() is not index
+        assert get_subject_index().get(root.id).children == [child.id, new_child.id]
+
+    def test_saving_subjects_in_a_transaction_does_not_rebuild_the_index(self, root, child, osf_provider):
+        counts = []
+        with mock.patch('osf.utils.subject_index._build_index', wraps=subject_index._build_index) as mock_build:
+            for i in range(5):
+                # Saving validates the depth of the parent, see `validate_subject_hierarchy_length`
+                with CaptureQueriesContext(connection) as queries:
+                    SubjectFactory(text='Leaf {}'.format(i), parent=child, provider=osf_provider)
+                counts.append(len(queries))
+        assert not mock_build.called
+        assert len(set(counts)) == 1
+        # Outside of the transaction the index is rebuilt as usual
+        with mock.patch('osf.models.subject.has_uncommitted_changes', return_value=False):
+            assert child.is_indexed
+            assert get_subject_index().get(child.id).children[-1] == Subject.objects.get(text='Leaf 4').id
+
+    def test_saving_a_provider_clears_the_index(self, root, osf_provider):
+        assert root.path == 'OSF|Root'
+        osf_provider.share_title = 'Open Science Framework'
+        osf_provider.save()
+        assert Subject.objects.get(id=root.id).path == 'Open Science Framework|Root'
+
+    def test_unsaved_changes_are_not_read_from_the_index(self, root, child, grandchild):
+        grandchild.parent = root
+        assert grandchild.hierarchy == [root._id, grandchild._id]
+
+    def test_shared_generation(self, root):
+        with mock.patch('website.settings.SUBJECT_INDEX_CACHE_BACKEND', 'default'):
+            index = get_subject_index()
+            assert get_subject_index() is index
+            # Another process cleared its index
+            cache.set(subject_index.GENERATION_KEY, 42)
+            try:
+                # which is noticed once the check interval has passed
+                assert get_subject_index() is index
+                later = time.time() + settings.SUBJECT_INDEX_CHECK_INTERVAL + 1
+                with mock.patch('osf.utils.subject_index.time.time', return_value=later):
+                    assert get_subject_index() is not index
+            finally:
+                cache.delete(subject_index.GENERATION_KEY)
+
+    def test_rules_to_subjects(self, root, child, grandchild, osf_provider):
+        other_root = SubjectFactory(text='Other root', provider=osf_provider)
+        assert set(rules_to_subjects([[[root._id], True]])) == {root, child, grandchild}
+        assert set(rules_to_subjects([[[root._id, child._id], False], [[other_root._id], False]])) == {root, child, other_root}
+
+    def test_format_subject(self, root, child):
+        formatted = format_subject(child)
+        assert formatted.attrs['name'] == 'Child'
+        assert formatted.attrs['uri'] == child.absolute_api_v2_url
+        assert formatted.attrs['parent'].attrs['name'] == 'Root'
+        assert formatted.attrs['parent'].attrs['parent'] is None
@@ -2,8 +2,10 @@ import time
 import logging
 import argparse
 import importlib
+from collections import defaultdict
 from datetime import datetime, timedelta
 from dateutil.parser import parse
+from django.db.models import Case, Count, Value, When
 from django.utils import timezone
 
 from website.app import init_app
@@ -14,6 +16,72 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
+def _flatten_buckets(buckets, prefix=()):
+    for name, query in sorted(buckets.items()):
+        if isinstance(query, dict):
+            for item in _flatten_buckets(query, prefix + (name, )):
+                yield item
+        else:
+            yield prefix + (name, ), query
+
+
+def _unflatten_counts(paths, counts):
+    result = {}
+    for path, count in zip(paths, counts):
+        level = result
+        for name in path[:-1]:
+            level = level.setdefault(name, {})
+        level[path[-1]] = count
+    return result
+
+
+def count_buckets(queryset, buckets, group_by=None, single_pass=True):
+    """Count how many rows of a queryset fall into each of a set of buckets.
+
+    :param queryset: the rows to count
+    :param dict buckets: possibly nested dict mapping bucket names to Q objects,
+        e.g. ``{'nodes': {'total': Q(id__isnull=False), 'public': Q(is_public=True)}}``
+    :param str group_by: field to group the counts by
+    :param bool single_pass: count every bucket in one conditional aggregate query rather than
+        running one ``count()`` per bucket
+    :return: a dict shaped like ``buckets`` with counts in place of the Q objects, or, with
+        ``group_by``, a dict of those keyed by the value of the grouping field. Groups without
+        any rows are left out.
+    """
+    paths, queries = zip(*_flatten_buckets(buckets))
+    aliases = ['bucket_{}'.format(i) for i in range(len(queries))]
+    queryset = queryset.order_by()
+    if group_by:
+        queryset = queryset.values(group_by)
+
+    if single_pass:
+        aggregates = {
+            alias: Count(Case(When(query, then=Value(1))))
+            for alias, query in zip(aliases, queries)
+        }
+        if not group_by:
+            totals = queryset.aggregate(**aggregates)
+            return _unflatten_counts(paths, [totals[alias] for alias in aliases])
+        return {
+            row[group_by]: _unflatten_counts(paths, [row[alias] for alias in aliases])
+            for row in queryset.annotate(**aggregates)
+        }
+
+    if not group_by:
+        return _unflatten_counts(paths, [queryset.filter(query).count() for query in queries])
+    grouped = defaultdict(lambda: [0] * len(queries))
+    for i, query in enumerate(queries):
+        for row in queryset.filter(query).annotate(bucket_count=Count('id')):
+            grouped[row[group_by]][i] = row['bucket_count']
+    return {group: _unflatten_counts(paths, counts) for group, counts in grouped.items()}
+
+
+def empty_counts(buckets):
+    """Counts for a group that :func:`count_buckets` found no rows for."""
+    paths = [path for path, query in _flatten_buckets(buckets)]
+    return _unflatten_counts(paths, [0] * len(paths))
+
+
 class BaseAnalytics(object):
 
     @property
@@ -57,10 +125,17 @@ class SnapshotAnalytics(BaseAnalytics):
 
 class SummaryAnalytics(BaseAnalytics):
 
+    # Count all the buckets of a summary in one scan per model. Turned off only by
+    # scripts/analytics/benchmark_summaries.py to time the one-query-per-bucket approach.
+    single_pass = True
+
     @property
     def analytic_type(self):
         return 'summary'
 
+    def count_buckets(self, queryset, buckets, group_by=None):
+        return count_buckets(queryset, buckets, group_by=group_by, single_pass=self.single_pass)
+
     def get_events(self, date):
         # Date must be specified, must be a date (not a datetime), and must not be today or in the future
         if not date:
@@ -0,0 +1,72 @@
+"""Compare the cost of the summary analytics when each bucket is counted with its own query
+against counting all the buckets of a model in a single pass.
+
+    python -m scripts.analytics.benchmark_summaries -d 2017-10-01 -as node_summary institution_summary
+"""
+import django
+django.setup()
+
+import argparse
+import importlib
+import logging
+import time
+from datetime import timedelta
+
+from dateutil.parser import parse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from website.app import init_app
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+DEFAULT_SCRIPTS = ['node_summary', 'user_summary', 'institution_summary']
+
+
+def run(summary_class, date, single_pass):
+    summary = summary_class()
+    summary.single_pass = single_pass
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.time()
+        events = summary.get_events(date)
+        elapsed = time.time() - start
+    return events, len(ctx.captured_queries), elapsed
+
+
+def benchmark(summary_class, date, repeat=1):
+    results = {}
+    for single_pass in (False, True):
+        runs = [run(summary_class, date, single_pass) for _ in range(repeat)]
+        results[single_pass] = (runs[0][0], runs[0][1], min(elapsed for _, _, elapsed in runs))
+
+    (legacy_events, legacy_queries, legacy_time) = results[False]
+    (events, queries, elapsed) = results[True]
+    logger.info(
+        '{}: {} queries in {:.2f}s per bucket, {} queries in {:.2f}s in a single pass{}'.format(
+            summary_class.__name__,
+            legacy_queries, legacy_time,
+            queries, elapsed,
+            '' if events == legacy_events else ' (RESULTS DIFFER)'
+        )
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the summary analytics scripts')
+    parser.add_argument('-d', '--date', dest='date', required=False)
+    parser.add_argument('-r', '--repeat', dest='repeat', type=int, default=1)
+    parser.add_argument('-as', '--analytics_scripts', nargs='+', dest='analytics_scripts', default=DEFAULT_SCRIPTS)
+    args = parser.parse_args()
+
+    date = parse(args.date).date() if args.date else (timezone.now() - timedelta(days=1)).date()
+    for script in args.analytics_scripts:
+        summary_class = importlib.import_module('scripts.analytics.{}'.format(script)).get_class()
+        benchmark(summary_class, date, repeat=args.repeat)
+
+
+if __name__ == '__main__':
+    init_app(routes=False)
+    main()
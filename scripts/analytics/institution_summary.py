@@ -6,13 +6,13 @@ import logging
 from dateutil.parser import parse
 from datetime import datetime, timedelta
 
-from django.db.models import Q
+from django.db.models import F, Q
 from django.utils import timezone
 
 from framework.encryption import ensure_bytes
-from osf.models import Institution
+from osf.models import AbstractNode, Institution, OSFUser
 from website.app import init_app
-from scripts.analytics.base import SummaryAnalytics
+from scripts.analytics.base import SummaryAnalytics, empty_counts
 
 
 logger = logging.getLogger(__name__)
@@ -34,72 +34,77 @@ class InstitutionSummary(SummaryAnalytics):
         # Convert to a datetime at midnight for queries and the timestamp
         timestamp_datetime = datetime(date.year, date.month, date.day).replace(tzinfo=pytz.UTC)
         query_datetime = timestamp_datetime + timedelta(days=1)
+        all_query = Q(id__isnull=False)
         daily_query = Q(created__gte=timestamp_datetime)
         public_query = Q(is_public=True)
         private_query = Q(is_public=False)
+        node_query = ~Q(type='osf.registration')
+        registration_query = Q(type='osf.registration')
+        # Projects are top-level nodes, as with get_roots
+        root_query = Q(id=F('root')) & ~Q(type__in=['osf.collection', 'osf.quickfilesnode'])
 
         # `embargoed` used private status to determine embargoes, but old registrations could be private and unapproved registrations can also be private
         # `embargoed_v2` uses future embargo end dates on root
-        embargo_v2_query = Q(root__embargo__end_date__gt=query_datetime)
+        embargo_v2_query = Q(root__in=AbstractNode.objects.filter(embargo__end_date__gt=query_datetime).values('id'))
+
+        node_buckets = {
+            'total': all_query,
+            'public': public_query,
+            'private': private_query,
+
+            'total_daily': daily_query,
+            'public_daily': public_query & daily_query,
+            'private_daily': private_query & daily_query,
+        }
+        registration_buckets = {
+            'total': all_query,
+            'public': public_query,
+            'embargoed': private_query,
+            'embargoed_v2': private_query & embargo_v2_query,
+
+            'total_daily': daily_query,
+            'public_daily': public_query & daily_query,
+            'embargoed_daily': private_query & daily_query,
+            'embargoed_v2_daily': private_query & daily_query & embargo_v2_query,
+        }
+        node_count_buckets = {
+            'nodes': {name: query & node_query for name, query in node_buckets.items()},
+            # Projects use root_query to remove children
+            'projects': {name: query & node_query & root_query for name, query in node_buckets.items()},
+            'registered_nodes': {name: query & registration_query for name, query in registration_buckets.items()},
+            'registered_projects': {name: query & registration_query & root_query for name, query in registration_buckets.items()},
+        }
+        user_count_buckets = {
+            'users': {
+                'total': Q(is_active=True),
+                'total_daily': Q(date_confirmed__gte=timestamp_datetime, date_confirmed__lt=query_datetime),
+            }
+        }
+
+        # Count every institution's nodes and users in one grouped query per model
+        affiliated_nodes = AbstractNode.objects.filter(
+            id__in=AbstractNode.affiliated_institutions.through.objects.values('abstractnode_id'),
+            is_deleted=False,
+            created__lt=query_datetime,
+        )
+        affiliated_users = OSFUser.objects.filter(
+            id__in=OSFUser.affiliated_institutions.through.objects.values('osfuser_id'),
+        )
+        node_counts = self.count_buckets(affiliated_nodes, node_count_buckets, group_by='affiliated_institutions')
+        user_counts = self.count_buckets(affiliated_users, user_count_buckets, group_by='affiliated_institutions')
 
         for institution in institutions:
-            node_qs = institution.nodes.filter(is_deleted=False, created__lt=query_datetime).exclude(type='osf.registration')
-            registration_qs = institution.nodes.filter(is_deleted=False, created__lt=query_datetime, type='osf.registration')
-
             count = {
                 'institution': {
                     'id': ensure_bytes(institution._id),
                     'name': ensure_bytes(institution.name),
                 },
-                'users': {
-                    'total': institution.osfuser_set.filter(is_active=True).count(),
-                    'total_daily': institution.osfuser_set.filter(date_confirmed__gte=timestamp_datetime, date_confirmed__lt=query_datetime).count(),
-                },
-                'nodes': {
-                    'total': node_qs.count(),
-                    'public': node_qs.filter(public_query).count(),
-                    'private': node_qs.filter(private_query).count(),
-
-                    'total_daily': node_qs.filter(daily_query).count(),
-                    'public_daily': node_qs.filter(public_query & daily_query).count(),
-                    'private_daily': node_qs.filter(private_query & daily_query).count(),
-                },
-                # Projects use get_roots to remove children
-                'projects': {
-                    'total': node_qs.get_roots().count(),
-                    'public': node_qs.filter(public_query).get_roots().count(),
-                    'private': node_qs.filter(private_query).get_roots().count(),
-
-                    'total_daily': node_qs.filter(daily_query).get_roots().count(),
-                    'public_daily': node_qs.filter(public_query & daily_query).get_roots().count(),
-                    'private_daily': node_qs.filter(private_query & daily_query).get_roots().count(),
-                },
-                'registered_nodes': {
-                    'total': registration_qs.count(),
-                    'public': registration_qs.filter(public_query).count(),
-                    'embargoed': registration_qs.filter(private_query).count(),
-                    'embargoed_v2': registration_qs.filter(private_query & embargo_v2_query).count(),
-
-                    'total_daily': registration_qs.filter(daily_query).count(),
-                    'public_daily': registration_qs.filter(public_query & daily_query).count(),
-                    'embargoed_daily': registration_qs.filter(private_query & daily_query).count(),
-                    'embargoed_v2_daily': registration_qs.filter(private_query & daily_query & embargo_v2_query).count(),
-                },
-                'registered_projects': {
-                    'total': registration_qs.get_roots().count(),
-                    'public': registration_qs.filter(public_query).get_roots().count(),
-                    'embargoed': registration_qs.filter(private_query).get_roots().count(),
-                    'embargoed_v2': registration_qs.filter(private_query & embargo_v2_query).get_roots().count(),
-
-                    'total_daily': registration_qs.filter(daily_query).get_roots().count(),
-                    'public_daily': registration_qs.filter(public_query & daily_query).get_roots().count(),
-                    'embargoed_daily': registration_qs.filter(private_query & daily_query).get_roots().count(),
-                    'embargoed_v2_daily': registration_qs.filter(private_query & daily_query & embargo_v2_query).get_roots().count(),
-                },
                 'keen': {
                     'timestamp': timestamp_datetime.isoformat()
                 }
             }
+            count.update(user_counts.get(institution.id) or empty_counts(user_count_buckets))
+            count.update(node_counts.get(institution.id) or empty_counts(node_count_buckets))
 
             logger.info(
                 '{} Nodes counted. Nodes: {}, Projects: {}, Registered Nodes: {}, Registered Projects: {}'.format(
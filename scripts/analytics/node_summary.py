@@ -1,7 +1,7 @@
 import django
 django.setup()
 
-from django.db.models import Q
+from django.db.models import F, Q
 import pytz
 import logging
 from dateutil.parser import parse
@@ -24,7 +24,7 @@ class NodeSummary(SummaryAnalytics):
 
     def get_events(self, date):
         super(NodeSummary, self).get_events(date)
-        from osf.models import Node, Registration
+        from osf.models import AbstractNode, Node, Registration
 
         # Convert to a datetime at midnight for queries and the timestamp
         timestamp_datetime = datetime(date.year, date.month, date.day).replace(tzinfo=pytz.UTC)
@@ -33,8 +33,11 @@ class NodeSummary(SummaryAnalytics):
         node_qs = Node.objects.filter(is_deleted=False, created__lte=query_datetime)
         registration_qs = Registration.objects.filter(is_deleted=False, created__lte=query_datetime)
 
+        all_query = Q(id__isnull=False)
         public_query = Q(is_public=True)
         private_query = Q(is_public=False)
+        # Top-level projects are their own root
+        root_query = Q(id=F('root'))
 
         # node_query encompasses lte query_datetime
         daily_query = Q(created__gte=timestamp_datetime)
@@ -42,58 +45,49 @@ class NodeSummary(SummaryAnalytics):
 
         # `embargoed` used private status to determine embargoes, but old registrations could be private and unapproved registrations can also be private
         # `embargoed_v2` uses future embargo end dates on root
-        embargo_v2_query = Q(root__embargo__end_date__gt=query_datetime)
+        embargo_v2_query = Q(root__in=AbstractNode.objects.filter(embargo__end_date__gt=query_datetime).values('id'))
+
+        node_buckets = {
+            'total': all_query,
+            'public': public_query,
+            'private': private_query,
+            'total_daily': daily_query,
+            'public_daily': public_query & daily_query,
+            'private_daily': private_query & daily_query,
+        }
+        registration_buckets = {
+            'total': all_query,
+            'public': public_query,
+            'embargoed': private_query,
+            'embargoed_v2': private_query & embargo_v2_query,
+            'withdrawn': retracted_query,
+            'total_daily': daily_query,
+            'public_daily': public_query & daily_query,
+            'embargoed_daily': private_query & daily_query,
+            'embargoed_v2_daily': private_query & daily_query & embargo_v2_query,
+            'withdrawn_daily': retracted_query & daily_query,
+        }
 
-        totals = {
-            'keen': {
-                'timestamp': timestamp_datetime.isoformat()
-            },
+        node_counts = self.count_buckets(node_qs, {
             # Nodes - the number of projects and components
-            'nodes': {
-                'total': node_qs.count(),
-                'public': node_qs.filter(public_query).count(),
-                'private': node_qs.filter(private_query).count(),
-                'total_daily': node_qs.filter(daily_query).count(),
-                'public_daily': node_qs.filter(public_query & daily_query).count(),
-                'private_daily': node_qs.filter(private_query & daily_query).count(),
-            },
+            'nodes': node_buckets,
             # Projects - the number of top-level only projects
-            'projects': {
-                'total': node_qs.get_roots().count(),
-                'public': node_qs.filter(public_query).get_roots().count(),
-                'private': node_qs.filter(private_query).get_roots().count(),
-                'total_daily': node_qs.filter(daily_query).get_roots().count(),
-                'public_daily': node_qs.filter(public_query & daily_query).get_roots().count(),
-                'private_daily': node_qs.filter(private_query & daily_query).get_roots().count(),
-            },
+            'projects': {name: query & root_query for name, query in node_buckets.items()},
+        })
+        registration_counts = self.count_buckets(registration_qs, {
             # Registered Nodes - the number of registered projects and components
-            'registered_nodes': {
-                'total': registration_qs.count(),
-                'public': registration_qs.filter(public_query).count(),
-                'embargoed': registration_qs.filter(private_query).count(),
-                'embargoed_v2': registration_qs.filter(private_query & embargo_v2_query).count(),
-                'withdrawn': registration_qs.filter(retracted_query).count(),
-                'total_daily': registration_qs.filter(daily_query).count(),
-                'public_daily': registration_qs.filter(public_query & daily_query).count(),
-                'embargoed_daily': registration_qs.filter(private_query & daily_query).count(),
-                'embargoed_v2_daily': registration_qs.filter(private_query & daily_query & embargo_v2_query).count(),
-                'withdrawn_daily': registration_qs.filter(retracted_query & daily_query).count(),
+            'registered_nodes': registration_buckets,
+            # Registered Projects - the number of registered top level projects
+            'registered_projects': {name: query & root_query for name, query in registration_buckets.items()},
+        })
 
+        totals = {
+            'keen': {
+                'timestamp': timestamp_datetime.isoformat()
             },
-            # Registered Projects - the number of registered top level projects
-            'registered_projects': {
-                'total': registration_qs.get_roots().count(),
-                'public': registration_qs.filter(public_query).get_roots().count(),
-                'embargoed': registration_qs.filter(private_query).get_roots().count(),
-                'embargoed_v2': registration_qs.filter(private_query & embargo_v2_query).get_roots().count(),
-                'withdrawn': registration_qs.filter(retracted_query).get_roots().count(),
-                'total_daily': registration_qs.filter(daily_query).get_roots().count(),
-                'public_daily': registration_qs.filter(public_query & daily_query).get_roots().count(),
-                'embargoed_daily': registration_qs.filter(private_query & daily_query).get_roots().count(),
-                'embargoed_v2_daily': registration_qs.filter(private_query & daily_query & embargo_v2_query).get_roots().count(),
-                'withdrawn_daily': registration_qs.filter(retracted_query & daily_query).get_roots().count(),
-            }
         }
+        totals.update(node_counts)
+        totals.update(registration_counts)
 
         logger.info(
             'Nodes counted. Nodes: {}, Projects: {}, Registered Nodes: {}, Registered Projects: {}'.format(
@@ -9,13 +9,12 @@ import requests
 
 from dateutil.parser import parse
 from datetime import datetime, timedelta
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.utils import timezone
 
-from osf.models import OSFUser
+from osf.models import NodeLog, OSFUser
 from website.app import init_app
 from website import settings
-from framework.database import paginated
 from framework import sentry
 from scripts.analytics.base import SummaryAnalytics
 
@@ -36,6 +35,25 @@ def count_user_logs(user):
     return length
 
 
+def count_depth_users(users):
+    """Count the users with at least LOG_THRESHOLD logs, in one grouped query over their logs."""
+    log_counts = NodeLog.objects.filter(user__in=users).order_by().values('user').annotate(
+        log_count=Count('id')
+    ).filter(log_count__gte=LOG_THRESHOLD).values_list('user', 'log_count')
+    depth_users = 0
+    borderline_users = []
+    for user_id, log_count in log_counts:
+        if log_count > LOG_THRESHOLD:
+            depth_users += 1
+        else:
+            borderline_users.append(user_id)
+    # Users right at the threshold may owe one of their logs to creating their bookmark collection
+    for user in OSFUser.objects.filter(id__in=borderline_users):
+        if count_user_logs(user) >= LOG_THRESHOLD:
+            depth_users += 1
+    return depth_users
+
+
 class UserSummary(SummaryAnalytics):
 
     @property
@@ -86,32 +104,25 @@ class UserSummary(SummaryAnalytics):
             Q(date_confirmed__lt=query_datetime)
         )
 
-        active_users = 0
-        depth_users = 0
-        profile_edited = 0
-        user_pages = paginated(OSFUser, query=active_user_query)
-        for user in user_pages:
-            active_users += 1
-            log_count = count_user_logs(user)
-            if log_count >= LOG_THRESHOLD:
-                depth_users += 1
-            if user.social or user.schools or user.jobs:
-                profile_edited += 1
-        new_users = OSFUser.objects.filter(is_active=True, date_confirmed__gte=timestamp_datetime, date_confirmed__lt=query_datetime)
+        new_user_query = Q(is_active=True, date_confirmed__gte=timestamp_datetime, date_confirmed__lt=query_datetime)
+        profile_edited_query = ~(Q(social={}) & Q(schools=[]) & Q(jobs=[]))
+        status = self.count_buckets(OSFUser.objects.all(), {
+            'active': active_user_query,
+            'profile_edited': active_user_query & profile_edited_query,
+            'new_users_daily': new_user_query,
+            'new_users_with_institution_daily': new_user_query & Q(
+                id__in=OSFUser.affiliated_institutions.through.objects.values('osfuser_id')
+            ),
+            'unconfirmed': Q(date_registered__lt=query_datetime, date_confirmed__isnull=True),
+            'deactivated': Q(date_disabled__isnull=False, date_disabled__lt=query_datetime),
+            'merged': Q(date_registered__lt=query_datetime, merged_by__isnull=False),
+        })
+        status['depth'] = count_depth_users(OSFUser.objects.filter(active_user_query))
         counts = {
             'keen': {
                 'timestamp': timestamp_datetime.isoformat()
             },
-            'status': {
-                'active': active_users,
-                'depth': depth_users,
-                'new_users_daily': new_users.count(),
-                'new_users_with_institution_daily': new_users.filter(affiliated_institutions__isnull=False).count(),
-                'unconfirmed': OSFUser.objects.filter(date_registered__lt=query_datetime, date_confirmed__isnull=True).count(),
-                'deactivated': OSFUser.objects.filter(date_disabled__isnull=False, date_disabled__lt=query_datetime).count(),
-                'merged': OSFUser.objects.filter(date_registered__lt=query_datetime, merged_by__isnull=False).count(),
-                'profile_edited': profile_edited,
-            }
+            'status': status,
         }
 
         try:
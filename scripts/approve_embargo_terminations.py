@@ -23,44 +23,50 @@ from website import settings
 from website.app import init_app
 
 from scripts import utils as scripts_utils
+from scripts.sanction_scheduler import get_due_registrations, process_due_registrations
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-def get_pending_embargo_termination_requests():
-    auto_approve_time = timezone.now() - settings.EMBARGO_TERMINATION_PENDING_TIME
-
-    return models.EmbargoTerminationApproval.objects.filter(
-        initiation_date__lt=auto_approve_time,
-        state=models.EmbargoTerminationApproval.UNAPPROVED
+def main():
+    pending_embargo_termination_requests = get_due_registrations(
+        'embargo_termination_approval',
+        models.EmbargoTerminationApproval.UNAPPROVED,
+        'initiation_date',
+        timezone.now() - settings.EMBARGO_TERMINATION_PENDING_TIME
     )
+    # The whole run is rolled back in dry run mode, see `run_main`
+    count = process_due_registrations(
+        pending_embargo_termination_requests, approve_embargo_termination, 'ending embargo early', dry_run=False
+    )
+    logger.info("Processed {0} embargo termination requests".format(count))
 
-def main():
-    pending_embargo_termination_requests = get_pending_embargo_termination_requests()
-    count = 0
-    for request in pending_embargo_termination_requests:
-        registration = models.Registration.objects.get(embargo_termination_approval=request)
-        if not registration.is_embargoed:
-            logger.warning("Registration {0} associated with this embargo termination request ({0}) is not embargoed.".format(
-                registration._id,
-                request._id
-            ))
-            continue
-        embargo = registration.embargo
-        if not embargo:
-            logger.warning("No Embargo associated with this embargo termination request ({0}) on Node: {1}".format(
-                request._id,
-                registration._id
-            ))
-            continue
-        else:
-            count += 1
-            logger.info("Ending the Embargo ({0}) of Registration ({1}) early. Making the registration and all of its children public now.".format(embargo._id, registration._id))
-            request._on_complete()
-            registration.reload()
-            assert registration.is_embargoed is False
-            assert registration.is_public is True
-    logger.info("Auto-approved {0} of {1} embargo termination requests".format(count, len(pending_embargo_termination_requests)))
+def approve_embargo_termination(registration):
+    request = registration.embargo_termination_approval
+    if not registration.is_embargoed:
+        logger.warning("Registration {0} associated with this embargo termination request ({1}) is not embargoed.".format(
+            registration._id,
+            request._id
+        ))
+        return
+    embargo = registration.embargo
+    if not embargo:
+        logger.warning("No Embargo associated with this embargo termination request ({0}) on Node: {1}".format(
+            request._id,
+            registration._id
+        ))
+        return
+    logger.info("Ending the Embargo ({0}) of Registration ({1}) early. Making the registration and all of its children public now.".format(embargo._id, registration._id))
+    request._on_complete()
+    registration.reload()
+    if registration.is_embargoed or not registration.is_public:
+        logger.error("Registration ({0}) is still {1} after ending its Embargo ({2}) early.".format(
+            registration._id,
+            'embargoed' if registration.is_embargoed else 'private',
+            embargo._id
+        ))
+        # Roll back this registration only, see `process_due_registrations`
+        raise RuntimeError('Embargo {0} was not ended'.format(embargo._id))
 
 @celery_app.task(name='scripts.approve_embargo_terminations')
 def run_main(dry_run=True):
@@ -6,7 +6,6 @@ import logging
 
 import django
 from django.utils import timezone
-from django.db import transaction
 django.setup()
 
 from framework.celery_tasks import app as celery_app
@@ -16,6 +15,7 @@ from website.app import init_app
 from website import settings
 
 from scripts import utils as scripts_utils
+from scripts.sanction_scheduler import get_due_registrations, process_due_registrations
 
 
 logger = logging.getLogger(__name__)
@@ -23,37 +23,31 @@ logging.basicConfig(level=logging.INFO)
 
 
 def main(dry_run=True):
-    approvals_past_pending = models.RegistrationApproval.objects.filter(
-        state=models.RegistrationApproval.UNAPPROVED,
-        initiation_date__lt=timezone.now() - settings.REGISTRATION_APPROVAL_TIME
+    approvals_past_pending = get_due_registrations(
+        'registration_approval',
+        models.RegistrationApproval.UNAPPROVED,
+        'initiation_date',
+        timezone.now() - settings.REGISTRATION_APPROVAL_TIME
     )
+    process_due_registrations(approvals_past_pending, approve_registration, 'approving registration', dry_run=dry_run)
 
-    for registration_approval in approvals_past_pending:
-        if dry_run:
-            logger.warn('Dry run mode')
-        pending_registration = models.Registration.objects.get(registration_approval=registration_approval)
-        logger.warn(
-            'RegistrationApproval {0} automatically approved by system. Making registration {1} public.'
-            .format(registration_approval._id, pending_registration._id)
-        )
-        if not dry_run:
-            if pending_registration.is_deleted:
-                # Clean up any registration failures during archiving
-                registration_approval.forcibly_reject()
-                registration_approval.save()
-                continue
-            if pending_registration.archiving:
-                continue
 
-            with transaction.atomic():
-                try:
-                    # Ensure no `User` is associated with the final approval
-                    registration_approval._on_complete(None)
-                except Exception as err:
-                    logger.error(
-                        'Unexpected error raised when approving registration for '
-                        'registration {}. Continuing...'.format(pending_registration))
-                    logger.exception(err)
+def approve_registration(pending_registration):
+    registration_approval = pending_registration.registration_approval
+    logger.warn(
+        'RegistrationApproval {0} automatically approved by system. Making registration {1} public.'
+        .format(registration_approval._id, pending_registration._id)
+    )
+    if pending_registration.is_deleted:
+        # Clean up any registration failures during archiving
+        registration_approval.forcibly_reject()
+        registration_approval.save()
+        return
+    if pending_registration.archiving:
+        return
+
+    # Ensure no `User` is associated with the final approval
+    registration_approval._on_complete(None)
 
 
 @celery_app.task(name='scripts.approve_registrations')
@@ -7,16 +7,16 @@ import logging
 
 import django
 from django.utils import timezone
-from django.db import transaction
 django.setup()
 
 from framework.celery_tasks import app as celery_app
 
 from website.app import init_app
 from website import settings
-from osf.models import Embargo, Registration, NodeLog
+from osf.models import Embargo, NodeLog
 
 from scripts import utils as scripts_utils
+from scripts.sanction_scheduler import get_due_registrations, process_due_registrations
 
 
 logger = logging.getLogger(__name__)
@@ -24,87 +24,69 @@ logging.basicConfig(level=logging.INFO)
 
 
 def main(dry_run=True):
-    pending_embargoes = Embargo.objects.filter(state=Embargo.UNAPPROVED)
-    for embargo in pending_embargoes:
-        if should_be_embargoed(embargo):
-            if dry_run:
-                logger.warn('Dry run mode')
-            parent_registration = Registration.objects.get(embargo=embargo)
-            logger.warn(
-                'Embargo {0} approved. Activating embargo for registration {1}'
-                .format(embargo._id, parent_registration._id)
-            )
-            if not dry_run:
-                if parent_registration.is_deleted:
-                    # Clean up any registration failures during archiving
-                    embargo.forcibly_reject()
-                    embargo.save()
-                    continue
-
-                with transaction.atomic():
-                    try:
-                        embargo.state = Embargo.APPROVED
-                        parent_registration.registered_from.add_log(
-                            action=NodeLog.EMBARGO_APPROVED,
-                            params={
-                                'node': parent_registration.registered_from._id,
-                                'registration': parent_registration._id,
-                                'embargo_id': embargo._id,
-                            },
-                            auth=None,
-                        )
-                        embargo.save()
-                    except Exception as err:
-                        logger.error(
-                            'Unexpected error raised when activating embargo for '
-                            'registration {}. Continuing...'.format(parent_registration))
-                        logger.exception(err)
-
-    active_embargoes = Embargo.objects.filter(state=Embargo.APPROVED)
-    for embargo in active_embargoes:
-        if embargo.end_date < timezone.now():
-            if dry_run:
-                logger.warn('Dry run mode')
-            parent_registration = Registration.objects.get(embargo=embargo)
-            logger.warn(
-                'Embargo {0} complete. Making registration {1} public'
-                .format(embargo._id, parent_registration._id)
-            )
-            if not dry_run:
-                if parent_registration.is_deleted:
-                    # Clean up any registration failures during archiving
-                    embargo.forcibly_reject()
-                    embargo.save()
-                    continue
-
-                with transaction.atomic():
-                    try:
-                        embargo.state = Embargo.COMPLETED
-                        # Need to save here for node.is_embargoed to return the correct
-                        # value in Node#set_privacy
-                        embargo.save()
-                        for node in parent_registration.node_and_primary_descendants():
-                            node.set_privacy('public', auth=None, save=True)
-                        parent_registration.registered_from.add_log(
-                            action=NodeLog.EMBARGO_COMPLETED,
-                            params={
-                                'node': parent_registration.registered_from._id,
-                                'registration': parent_registration._id,
-                                'embargo_id': embargo._id,
-                            },
-                            auth=None,
-                        )
-                        embargo.save()
-                    except Exception as err:
-                        logger.error(
-                            'Unexpected error raised when completing embargo for '
-                            'registration {}. Continuing...'.format(parent_registration))
-                        logger.exception(err)
-
-
-def should_be_embargoed(embargo):
-    """Returns true if embargo was initiated more than 48 hours prior."""
-    return (timezone.now() - embargo.initiation_date) >= settings.EMBARGO_PENDING_TIME
+    now = timezone.now()
+    pending_embargoes = get_due_registrations(
+        'embargo', Embargo.UNAPPROVED, 'initiation_date', now - settings.EMBARGO_PENDING_TIME
+    )
+    process_due_registrations(pending_embargoes, activate_embargo, 'activating embargo', dry_run=dry_run)
+
+    active_embargoes = get_due_registrations('embargo', Embargo.APPROVED, 'end_date', now)
+    process_due_registrations(active_embargoes, complete_embargo, 'completing embargo', dry_run=dry_run)
+
+
+def activate_embargo(parent_registration):
+    embargo = parent_registration.embargo
+    logger.warn(
+        'Embargo {0} approved. Activating embargo for registration {1}'
+        .format(embargo._id, parent_registration._id)
+    )
+    if parent_registration.is_deleted:
+        # Clean up any registration failures during archiving
+        embargo.forcibly_reject()
+        embargo.save()
+        return
+
+    embargo.state = Embargo.APPROVED
+    parent_registration.registered_from.add_log(
+        action=NodeLog.EMBARGO_APPROVED,
+        params={
+            'node': parent_registration.registered_from._id,
+            'registration': parent_registration._id,
+            'embargo_id': embargo._id,
+        },
+        auth=None,
+    )
+    embargo.save()
+
+
+def complete_embargo(parent_registration):
+    embargo = parent_registration.embargo
+    logger.warn(
+        'Embargo {0} complete. Making registration {1} public'
+        .format(embargo._id, parent_registration._id)
+    )
+    if parent_registration.is_deleted:
+        # Clean up any registration failures during archiving
+        embargo.forcibly_reject()
+        embargo.save()
+        return
+
+    embargo.state = Embargo.COMPLETED
+    # Need to save here for node.is_embargoed to return the correct
+    # value in Node#set_privacy
+    embargo.save()
+    for node in parent_registration.node_and_primary_descendants():
+        node.set_privacy('public', auth=None, save=True)
+    parent_registration.registered_from.add_log(
+        action=NodeLog.EMBARGO_COMPLETED,
+        params={
+            'node': parent_registration.registered_from._id,
+            'registration': parent_registration._id,
+            'embargo_id': embargo._id,
+        },
+        auth=None,
+    )
+    embargo.save()
 
 
 @celery_app.task(name='scripts.embargo_registrations')
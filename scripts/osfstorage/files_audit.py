@@ -15,6 +15,7 @@ import os
 import math
 import hashlib
 import logging
+from itertools import islice
 
 import pyrax
 
@@ -33,6 +34,8 @@ from scripts.osfstorage import settings as storage_settings
 
 GLACIER_PART_SIZE = 4 * (1024 * 1024)  # 4MB
 GLACIER_SINGLE_OPERATION_THRESHOLD = 100 * (1024 * 1024)  # 100MB
+# Number of versions whose content hashes are looked up in archives at a time
+ARCHIVE_LOOKUP_BATCH_SIZE = 1000
 
 
 class Context(object):
@@ -114,10 +117,19 @@ def glacier_sync_multipart_upload(ctx, version, file_path, file_size):
     return response['archiveId']
 
 
-def ensure_glacier(ctx, version, dry_run):
+def ensure_glacier(ctx, version, dry_run, archives=None):
     if version.metadata.get('archive'):
         return
 
+    # The same content may already have been archived for another version, see `FileVersion.find_archives`
+    archive = (archives or {}).get(version.metadata.get('sha256'))
+    if archive:
+        logger.info('Glacier archive for version {0} found under another version'.format(version._id))
+        if not dry_run:
+            version.metadata['vault'], version.metadata['archive'] = archive
+            version.save()
+        return
+
     logger.warn('Glacier archive for version {0} not found'.format(version._id))
 
     if dry_run:
@@ -162,8 +174,8 @@ def ensure_parity(ctx, version, dry_run):
             logger.error('Parity files for version {0} not found after update'.format(version._id))
 
 
-def ensure_backups(ctx, version, dry_run):
-    ensure_glacier(ctx, version, dry_run)
+def ensure_backups(ctx, version, dry_run, archives=None):
+    ensure_glacier(ctx, version, dry_run, archives=archives)
     ensure_parity(ctx, version, dry_run)
     delete_temp_file(ctx, version)
 
@@ -183,11 +195,19 @@ def audit(ctx, targets, num_of_workers, worker_id, dry_run):
     target_iterator = targets.iterator()
     idx = 0
     last_progress = -1
-    for version in target_iterator:
-        if hash(version._id) % num_of_workers == worker_id:
+    while True:
+        batch = list(islice(target_iterator, ARCHIVE_LOOKUP_BATCH_SIZE))
+        if not batch:
+            break
+        versions = [version for version in batch if hash(version._id) % num_of_workers == worker_id]
+        archives = FileVersion.find_archives(
+            version.metadata['sha256'] for version in versions
+            if 'sha256' in version.metadata and not version.metadata.get('archive')
+        )
+        for version in versions:
             if version.size == 0:
                 continue
-            ensure_backups(ctx, version, dry_run)
+            ensure_backups(ctx, version, dry_run, archives=archives)
             idx += 1
             progress = int(idx / maxval * 100)
             if last_progress < 100 and last_progress < progress:
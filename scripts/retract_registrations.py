@@ -3,7 +3,6 @@
 import logging
 
 import django
-from django.db import transaction
 from django.utils import timezone
 django.setup()
 
@@ -15,6 +14,7 @@ from website import settings
 from osf.models import NodeLog, Retraction
 
 from scripts import utils as scripts_utils
+from scripts.sanction_scheduler import get_due_registrations, process_due_registrations
 
 
 logger = logging.getLogger(__name__)
@@ -22,49 +22,32 @@ logging.basicConfig(level=logging.INFO)
 
 
 def main(dry_run=True):
-    pending_retractions = Retraction.objects.filter(state=Retraction.UNAPPROVED)
-    for retraction in pending_retractions:
-        if should_be_retracted(retraction):
-            if dry_run:
-                logger.warn('Dry run mode')
-            try:
-                parent_registration = retraction.registrations.get()
-            except Exception as err:
-                logger.exception('Could not find registration associated with retraction {}'.format(retraction))
-                logger.error('Skipping...'.format(retraction))
-                continue
-
-            logger.warn(
-                'Retraction {0} approved. Retracting registration {1}'
-                .format(retraction._id, parent_registration._id)
-            )
-            if not dry_run:
-                with transaction.atomic():
-                    retraction.state = Retraction.APPROVED
-                    try:
-                        parent_registration.registered_from.add_log(
-                            action=NodeLog.RETRACTION_APPROVED,
-                            params={
-                                'node': parent_registration.registered_from._id,
-                                'registration': parent_registration._id,
-                                'retraction_id': parent_registration.retraction._id,
-                            },
-                            auth=Auth(parent_registration.retraction.initiated_by),
-                        )
-                        retraction.save()
-                        parent_registration.update_search()
-                        for node in parent_registration.get_descendants_recursive():
-                            node.update_search()
-                    except Exception as err:
-                        logger.error(
-                            'Unexpected error raised when retracting '
-                            'registration {}. Continuing...'.format(parent_registration))
-                        logger.exception(err)
-
-
-def should_be_retracted(retraction):
-    """Returns true if retraction was initiated more than 48 hours prior"""
-    return (timezone.now() - retraction.initiation_date) >= settings.RETRACTION_PENDING_TIME
+    pending_retractions = get_due_registrations(
+        'retraction', Retraction.UNAPPROVED, 'initiation_date', timezone.now() - settings.RETRACTION_PENDING_TIME
+    )
+    process_due_registrations(pending_retractions, retract_registration, 'retracting', dry_run=dry_run)
+
+
+def retract_registration(parent_registration):
+    retraction = parent_registration.retraction
+    logger.warn(
+        'Retraction {0} approved. Retracting registration {1}'
+        .format(retraction._id, parent_registration._id)
+    )
+    retraction.state = Retraction.APPROVED
+    parent_registration.registered_from.add_log(
+        action=NodeLog.RETRACTION_APPROVED,
+        params={
+            'node': parent_registration.registered_from._id,
+            'registration': parent_registration._id,
+            'retraction_id': retraction._id,
+        },
+        auth=Auth(retraction.initiated_by),
+    )
+    retraction.save()
+    parent_registration.update_search()
+    for node in parent_registration.get_descendants_recursive():
+        node.update_search()
 
 
 @celery_app.task(name='scripts.retract_registrations')
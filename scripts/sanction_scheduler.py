@@ -0,0 +1,61 @@
+"""Helpers for the nightly scripts that act on due sanctions (embargoes, retractions,
+registration approvals and embargo termination approvals).
+
+Due sanctions are selected with range queries on the indexed (state, initiation_date)
+and (state, end_date) columns, and the registration each sanction belongs to is joined
+in the same query. Registrations are fetched in batches ordered by primary key, and each
+one is handled in its own transaction, so a failure only rolls back that registration.
+Handled sanctions leave the state they were selected by, so a script that is interrupted
+resumes where it stopped the next time it runs.
+"""
+import logging
+
+from django.apps import apps
+from django.db import transaction
+
+from scripts.utils import iter_batches
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+
+
+def get_due_registrations(sanction_field, state, date_field, due_before):
+    """Return the registrations whose sanction `sanction_field` is in `state` with
+    `date_field` before `due_before`, with the sanction and the registered node joined.
+
+    :param str sanction_field: Name of the sanction foreign key on `Registration`, e.g. 'embargo'
+    :param str state: Sanction state, e.g. `Sanction.UNAPPROVED`
+    :param str date_field: 'initiation_date' or 'end_date'
+    :param datetime due_before: Sanctions dated up to this time are due
+    """
+    Registration = apps.get_model('osf.Registration')
+    return Registration.objects.filter(**{
+        '{}__state'.format(sanction_field): state,
+        '{}__{}__lte'.format(sanction_field, date_field): due_before,
+    }).select_related(sanction_field, 'registered_from').order_by('pk')
+
+
+def process_due_registrations(registrations, handler, description, dry_run=True, batch_size=BATCH_SIZE):
+    """Call `handler(registration)` on every registration, each in its own transaction.
+    Errors are logged and the registration is skipped. Returns the number of registrations handled.
+    """
+    count = failed = 0
+    for batch in iter_batches(registrations, batch_size=batch_size):
+        for registration in batch:
+            if dry_run:
+                logger.warn('Dry run mode: skipping {} for registration {}'.format(description, registration._id))
+                continue
+            try:
+                with transaction.atomic():
+                    handler(registration)
+            except Exception as err:
+                failed += 1
+                logger.error(
+                    'Unexpected error raised when {} for '
+                    'registration {}. Continuing...'.format(description, registration._id))
+                logger.exception(err)
+            else:
+                count += 1
+        logger.info('{}: {} registrations handled, {} failed so far'.format(description, count, failed))
+    return count
@@ -0,0 +1,30 @@
+"""Run every minute, this script pushes the nodes and preprints queued in the SHARE outbox
+(see `osf.models.QueuedShareUpdate`) to SHARE.
+"""
+import logging
+
+import django
+django.setup()
+
+from framework.celery_tasks import app as celery_app
+
+from website.app import init_app
+
+from scripts.share_pipeline import send_queued_updates
+from scripts.utils import add_file_logger
+
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def main(dry_run=True):
+    send_queued_updates(dry_run=dry_run)
+
+
+@celery_app.task(name='scripts.send_queued_share_updates')
+def run_main(dry_run=True):
+    init_app(routes=False)
+    if not dry_run:
+        add_file_logger(logger, __file__)
+    main(dry_run=dry_run)
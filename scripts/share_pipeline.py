@@ -0,0 +1,162 @@
+"""Helpers to push nodes and preprints to SHARE in bulk.
+
+`send_queued_updates` sends the objects queued in the `QueuedShareUpdate` outbox, and
+`backfill` sends every object of a queryset. Both load objects a batch at a time, with the
+relations their SHARE payload is built from prefetched, and POST over one `requests.Session`
+so that connections to SHARE are reused. Pushes that fail with a server error are retried
+from the outbox with an exponential backoff.
+"""
+import collections
+import logging
+import random
+
+import requests
+from django.apps import apps
+from django.utils import timezone
+
+from scripts.utils import iter_batches
+from website import settings
+from website.preprints import tasks as preprint_tasks
+from website.project import tasks as project_tasks
+
+logger = logging.getLogger(__name__)
+
+
+def _push_node(node, session, old_subjects=None, share_type=None):
+    data = project_tasks.serialize_share_node_data(node)
+    return project_tasks.send_share_node_data(data, session=session)
+
+def _push_preprint(preprint, session, old_subjects=None, share_type=None):
+    preprint_tasks.check_share_access_token(preprint)
+    share_type = share_type or preprint.provider.share_publish_type
+    data = preprint_tasks.serialize_share_preprint_data(preprint, share_type, old_subjects or [])
+    return preprint_tasks.send_share_preprint_data(preprint, data, session=session)
+
+def _report_node_error(node, resp, attempts):
+    return project_tasks.send_desk_share_error(node, resp, attempts)
+
+def _report_preprint_error(preprint, resp, attempts):
+    return preprint_tasks.send_desk_share_preprint_error(preprint, resp, attempts)
+
+
+ShareKind = collections.namedtuple('ShareKind', ['model', 'prepare', 'push', 'send_error'])
+
+KINDS = {
+    'node': ShareKind(
+        model='osf.AbstractNode',
+        prepare=lambda queryset: queryset.prefetch_related('guids', 'tags', 'affiliated_institutions'),
+        push=_push_node,
+        send_error=_report_node_error,
+    ),
+    'preprint': ShareKind(
+        model='osf.PreprintService',
+        prepare=lambda queryset: queryset.select_related('node', 'provider').prefetch_related(
+            'guids', 'subjects', 'node__tags', 'node__affiliated_institutions'
+        ),
+        push=_push_preprint,
+        send_error=_report_preprint_error,
+    ),
+}
+
+
+def is_configured(kind):
+    """Whether objects of `kind` can be pushed to SHARE, as checked by `update_node_share`
+    and `update_preprint_share`."""
+    if not settings.SHARE_URL:
+        return False
+    return kind != 'node' or bool(settings.SHARE_API_TOKEN)
+
+
+def get_retry_countdown(attempts):
+    """Seconds to wait before retrying a push that failed `attempts` times, as for Celery retries."""
+    return (random.random() + 1) * min(60 + settings.CELERY_RETRY_BACKOFF_BASE ** attempts, 60 * 10)
+
+
+def push(kind, target, session, attempts=0, old_subjects=None, share_type=None):
+    """Push `target` to SHARE, and tell the support desk if that failed for good.
+
+    :param str kind: 'node' or 'preprint'
+    :param int attempts: Number of earlier failed pushes of `target`. Server errors are not
+        reported until there were `settings.SHARE_UPDATE_MAX_RETRIES` of them.
+    :return bool: False if the push failed with an error worth retrying
+    """
+    retry = attempts < settings.SHARE_UPDATE_MAX_RETRIES
+    try:
+        resp = KINDS[kind].push(target, session, old_subjects=old_subjects, share_type=share_type)
+    except Exception:
+        # Connection errors, or a provider without a SHARE token
+        logger.exception('Could not push {} {} to SHARE'.format(kind, target._id))
+        return not retry
+    try:
+        resp.raise_for_status()
+    except Exception:
+        if resp.status_code >= 500 and retry:
+            return False
+        KINDS[kind].send_error(target, resp, attempts)
+    return True
+
+
+def send_queued_updates(dry_run=True, batch_size=None):
+    """Push every object of the outbox that is due, and remove it from the outbox.
+
+    :return int: Number of objects pushed
+    """
+    if not settings.SHARE_URL:
+        logger.warning('SHARE_URL not set. Not pushing queued updates to SHARE.')
+        return 0
+    QueuedShareUpdate = apps.get_model('osf.QueuedShareUpdate')
+    due = QueuedShareUpdate.objects.filter(send_after__lte=timezone.now()).order_by('pk')
+    session = requests.Session()
+    sent = retried = 0
+    for batch in iter_batches(due, batch_size=batch_size or settings.SHARE_UPDATE_BATCH_SIZE):
+        by_kind = collections.defaultdict(list)
+        for update in batch:
+            by_kind[update.kind].append(update)
+        for kind, updates in by_kind.items():
+            model = apps.get_model(KINDS[kind].model)
+            targets = KINDS[kind].prepare(model.objects.filter(guids___id__in=[update.target_id for update in updates]))
+            targets = {target._id: target for target in targets}
+            for update in updates:
+                target = targets.get(update.target_id)
+                if dry_run:
+                    logger.info('Dry run mode: not pushing {} {} to SHARE'.format(kind, update.target_id))
+                elif target is None:
+                    # Deleted since it was queued
+                    update.dequeue()
+                elif push(kind, target, session, update.attempts, update.old_subjects, update.share_type):
+                    if not update.dequeue() and update.attempts:
+                        # Queued again while it was being pushed, that update starts afresh
+                        QueuedShareUpdate.objects.filter(id=update.id).update(attempts=0)
+                    sent += 1
+                else:
+                    update.reschedule(get_retry_countdown(update.attempts))
+                    retried += 1
+        logger.info('{} objects pushed to SHARE, {} to be retried so far'.format(sent, retried))
+    return sent
+
+
+def backfill(kind, queryset, dry_run=True, batch_size=None):
+    """Push every object of `queryset` to SHARE, in batches ordered by primary key.
+    Objects that SHARE fails to take are queued in the outbox to be retried.
+
+    :param str kind: 'node' or 'preprint'
+    :return int: Number of objects pushed
+    """
+    if not is_configured(kind):
+        logger.warning('SHARE is not configured. Not pushing {}s to SHARE.'.format(kind))
+        return 0
+    QueuedShareUpdate = apps.get_model('osf.QueuedShareUpdate')
+    queryset = KINDS[kind].prepare(queryset.order_by('pk'))
+    session = requests.Session()
+    sent = queued = 0
+    for batch in iter_batches(queryset, batch_size=batch_size or settings.SHARE_UPDATE_BATCH_SIZE):
+        for target in batch:
+            if dry_run:
+                logger.info('Dry run mode: not pushing {} {} to SHARE'.format(kind, target._id))
+            elif push(kind, target, session):
+                sent += 1
+            else:
+                QueuedShareUpdate.enqueue(kind, target._id, delay=timezone.timedelta(seconds=get_retry_countdown(0)))
+                queued += 1
+        logger.info('{} {}s pushed to SHARE, {} queued to be retried so far'.format(sent, kind, queued))
+    return sent
@@ -8,9 +8,11 @@ from nose.tools import *  # noqa
 
 from tests.base import OsfTestCase
 from osf_tests.factories import AuthUserFactory, NodeFactory, EmbargoTerminationApprovalFactory, RegistrationFactory, EmbargoFactory
-from osf.models import Sanction, Registration
+from osf.models import EmbargoTerminationApproval, Sanction, Registration
+from website import settings
 
-from scripts.approve_embargo_terminations import main, get_pending_embargo_termination_requests
+from scripts.approve_embargo_terminations import main
+from scripts.sanction_scheduler import get_due_registrations
 
 class TestApproveEmbargoTerminations(OsfTestCase):
 
@@ -53,10 +55,15 @@ class TestApproveEmbargoTerminations(OsfTestCase):
         embargo = EmbargoFactory()
         self.registration4 = RegistrationFactory(embargo=embargo)
 
-    def test_get_pending_embargo_termination_requests_returns_only_unapproved(self):
-        targets = get_pending_embargo_termination_requests()
+    def test_get_due_registrations_returns_only_unapproved(self):
+        targets = get_due_registrations(
+            'embargo_termination_approval',
+            EmbargoTerminationApproval.UNAPPROVED,
+            'initiation_date',
+            timezone.now() - settings.EMBARGO_TERMINATION_PENDING_TIME
+        )
         assert_equal(targets.count(), 1)
-        assert_equal(targets.first()._id, self.registration2.embargo_termination_approval._id)
+        assert_equal(targets.first().embargo_termination_approval._id, self.registration2.embargo_termination_approval._id)
 
     def test_main_auto_approves_embargo_termination_request(self):
         for node in self.registration2.node_and_primary_descendants():
@@ -67,3 +74,11 @@ class TestApproveEmbargoTerminations(OsfTestCase):
             node.reload()
             assert_true(node.is_public)
             assert_false(node.is_embargoed)
+
+    @mock.patch('osf.models.EmbargoTerminationApproval._on_complete', mock.Mock())
+    @mock.patch('scripts.approve_embargo_terminations.logger')
+    def test_main_logs_terminations_that_did_not_take_effect(self, mock_logger):
+        main()
+        assert_true(mock_logger.error.called)
+        self.registration2.reload()
+        assert_true(self.registration2.is_embargoed)
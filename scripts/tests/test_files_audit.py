@@ -107,6 +107,19 @@ class TestFilesAudit(OsfTestCase):
         ensure_glacier(self.ctx, version, dry_run=False)
         assert_false(self.ctx.vault.upload_archive.called)
 
+    @mock.patch('scripts.osfstorage.files_audit.download_from_cloudfiles')
+    def test_ensure_glacier_reuses_archive_of_same_content(self, mock_download):
+        FileVersionFactory(metadata={'sha256': 'samecontent', 'vault': 'the cloud', 'archive': 'erchiv'})
+        version = FileVersionFactory(metadata={'sha256': 'samecontent'})
+        archives = files_audit.FileVersion.find_archives([version.metadata['sha256']])
+        self.ctx.vault = mock.Mock()
+        ensure_glacier(self.ctx, version, dry_run=False, archives=archives)
+        assert_false(mock_download.called)
+        assert_false(self.ctx.vault.upload_archive.called)
+        version.reload()
+        assert_equal(version.metadata['archive'], 'erchiv')
+        assert_equal(version.metadata['vault'], 'the cloud')
+
     @mock.patch('os.remove')
     @mock.patch('scripts.osfstorage.files_audit.storage_utils.create_parity_files')
     @mock.patch('scripts.osfstorage.files_audit.download_from_cloudfiles')
@@ -163,3 +163,8 @@ class TestNodeCount(OsfTestCase):
         assert_equal(registered_projects['withdrawn_daily'], 0)
         assert_equal(registered_projects['embargoed_daily'], 0)
         assert_equal(registered_projects['embargoed_v2_daily'], 0)
+
+    def test_single_pass_matches_count_per_bucket(self):
+        summary = NodeSummary()
+        summary.single_pass = False
+        assert_equal(summary.get_events(self.date.date())[0], self.results)
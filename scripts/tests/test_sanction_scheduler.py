@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+import mock
+from django.utils import timezone
+from nose.tools import *  # noqa
+
+from tests.base import OsfTestCase
+from osf.models import Retraction
+from osf_tests.factories import RegistrationFactory, UserFactory
+
+from scripts.sanction_scheduler import get_due_registrations, process_due_registrations
+from scripts.utils import iter_batches
+
+
+class TestSanctionScheduler(OsfTestCase):
+
+    def setUp(self):
+        super(TestSanctionScheduler, self).setUp()
+        self.user = UserFactory()
+        self.registrations = []
+        for hours in [1, 49, 72]:
+            registration = RegistrationFactory(creator=self.user, is_public=True)
+            registration.retract_registration(self.user)
+            registration.save()
+            registration.retraction.initiation_date = timezone.now() - timedelta(hours=hours)
+            registration.retraction.save()
+            self.registrations.append(registration)
+
+    def get_due(self):
+        return get_due_registrations(
+            'retraction', Retraction.UNAPPROVED, 'initiation_date', timezone.now() - timedelta(hours=48)
+        )
+
+    def test_selects_only_due_registrations(self):
+        assert_equal(
+            [registration.pk for registration in self.get_due()],
+            sorted(registration.pk for registration in self.registrations[1:])
+        )
+
+    def test_registrations_are_fetched_with_their_sanction(self):
+        registration = self.get_due()[0]
+        with self.assertNumQueries(0):
+            assert_equal(registration.retraction.state, Retraction.UNAPPROVED)
+
+    def test_iter_batches(self):
+        batches = list(iter_batches(self.get_due(), batch_size=1))
+        assert_equal([len(batch) for batch in batches], [1, 1])
+
+    def test_errors_are_isolated(self):
+        first, second = self.get_due()
+
+        def handler(registration):
+            registration.retraction.state = Retraction.APPROVED
+            registration.retraction.save()
+            if registration.pk == first.pk:
+                raise ValueError()
+
+        assert_equal(process_due_registrations(self.get_due(), handler, 'testing', dry_run=False, batch_size=1), 1)
+        first.retraction.reload()
+        second.retraction.reload()
+        # The failed registration was rolled back
+        assert_equal(first.retraction.state, Retraction.UNAPPROVED)
+        assert_equal(second.retraction.state, Retraction.APPROVED)
+
+    def test_dry_run(self):
+        handler = mock.Mock()
+        assert_equal(process_due_registrations(self.get_due(), handler, 'testing'), 0)
+        assert_false(handler.called)
@@ -27,6 +27,20 @@ def add_file_logger(logger, script_name, suffix=None):
     logger.addHandler(file_handler)
 
 
+def iter_batches(queryset, batch_size):
+    """Yield lists of at most `batch_size` objects from `queryset`, paginating on the primary key.
+    `queryset` must be ordered by primary key.
+    """
+    last_pk = None
+    while True:
+        batch_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(batch_queryset[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
 class Progress(object):
     def __init__(self, bar_len=50, precision=1):
         self.bar_len = bar_len
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+
+import mock
+from django.db import connection
+from nose.tools import *  # noqa
+
+from framework import instrumentation
+from osf.models import OSFUser
+from osf_tests.factories import UserFactory
+from tests.base import OsfTestCase
+
+
+def test_fingerprint():
+    assert_equal(
+        instrumentation.fingerprint("SELECT * FROM osf_guid WHERE _id = 'abc12' AND id IN (1, 2, 3) LIMIT 21"),
+        'SELECT * FROM osf_guid WHERE _id = ? AND id IN (?) LIMIT ?'
+    )
+    assert_equal(
+        instrumentation.fingerprint('SELECT "T2"."id" FROM "osf_abstractnode" T2 WHERE "T2"."id" = 42'),
+        'SELECT "T2"."id" FROM "osf_abstractnode" T2 WHERE "T2"."id" = ?'
+    )
+
+
+def test_timer_outside_of_a_request():
+    with instrumentation.timer('serializer'):
+        pass
+    assert_is_none(instrumentation.get_metrics())
+
+
+class TestRequestInstrumentation(OsfTestCase):
+
+    def setUp(self):
+        super(TestRequestInstrumentation, self).setUp()
+        self.users = [UserFactory() for _ in range(3)]
+
+    def tearDown(self):
+        instrumentation.discard_request()
+        super(TestRequestInstrumentation, self).tearDown()
+
+    @mock.patch('website.settings.INSTRUMENT_REQUESTS', False)
+    def test_requests_are_not_instrumented_by_default(self):
+        instrumentation.start_request()
+        assert_is_none(instrumentation.get_metrics())
+        assert_is_none(instrumentation.finish_request('GET', '/', 200))
+
+    @mock.patch('website.settings.N_PLUS_ONE_QUERY_THRESHOLD', 3)
+    @mock.patch('website.settings.INSTRUMENT_REQUESTS', True)
+    def test_reports_queries_and_repeated_queries(self):
+        instrumentation.start_request()
+        for user in self.users:
+            OSFUser.objects.get(id=user.id)
+        OSFUser.objects.count()
+        report = instrumentation.finish_request('GET', '/users/', 200)
+        assert_equal(report['queries']['count'], 4)
+        assert_equal(len(report['queries']['repeated']), 1)
+        assert_equal(report['queries']['repeated'][0]['count'], 3)
+        assert_is_none(instrumentation.get_metrics())
+
+    @mock.patch('website.settings.INSTRUMENT_REQUESTS', True)
+    def test_nested_timers_are_counted_once(self):
+        instrumentation.start_request()
+        # Each timer reads the clock when it starts and when it stops
+        with mock.patch('framework.instrumentation.time') as mock_time:
+            mock_time.time.side_effect = [100, 101, 102, 103]
+            with instrumentation.timer('serializer'):
+                with instrumentation.timer('serializer'):
+                    pass
+        report = instrumentation.finish_request('GET', '/', 200)
+        assert_equal(report['timings']['serializer'], 3)
+
+    @mock.patch('website.settings.PROFILE_SAMPLE_INTERVAL', 0.001)
+    @mock.patch('website.settings.PROFILE_SAMPLE_RATE', 1)
+    @mock.patch('website.settings.INSTRUMENT_REQUESTS', False)
+    def test_sampled_requests_are_profiled(self):
+        instrumentation.start_request()
+        sampler = instrumentation.get_metrics().sampler
+        time.sleep(0.05)
+        with mock.patch.object(instrumentation.logger, 'info') as mock_info:
+            report = instrumentation.finish_request('GET', '/', 200)
+        assert_false(sampler.is_alive())
+        assert_true(sampler.stacks)
+        assert_true(any('test_sampled_requests_are_profiled' in stack for stack in sampler.stacks))
+        assert_is_none(report['profile'])
+        assert_equal(mock_info.call_count, 2)
+
+    @mock.patch('website.settings.INSTRUMENT_REQUESTS', True)
+    def test_reports_only_the_queries_of_the_request(self):
+        url = '/api/v1/profile/{}/'.format(self.users[0]._id)
+
+        def get_report():
+            with mock.patch.object(instrumentation.logger, 'info') as mock_info:
+                self.app.get(url)
+            return json.loads(mock_info.call_args[0][0])
+
+        get_report()
+        expected = get_report()['queries']['count']
+        assert_greater(expected, 0)
+
+        # Queries logged before the request, as by the previous request of this thread
+        connection.force_debug_cursor = True
+        try:
+            for user in self.users:
+                OSFUser.objects.get(id=user.id)
+        finally:
+            connection.force_debug_cursor = False
+
+        assert_equal(get_report()['queries']['count'], expected)
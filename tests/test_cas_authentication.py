@@ -2,6 +2,7 @@
 import furl
 import httpretty
 import mock
+import time
 from nose.tools import *  # flake8: noqa (PEP8 asserts)
 import unittest
 
@@ -205,6 +206,69 @@ class TestCASClient(OsfTestCase):
         assert 0
 
 
+class TestCASTokenCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = cas.CasTokenCache(max_size=2, ttl=60)
+        self.response = cas.CasResponse(
+            authenticated=True,
+            user='abc12',
+            attributes={'accessToken': 'token-a', 'accessTokenScope': {'osf.full_read'}}
+        )
+
+    def test_get_returns_cached_response(self):
+        self.cache.set('token-a', self.response)
+        resp = self.cache.get('token-a')
+        assert_true(resp.authenticated)
+        assert_equal(resp.user, 'abc12')
+        assert_equal(resp.attributes['accessToken'], 'token-a')
+        assert_equal(resp.attributes['accessTokenScope'], {'osf.full_read'})
+        assert_is_none(self.cache.get('token-b'))
+
+    def test_token_is_not_stored(self):
+        self.cache.set('token-a', self.response)
+        assert_not_in('token-a', self.cache._entries)
+        data = self.cache._entries.values()[0][1]
+        assert_not_in('accessToken', data['attributes'])
+
+    def test_unauthenticated_responses_are_not_cached(self):
+        self.cache.set('token-a', cas.CasResponse(authenticated=False))
+        assert_is_none(self.cache.get('token-a'))
+
+    def test_entries_expire(self):
+        self.cache.set('token-a', self.response)
+        with mock.patch('framework.auth.cas.time.time', return_value=time.time() + 61):
+            assert_is_none(self.cache.get('token-a'))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set('token-a', self.response)
+        self.cache.set('token-b', self.response)
+        self.cache.get('token-a')
+        self.cache.set('token-c', self.response)
+        assert_is_not_none(self.cache.get('token-a'))
+        assert_is_none(self.cache.get('token-b'))
+        assert_is_not_none(self.cache.get('token-c'))
+
+    def test_disabled_with_zero_ttl(self):
+        cache = cas.CasTokenCache(max_size=2, ttl=0)
+        cache.set('token-a', self.response)
+        assert_is_none(cache.get('token-a'))
+
+    @httpretty.activate
+    def test_revoking_token_invalidates_it(self):
+        client = cas.CasClient('http://accounts.test.test')
+        httpretty.register_uri(httpretty.POST, client.get_auth_token_revocation_url(), status=204)
+        with mock.patch('framework.auth.cas.get_token_cache', return_value=self.cache):
+            self.cache.set('token-a', self.response)
+            self.cache.set('token-b', self.response)
+            client.revoke_tokens({'token': 'token-a'})
+            assert_is_none(self.cache.get('token-a'))
+            assert_is_not_none(self.cache.get('token-b'))
+
+            client.revoke_application_tokens('fake_id', 'fake_secret')
+            assert_is_none(self.cache.get('token-b'))
+
+
 class TestCASTicketAuthentication(OsfTestCase):
 
     def setUp(self):
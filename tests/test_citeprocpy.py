@@ -1,9 +1,12 @@
 import os
 import json
+import mock
+from django.utils import timezone
 from nose.tools import *
 
+from api.citations import utils as citation_utils
 from api.citations.utils import render_citation
-from osf_tests.factories import UserFactory
+from osf_tests.factories import AuthUserFactory, ProjectFactory, UserFactory
 from tests.base import OsfTestCase
 from osf.models import OSFUser
 
@@ -13,6 +16,8 @@ class Node:
            'URL': 'localhost:5000/2nthu', 'issued': {'date-parts': [[2016, 12, 6]]},
            'title': u'The study of chocolate in its many forms', 'type': 'webpage', 'id': u'2nthu'}
     visible_contributors = ''
+    modified = timezone.now()
+    last_logged = None
 
 
 class TestCiteprocpy(OsfTestCase):
@@ -56,3 +61,38 @@ class TestCiteprocpy(OsfTestCase):
                 citation.append(citeprocpy)
                 print k
         assert(len(not_matches) == 0)
+
+
+class TestCitationCaching(OsfTestCase):
+
+    def setUp(self):
+        super(TestCitationCaching, self).setUp()
+        self.project = ProjectFactory(title='A study of caching')
+        citation_utils.style_registry.clear()
+
+    def test_styles_are_parsed_once(self):
+        with mock.patch('api.citations.utils.CitationStylesStyle', wraps=citation_utils.CitationStylesStyle) as parse_style:
+            citation_utils.style_registry.get('apa')
+            citation_utils.style_registry.get('apa')
+            citation_utils.style_registry.get('modern-language-association')
+        assert_equal(parse_style.call_count, 2)
+
+    def test_style_registry_evicts_least_recently_used(self):
+        registry = citation_utils.CitationStyleRegistry(max_size=1)
+        apa = registry.get('apa')
+        registry.get('modern-language-association')
+        assert_is_not(registry.get('apa'), apa)
+
+    def test_unknown_style_raises(self):
+        with assert_raises(ValueError):
+            citation_utils.style_registry.get('not-a-style')
+
+    def test_rendered_citation_is_cached_until_contributors_change(self):
+        citation = render_citation(self.project, 'apa')
+        with mock.patch('api.citations.utils._render_citation') as render:
+            assert_equal(render_citation(self.project, 'apa'), citation)
+            assert_false(render.called)
+
+        self.project.add_contributor(AuthUserFactory(fullname='Grace Hopper'), save=True)
+        assert_not_equal(render_citation(self.project, 'apa'), citation)
+        assert_in('Hopper', render_citation(self.project, 'apa'))
@@ -2,6 +2,8 @@ import collections
 import mock
 from babel import dates, Locale
 from schema import Schema, And, Use, Or
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from nose.tools import *  # noqa PEP8 asserts
@@ -9,7 +11,7 @@ from nose.tools import *  # noqa PEP8 asserts
 from framework.auth import Auth
 from osf.models import Comment, NotificationDigest, NotificationSubscription, Guid, OSFUser
 
-from website.notifications.tasks import get_users_emails, send_users_email, group_by_node, remove_notifications
+from website.notifications.tasks import get_users_emails, get_users_emails_batches, send_users_email, group_by_node, remove_notifications
 from website.notifications import constants
 from website.notifications import emails
 from website.notifications import utils
@@ -1240,6 +1242,51 @@ class TestCompileSubscriptions(NotificationTestCase):
         subs = emails.compile_subscriptions(node5, 'file_updated')
         assert_equal(subs, {'email_transactional': [], 'email_digest': [self.user_1._id], 'none': []})
 
+    def test_file_subscription_overrides_node_subscription(self):
+        self.base_sub.email_transactional.add(self.user_1)
+        self.base_sub.save()
+        file_sub = factories.NotificationSubscriptionFactory(
+            _id=self.shared_node._id + '_xyz42_file_updated',
+            node=self.shared_node,
+            event_name='xyz42_file_updated'
+        )
+        file_sub.save()
+        file_sub.email_digest.add(self.user_1)
+        file_sub.save()
+        subs = emails.compile_subscriptions(self.shared_node, 'file_updated', 'xyz42_file_updated')
+        assert_equal(subs, {'email_transactional': [], 'email_digest': [self.user_1._id], 'none': []})
+
+    def test_disabled_user_not_listed(self):
+        self.base_sub.email_transactional.add(self.user_2)
+        self.base_sub.save()
+        self.user_2.disable_account()
+        self.user_2.save()
+        subs = emails.compile_subscriptions(self.shared_node, 'file_updated')
+        assert_equal(subs, {'email_transactional': [], 'email_digest': [], 'none': []})
+
+    def test_query_count_does_not_grow_with_depth_or_subscribers(self):
+        self.base_sub.email_transactional.add(self.user_1, self.user_2, self.user_3)
+        self.base_sub.save()
+        with CaptureQueriesContext(connection) as shallow:
+            emails.compile_subscriptions(self.shared_node, 'file_updated')
+
+        node = self.shared_node
+        for _ in range(4):
+            node = factories.NodeFactory(parent=node, creator=self.user_1)
+            node.add_contributor(self.user_4, permissions='read')
+            sub = factories.NotificationSubscriptionFactory(
+                _id=node._id + '_file_updated',
+                node=node,
+                event_name='file_updated'
+            )
+            sub.save()
+            sub.email_digest.add(self.user_4)
+            sub.save()
+        with CaptureQueriesContext(connection) as deep:
+            subs = emails.compile_subscriptions(node, 'file_updated')
+        assert_equal(subs['email_digest'], [self.user_4._id])
+        assert_equal(len(deep.captured_queries), len(shallow.captured_queries))
+
 
 class TestMoveSubscription(NotificationTestCase):
     def setUp(self):
@@ -1816,6 +1863,43 @@ class TestSendDigest(OsfTestCase):
         send_users_email(send_type)
         assert_false(mock_send_mail.called)
 
+    @mock.patch('website.mails.send_mail')
+    def test_send_users_email_in_batches(self, mock_send_mail):
+        send_type = 'email_transactional'
+        for user in (self.user_1, self.user_2):
+            factories.NotificationDigestFactory(
+                user=user,
+                send_type=send_type,
+                timestamp=timezone.now(),
+                message='Hello',
+                node_lineage=[self.project._id]
+            )
+        batches = list(get_users_emails_batches(send_type, batch_size=1))
+        assert_equal(len(batches), 2)
+        assert_equal([group['user_id'] for batch in batches for _, group in batch], [self.user_1._id, self.user_2._id])
+
+        with mock.patch('website.notifications.tasks.settings.NOTIFICATION_DIGEST_BATCH_SIZE', 1):
+            send_users_email(send_type)
+        assert_equal(mock_send_mail.call_count, 2)
+        assert_false(NotificationDigest.objects.filter(send_type=send_type).exists())
+
+    @mock.patch('website.mails.send_mail')
+    def test_send_users_email_removes_digests_of_each_user_once_sent(self, mock_send_mail):
+        send_type = 'email_transactional'
+        for user in (self.user_1, self.user_2):
+            factories.NotificationDigestFactory(
+                user=user,
+                send_type=send_type,
+                timestamp=timezone.now(),
+                message='Hello',
+                node_lineage=[self.project._id]
+            )
+        mock_send_mail.side_effect = [None, IOError('SMTP is down')]
+        with assert_raises(IOError):
+            send_users_email(send_type)
+        remaining = NotificationDigest.objects.filter(send_type=send_type)
+        assert_equal(list(remaining.values_list('user_id', flat=True)), [self.user_2.id])
+
     def test_remove_sent_digest_notifications(self):
         d = factories.NotificationDigestFactory(
             event='comment_replies',
@@ -5,12 +5,15 @@ import datetime as dt
 from nose.tools import *  # noqa (PEP8 asserts)
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from osf_tests.factories import (
     ProjectFactory,
     UserFactory,
     RegistrationFactory,
     NodeFactory,
     CollectionFactory,
+    CommentFactory,
 )
 from osf.models import NodeRelation
 from tests.base import OsfTestCase, get_default_metaschema
@@ -200,6 +203,9 @@ class TestNodeSerializers(OsfTestCase):
 
 class TestViewProject(OsfTestCase):
 
+    # Upper bound on the queries needed to build the project overview page
+    QUERY_BUDGET = 60
+
     def setUp(self):
         super(TestViewProject, self).setUp()
         self.user = UserFactory()
@@ -236,6 +242,71 @@ class TestViewProject(OsfTestCase):
         result = _view_project(self.node, Auth(self.user))
         assert_equal(result['node']['child_exists'], True)
 
+    def test_view_project_child_exists_for_component(self):
+        component = NodeFactory(creator=self.user, parent=self.node)
+        result = _view_project(component, Auth(self.user))
+        assert_equal(result['node']['child_exists'], False)
+        assert_equal(result['node']['node_type'], 'component')
+        assert_equal(result['node']['root_id'], self.node._id)
+        NodeFactory(creator=self.user, parent=component)
+        result = _view_project(component, Auth(self.user))
+        assert_equal(result['node']['child_exists'], True)
+
+    def test_view_project_counts_and_flags(self):
+        self.node.fork_node(Auth(self.user))
+        RegistrationFactory(project=self.node.fork_node(Auth(self.user)))
+        self.node.use_as_template(Auth(self.user))
+        ProjectFactory(creator=self.user).add_node_link(self.node, Auth(self.user), save=True)
+        CommentFactory(node=self.node, user=self.user)
+        result = _view_project(self.node, Auth(self.user))
+        assert_equal(result['node']['fork_count'], 2)
+        assert_equal(result['node']['templated_count'], 1)
+        assert_equal(result['node']['linked_nodes_count'], 1)
+        assert_true(result['node']['has_comments'])
+        assert_false(result['node']['children'])
+        assert_false(result['node']['has_published_preprint'])
+
+    def test_view_project_admin_on_parent(self):
+        admin = UserFactory()
+        self.node.add_contributor(admin, permissions=permissions.expand_permissions(permissions.ADMIN),
+                                  auth=Auth(self.user), save=True)
+        component = NodeFactory(creator=self.user, parent=self.node)
+        result = _view_project(component, Auth(admin))
+        assert_false(result['user']['is_contributor'])
+        assert_true(result['user']['is_admin_parent'])
+        assert_true(result['user']['has_read_permissions'])
+        assert_true(result['parent_node']['can_view'])
+        assert_true(result['parent_node']['is_contributor'])
+
+        stranger = UserFactory()
+        result = _view_project(component, Auth(stranger))
+        assert_false(result['user']['is_admin_parent'])
+        assert_false(result['user']['has_read_permissions'])
+        assert_false(result['parent_node']['can_view'])
+
+    def test_view_project_query_count_does_not_grow_with_project_size(self):
+        # Regression test: the project overview is built from a fixed number of queries
+        def count_queries(node):
+            _view_project(node, Auth(self.user))  # warm up per-process caches
+            with CaptureQueriesContext(connection) as ctx:
+                _view_project(node, Auth(self.user))
+            return len(ctx.captured_queries)
+
+        small = ProjectFactory(creator=self.user)
+        small_component = NodeFactory(creator=self.user, parent=small)
+        large = ProjectFactory(creator=self.user)
+        large_component = NodeFactory(creator=self.user, parent=NodeFactory(creator=self.user, parent=large))
+        for _ in range(5):
+            large.add_contributor(UserFactory(), auth=Auth(self.user), save=True)
+            NodeFactory(creator=self.user, parent=large)
+            large.fork_node(Auth(self.user))
+            CommentFactory(node=large, user=self.user)
+            ProjectFactory(creator=self.user).add_node_link(large, Auth(self.user), save=True)
+
+        assert_less_equal(count_queries(small), self.QUERY_BUDGET)
+        assert_equal(count_queries(large), count_queries(small))
+        assert_equal(count_queries(large_component), count_queries(small_component))
+
 
 
 class TestViewProjectEmbeds(OsfTestCase):
@@ -16,6 +16,7 @@ from framework.addons.utils import render_addon_capabilities
 from framework.celery_tasks import handlers as celery_task_handlers
 from framework.django import handlers as django_handlers
 from framework.flask import add_handlers, app
+from framework import instrumentation
 # Import necessary to initialize the root logger
 from framework.logging import logger as root_logger  # noqa
 from framework.postcommit_tasks import handlers as postcommit_handlers
@@ -55,6 +56,9 @@ def attach_handlers(app, settings):
     """Add callback handlers to ``app`` in the correct order."""
     # Add callback handlers to application
     add_handlers(app, django_handlers.handlers)
+    # Instrumentation goes after the Django handlers, which reset the query log it reads,
+    # and before the others, so that its after_request handler sees their queries
+    add_handlers(app, instrumentation.handlers)
     add_handlers(app, celery_task_handlers.handlers)
     add_handlers(app, transaction_handlers.handlers)
     add_handlers(app, postcommit_handlers.handlers)
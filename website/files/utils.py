@@ -1,11 +1,24 @@
 from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import ForeignKey
+from psycopg2._psycopg import AsIs
 
+# Link the copies of a batch of file nodes to the versions of their originals
+COPY_VERSIONS_SQL = """
+    INSERT INTO %(table)s (basefilenode_id, fileversion_id)
+    SELECT C.new_id, V.fileversion_id
+    FROM unnest(%(old_ids)s, %(new_ids)s) AS C(old_id, new_id)
+      JOIN %(table)s AS V ON V.basefilenode_id = C.old_id
+    ORDER BY V.id;
+"""
 
-def copy_files(src, target_node, parent=None, name=None):
+
+def copy_files(src, target_node, parent=None, name=None, batch_size=None):
     """Copy the files from src to the target node
     :param Folder src: The source to copy children from
     :param Node target_node: The node settings of the project to copy files to
     :param Folder parent: The parent of to attach the clone of src to, if applicable
+    :param int batch_size: Number of descendants copied at a time, see `copy_descendants`
     """
     assert not parent or not parent.is_file, 'Parent must be a folder'
 
@@ -21,12 +34,77 @@ def copy_files(src, target_node, parent=None, name=None):
         cloned.versions.add(*src.versions.all())
 
     if not src.is_file:
-        for child in src.children:
-            copy_files(child, target_node, parent=cloned)
+        cloned._copy_descendants(src, batch_size=batch_size)
 
     return cloned
 
 
+def copy_descendants(src, cloned, batch_size=None):
+    """Copy the live descendants of the folder src under its copy, cloned.
+
+    The tree is copied a level at a time. Each level is read, inserted with `bulk_create` and
+    linked to the versions of the originals `batch_size` nodes at a time, and only the ids of
+    the folders of one level are kept in memory, so trees of any size can be copied.
+
+    :return list: `_id`s of the copied files
+    """
+    from osf.models import TrashedFileNode
+    from website import settings
+
+    batch_size = batch_size or settings.FILE_COPY_BATCH_SIZE
+    model = src._meta.concrete_model
+    # As with `clone`, foreign keys other than the ones set below are not copied
+    fields = [
+        field.attname for field in model._meta.concrete_fields
+        if not isinstance(field, ForeignKey) and field.attname not in ('id', '_id', 'created', 'modified')
+    ]
+    live = model.objects.exclude(type__in=TrashedFileNode._typedmodels_subtypes).order_by('pk')
+
+    file_ids = []
+    # The ids of the folders of the level being copied, mapped to the ids of their copies
+    parents = {src.id: cloned.id}
+    while parents:
+        folders = {}
+        parent_ids = sorted(parents)
+        for i in range(0, len(parent_ids), batch_size):
+            level = live.filter(parent_id__in=parent_ids[i:i + batch_size])
+            last_pk = 0
+            while True:
+                originals = list(level.filter(pk__gt=last_pk)[:batch_size])
+                if not originals:
+                    break
+                last_pk = originals[-1].pk
+
+                copies = model.objects.bulk_create([
+                    original.__class__(
+                        node_id=cloned.node_id,
+                        parent_id=parents[original.parent_id],
+                        copied_from_id=original.id,
+                        **{attname: getattr(original, attname) for attname in fields}
+                    )
+                    for original in originals
+                ])
+
+                pairs = [(original.id, copy.id) for original, copy in zip(originals, copies) if copy.is_file]
+                if pairs:
+                    old_ids, new_ids = zip(*pairs)
+                    with connection.cursor() as cursor:
+                        cursor.execute(COPY_VERSIONS_SQL, {
+                            'table': AsIs(model.versions.through._meta.db_table),
+                            'old_ids': list(old_ids),
+                            'new_ids': list(new_ids),
+                        })
+
+                for original, copy in zip(originals, copies):
+                    if copy.is_file:
+                        file_ids.append(copy._id)
+                    else:
+                        folders[original.id] = copy.id
+        parents = folders
+
+    return file_ids
+
+
 class GenWrapper(object):
     """A Wrapper for MongoQuerySets
     Overrides __iter__ so for loops will always
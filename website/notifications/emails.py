@@ -1,6 +1,9 @@
+from collections import defaultdict
+
 from babel import dates, core, Locale
 
-from osf.models import AbstractNode, OSFUser, NotificationDigest, NotificationSubscription
+from osf.models import AbstractNode, Contributor, OSFUser, NotificationDigest, NotificationSubscription
+from osf.models.validators import validate_subscription_type
 
 from website import mails
 from website.notifications import constants
@@ -87,6 +90,7 @@ def store_emails(recipient_ids, notification_type, event, user, node, timestamp,
 
     if notification_type == 'none':
         return
+    validate_subscription_type(notification_type)
 
     # If `template` is not specified, default to using a template with name `event`
     template = '{template}.html.mako'.format(template=template or event)
@@ -95,71 +99,139 @@ def store_emails(recipient_ids, notification_type, event, user, node, timestamp,
     context['user'] = user
     node_lineage_ids = get_node_lineage(node) if node else []
 
-    for recipient_id in recipient_ids:
-        if recipient_id == user._id:
-            continue
-        recipient = OSFUser.load(recipient_id)
-        if recipient.is_disabled:
-            continue
+    recipients = OSFUser.objects.filter(
+        guids___id__in=[recipient_id for recipient_id in recipient_ids if recipient_id != user._id],
+        date_disabled__isnull=True,
+    )
+    digests = []
+    for recipient in recipients:
         context['localized_timestamp'] = localize_timestamp(timestamp, recipient)
         context['recipient'] = recipient
         message = mails.render_message(template, **context)
 
-        digest = NotificationDigest(
+        digests.append(NotificationDigest(
             timestamp=timestamp,
             send_type=notification_type,
             event=event,
             user=recipient,
             message=message,
             node_lineage=node_lineage_ids
-        )
-        digest.save()
+        ))
+    NotificationDigest.objects.bulk_create(digests)
 
 
-def compile_subscriptions(node, event_type, event=None, level=0):
-    """Recurse through node and parents for subscriptions.
+def compile_subscriptions(node, event_type, event=None):
+    """Compile the subscriptions of the node and its parents into the effective recipients.
+
+    A subscription on a node overrides the subscriptions of its parents, and a subscription to a
+    particular event (such as a file's file_updated) overrides the node's. Users must be able to
+    read the node they are subscribed on and the node the event happened on.
+    Runs a constant number of queries whatever the depth of the node or number of subscribers.
 
     :param node: current node
     :param event_type: Generally node_subscriptions_available
     :param event: Particular event such a file_updated that has specific file subs
-    :param level: How deep the recursion is
     :return: a dict of notification types with lists of users.
     """
-    subscriptions = check_node(node, event_type)
-    if event:
-        subscriptions = check_node(node, event)  # Gets particular event subscriptions
-        parent_subscriptions = compile_subscriptions(node, event_type, level=level + 1)  # get node and parent subs
-    elif node.parent_id:
-        parent_subscriptions = \
-            compile_subscriptions(AbstractNode.load(node.parent_id), event_type, level=level + 1)
-    else:
-        parent_subscriptions = check_node(None, event_type)
-    for notification_type in parent_subscriptions:
-        p_sub_n = parent_subscriptions[notification_type]
-        p_sub_n.extend(subscriptions[notification_type])
-        for nt in subscriptions:
-            if notification_type != nt:
-                p_sub_n = list(set(p_sub_n).difference(set(subscriptions[nt])))
-        if level == 0:
-            p_sub_n, removed = utils.separate_users(node, p_sub_n)
-        parent_subscriptions[notification_type] = p_sub_n
-    return parent_subscriptions
+    lineage = node.get_lineage()
+    levels = [(lineage_node, event_type) for lineage_node in lineage]
+    if event and event != event_type:
+        levels.append((node, event))
+
+    subscribers = get_subscribers(levels)
+    readable = get_readable_nodes(lineage, subscribers)
+    user_ids = {}
+
+    compiled = {key: set() for key in constants.NOTIFICATION_TYPES}
+    for level_node, level_event in levels:
+        level_subscribers = {key: set() for key in constants.NOTIFICATION_TYPES}
+        for notification_type, users in subscribers[(level_node.pk, level_event)].items():
+            for user_pk, user_id in users:
+                if level_node.pk in readable[user_pk]:
+                    level_subscribers[notification_type].add(user_pk)
+                    user_ids[user_pk] = user_id
+        for notification_type in compiled:
+            overridden = set().union(*[
+                users for nt, users in level_subscribers.items() if nt != notification_type
+            ])
+            compiled[notification_type] = (compiled[notification_type] | level_subscribers[notification_type]) - overridden
+
+    # Users must also be able to read the node the event happened on
+    return {
+        notification_type: [user_ids[user_pk] for user_pk in user_pks if node.pk in readable[user_pk]]
+        for notification_type, user_pks in compiled.items()
+    }
 
 
 def check_node(node, event):
     """Return subscription for a particular node and event."""
     node_subscriptions = {key: [] for key in constants.NOTIFICATION_TYPES}
     if node:
-        subscription = NotificationSubscription.load(utils.to_subscription_key(node._id, event))
-        for notification_type in node_subscriptions:
-            users = getattr(subscription, notification_type, [])
-            if users:
-                for user in users.exclude(date_disabled__isnull=False):
-                    if node.has_permission(user, 'read'):
-                        node_subscriptions[notification_type].append(user._id)
+        subscribers = get_subscribers([(node, event)])
+        readable = get_readable_nodes(node.get_lineage(), subscribers)
+        for notification_type, users in subscribers[(node.pk, event)].items():
+            node_subscriptions[notification_type] = [user_id for user_pk, user_id in users if node.pk in readable[user_pk]]
     return node_subscriptions
 
 
+def get_subscribers(levels):
+    """Fetch the active subscribers of several node subscriptions, one query per notification type.
+
+    :param levels: list of (node, event) pairs
+    :return: dict mapping (node pk, event) to a dict of notification types with lists of (user pk, user guid)
+    """
+    subscription_keys = {utils.to_subscription_key(level_node._id, level_event): (level_node.pk, level_event) for level_node, level_event in levels}
+    subscribers = {
+        level: {key: [] for key in constants.NOTIFICATION_TYPES}
+        for level in subscription_keys.values()
+    }
+    for notification_type in constants.NOTIFICATION_TYPES:
+        through = getattr(NotificationSubscription, notification_type).through
+        rows = through.objects.filter(
+            notificationsubscription___id__in=subscription_keys.keys(),
+            osfuser__date_disabled__isnull=True,
+        ).values_list('notificationsubscription___id', 'osfuser_id', 'osfuser__guids___id')
+        for subscription_key, user_pk, user_id in rows:
+            subscribers[subscription_keys[subscription_key]][notification_type].append((user_pk, user_id))
+    return subscribers
+
+
+def get_readable_nodes(lineage, subscribers):
+    """Work out which nodes of a lineage each subscriber may read, with a single query.
+
+    A user may read a node if they are a contributor with read permission on it, or an admin
+    on it or any of its parents (see `AbstractNode.has_permission`).
+
+    :param lineage: list of nodes from the top-most parent down, as returned by `get_lineage`
+    :param subscribers: as returned by `get_subscribers`
+    :return: defaultdict mapping user pk to the set of readable node pks
+    """
+    user_pks = {
+        user_pk for by_type in subscribers.values()
+        for users in by_type.values() for user_pk, user_id in users
+    }
+    readable = defaultdict(set)
+    if not user_pks:
+        return readable
+
+    permissions = defaultdict(dict)
+    contributors = Contributor.objects.filter(
+        user_id__in=user_pks,
+        node_id__in=[lineage_node.pk for lineage_node in lineage],
+    ).values_list('user_id', 'node_id', 'read', 'admin')
+    for user_pk, node_pk, read, admin in contributors:
+        permissions[user_pk][node_pk] = (read, admin)
+
+    for user_pk, node_permissions in permissions.items():
+        admin_parent = False
+        for lineage_node in lineage:
+            read, admin = node_permissions.get(lineage_node.pk, (False, False))
+            admin_parent = admin_parent or admin
+            if read or admin_parent:
+                readable[user_pk].add(lineage_node.pk)
+    return readable
+
+
 def get_user_subscriptions(user, event):
     if user.is_disabled:
         return {}
@@ -174,13 +246,7 @@ def get_node_lineage(node):
     """ Get a list of node ids in order from the node to top most project
         e.g. [parent._id, node._id]
     """
-    lineage = [node._id]
-
-    while node.parent_id:
-        node = node.parent_node
-        lineage = [node._id] + lineage
-
-    return lineage
+    return [lineage_node._id for lineage_node in node.get_lineage()]
 
 
 def get_settings_url(uid, user):
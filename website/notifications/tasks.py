@@ -1,8 +1,7 @@
 """
 Tasks for making even transactional emails consolidated.
 """
-import itertools
-
+from django.contrib.contenttypes.models import ContentType
 from django.db import connection
 
 from framework.celery_tasks import app as celery_app
@@ -10,6 +9,7 @@ from framework.sentry import log_exception
 from osf.models import OSFUser
 from osf.models import NotificationDigest
 from website import mails
+from website import settings
 from website.notifications.utils import NotificationsDict
 
 
@@ -17,28 +17,32 @@ from website.notifications.utils import NotificationsDict
 def send_users_email(send_type):
     """Find pending Emails and amalgamates them into a single Email.
 
+    Users are read NOTIFICATION_DIGEST_BATCH_SIZE at a time and the digests of a user are
+    removed as soon as their email has been handed off, so an interrupted run neither
+    sends them twice nor loses the digests of the users it did not get to.
+
     :param send_type
     :return:
     """
-    grouped_emails = get_users_emails(send_type)
-    for group in grouped_emails:
-        user = OSFUser.load(group['user_id'])
-        if not user:
-            log_exception()
-            continue
-        info = group['info']
-        notification_ids = [message['_id'] for message in info]
-        sorted_messages = group_by_node(info)
-        if sorted_messages:
-            if not user.is_disabled:
-                mails.send_mail(
-                    to_addr=user.username,
-                    mimetype='html',
-                    mail=mails.DIGEST,
-                    name=user.fullname,
-                    message=sorted_messages,
-                )
-            remove_notifications(email_notification_ids=notification_ids)
+    for batch in get_users_emails_batches(send_type):
+        users = OSFUser.objects.in_bulk([user_pk for user_pk, group in batch])
+        for user_pk, group in batch:
+            user = users.get(user_pk)
+            if not user:
+                log_exception()
+                continue
+            info = group['info']
+            sorted_messages = group_by_node(info)
+            if sorted_messages:
+                if not user.is_disabled:
+                    mails.send_mail(
+                        to_addr=user.username,
+                        mimetype='html',
+                        mail=mails.DIGEST,
+                        name=user.fullname,
+                        message=sorted_messages,
+                    )
+                remove_notifications(email_notification_ids=[message['_id'] for message in info])
 
 
 def get_users_emails(send_type):
@@ -62,29 +66,66 @@ def get_users_emails(send_type):
             }
         }
     """
+    for batch in get_users_emails_batches(send_type):
+        for user_pk, group in batch:
+            yield group
+
+
+def get_users_emails_batches(send_type, batch_size=None):
+    """Get the emails that need to be sent, a batch of users at a time.
+
+    Batches are paginated on the user's primary key rather than with an offset, so digests
+    removed while iterating do not shift the following pages.
+
+    :param send_type: from NOTIFICATION_TYPES
+    :param batch_size: number of users per batch, defaults to NOTIFICATION_DIGEST_BATCH_SIZE
+    :return: Iterable of lists of (user primary key, dict) tuples, the dicts being shaped
+        like the ones returned by get_users_emails
+    """
+    batch_size = batch_size or settings.NOTIFICATION_DIGEST_BATCH_SIZE
+    content_type_id = ContentType.objects.get_for_model(OSFUser).id
 
     sql = """
-    SELECT json_build_object(
-            'user_id', osf_guid._id,
-            'info', json_agg(
+    SELECT digests.user_id, json_build_object(
+            'user_id', (
+                SELECT osf_guid._id
+                FROM osf_guid
+                WHERE osf_guid.object_id = digests.user_id
+                AND osf_guid.content_type_id = %s
+                ORDER BY osf_guid.id ASC
+                LIMIT 1
+            ),
+            'info', digests.info
+        )
+    FROM (
+        SELECT nd.user_id, json_agg(
                 json_build_object(
                     'message', nd.message,
                     'node_lineage', nd.node_lineage,
                     '_id', nd._id
-                )
-            )
-        )
-    FROM osf_notificationdigest AS nd
-      LEFT JOIN osf_guid ON nd.user_id = osf_guid.object_id
-    WHERE send_type = %s
-    AND osf_guid.content_type_id = (SELECT id FROM django_content_type WHERE model = 'osfuser')
-    GROUP BY osf_guid.id
-    ORDER BY osf_guid.id ASC
+                ) ORDER BY nd.id ASC
+            ) AS info
+        FROM osf_notificationdigest AS nd
+        WHERE nd.send_type = %s
+        AND nd.user_id > %s
+        GROUP BY nd.user_id
+        ORDER BY nd.user_id ASC
+        LIMIT %s
+    ) AS digests
+    ORDER BY digests.user_id ASC
     """
 
-    with connection.cursor() as cursor:
-        cursor.execute(sql, [send_type, ])
-        return itertools.chain.from_iterable(cursor.fetchall())
+    last_user_pk = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [content_type_id, send_type, last_user_pk, batch_size])
+            batch = cursor.fetchall()
+        if not batch:
+            return
+        yield batch
+        if len(batch) < batch_size:
+            return
+        last_user_pk = batch[-1][0]
 
 
 def group_by_node(notifications, limit=15):
@@ -10,7 +10,7 @@ from framework.celery_tasks import app as celery_app
 from framework import sentry
 
 from website import settings, mails
-from website.util.share import GraphNode, format_contributor, format_subject
+from website.util.share import GraphNode, format_contributor, format_subject, walk_graph
 from website.identifiers.tasks import update_ezid_metadata_on_change
 from website.identifiers.utils import request_identifiers_from_ezid, parse_identifiers
 
@@ -33,12 +33,26 @@ def on_preprint_updated(preprint_id, update_share=True, share_type=None, old_sub
             sentry.log_exception()
             sentry.log_message(err.args[0])
     if update_share:
-        update_preprint_share(preprint, old_subjects, share_type)
+        queue_preprint_share(preprint, old_subjects, share_type)
+
+def queue_preprint_share(preprint, old_subjects=None, share_type=None):
+    """Push `preprint` to SHARE through the outbox, where repeated updates of it are coalesced.
+    Without Celery to run the outbox, push it right away.
+    """
+    if not (settings.USE_CELERY and settings.SHARE_UPDATE_OUTBOX):
+        return update_preprint_share(preprint, old_subjects, share_type)
+    if settings.SHARE_URL:
+        check_share_access_token(preprint)
+        QueuedShareUpdate = apps.get_model('osf.QueuedShareUpdate')
+        QueuedShareUpdate.enqueue(QueuedShareUpdate.PREPRINT, preprint._id, old_subjects=old_subjects, share_type=share_type)
+
+def check_share_access_token(preprint):
+    if not preprint.provider.access_token:
+        raise ValueError('No access_token for {}. Unable to send {} to SHARE.'.format(preprint.provider, preprint))
 
 def update_preprint_share(preprint, old_subjects=None, share_type=None):
     if settings.SHARE_URL:
-        if not preprint.provider.access_token:
-            raise ValueError('No access_token for {}. Unable to send {} to SHARE.'.format(preprint.provider, preprint))
+        check_share_access_token(preprint)
         share_type = share_type or preprint.provider.share_publish_type
         _update_preprint_share(preprint, old_subjects, share_type)
 
@@ -64,17 +78,6 @@ def _async_update_preprint_share(self, preprint_id, old_subjects, share_type):
     data = serialize_share_preprint_data(preprint, share_type, old_subjects)
     resp = send_share_preprint_data(preprint, data)
     try:
-        resp = requests.post('{}api/v2/normalizeddata/'.format(settings.SHARE_URL), json={
-            'data': {
-                'type': 'NormalizedData',
-                'attributes': {
-                    'tasks': [],
-                    'raw': None,
-                    'data': {'@graph': format_preprint(preprint, share_type, old_subjects)}
-                }
-            }
-        }, headers={'Authorization': 'Bearer {}'.format(preprint.provider.access_token), 'Content-Type': 'application/vnd.api+json'})
-        logger.debug(resp.content)
         resp.raise_for_status()
     except Exception as e:
         if resp.status_code >= 500:
@@ -99,8 +102,9 @@ def serialize_share_preprint_data(preprint, share_type, old_subjects):
         }
     }
 
-def send_share_preprint_data(preprint, data):
-    resp = requests.post('{}api/v2/normalizeddata/'.format(settings.SHARE_URL), json=data, headers={'Authorization': 'Bearer {}'.format(preprint.provider.access_token), 'Content-Type': 'application/vnd.api+json'})
+def send_share_preprint_data(preprint, data, session=None):
+    """POST `data` to SHARE, reusing the connections of the `requests.Session` `session` if given."""
+    resp = (session or requests).post('{}api/v2/normalizeddata/'.format(settings.SHARE_URL), json=data, headers={'Authorization': 'Bearer {}'.format(preprint.provider.access_token), 'Content-Type': 'application/vnd.api+json'})
     logger.debug(resp.content)
     return resp
 
@@ -108,13 +112,17 @@ def format_preprint(preprint, share_type, old_subjects=None):
     if old_subjects is None:
         old_subjects = []
     from osf.models import Subject
-    old_subjects = [Subject.objects.get(id=s) for s in old_subjects]
+    old_subjects = Subject.objects.filter(id__in=old_subjects) if old_subjects else []
+    # Read through `all()` to use relations prefetched by a bulk push
+    tag_names = [tag.name for tag in preprint.node.tags.all()]
+    subjects = list(preprint.subjects.all())
+    subject_ids = {s.id for s in subjects}
     preprint_graph = GraphNode(share_type, **{
         'title': preprint.node.title,
         'description': preprint.node.description or '',
         'is_deleted': (
             not preprint.verified_publishable or
-            preprint.node.tags.filter(name='qatest').exists()
+            'qatest' in tag_names
         ),
         # Note: Changing any preprint attribute that is pulled from the node, like title, will NOT bump
         # the preprint's date modified but will bump the node's date_modified.
@@ -145,36 +153,25 @@ def format_preprint(preprint, share_type, old_subjects=None):
 
     preprint_graph.attrs['tags'] = [
         GraphNode('throughtags', creative_work=preprint_graph, tag=GraphNode('tag', name=tag))
-        for tag in preprint.node.tags.values_list('name', flat=True) if tag
+        for tag in tag_names if tag
     ]
 
     current_subjects = [
         GraphNode('throughsubjects', creative_work=preprint_graph, is_deleted=False, subject=format_subject(s))
-        for s in preprint.subjects.all()
+        for s in subjects
     ]
     deleted_subjects = [
         GraphNode('throughsubjects', creative_work=preprint_graph, is_deleted=True, subject=format_subject(s))
-        for s in old_subjects if not preprint.subjects.filter(id=s.id).exists()
+        for s in old_subjects if s.id not in subject_ids
     ]
     preprint_graph.attrs['subjects'] = current_subjects + deleted_subjects
 
     to_visit.extend(format_contributor(preprint_graph, user, preprint.node.get_visible(user), i) for i, user in enumerate(preprint.node.contributors))
-    to_visit.extend(GraphNode('AgentWorkRelation', creative_work=preprint_graph, agent=GraphNode('institution', name=institution))
-                    for institution in preprint.node.affiliated_institutions.values_list('name', flat=True))
+    to_visit.extend(GraphNode('AgentWorkRelation', creative_work=preprint_graph, agent=GraphNode('institution', name=institution.name))
+                    for institution in preprint.node.affiliated_institutions.all())
 
-    visited = set()
     to_visit.extend(preprint_graph.get_related())
-
-    while True:
-        if not to_visit:
-            break
-        n = to_visit.pop(0)
-        if n in visited:
-            continue
-        visited.add(n)
-        to_visit.extend(list(n.get_related()))
-
-    return [node.serialize() for node in visited]
+    return [node.serialize() for node in walk_graph(to_visit)]
 
 
 @celery_app.task(ignore_results=True)
@@ -7,7 +7,7 @@ import requests
 from framework.celery_tasks import app as celery_app
 
 from website import settings, mails
-from website.util.share import GraphNode, format_contributor
+from website.util.share import GraphNode, format_contributor, walk_graph
 
 
 logger = logging.getLogger(__name__)
@@ -31,8 +31,29 @@ def on_node_updated(node_id, user_id, first_save, saved_fields, request_headers=
         need_update = False
 
     if need_update:
-        node.update_search()
-        update_node_share(node)
+        node.update_search(saved_fields=saved_fields)
+        queue_node_share(node)
+
+@celery_app.task(ignore_results=True)
+def check_node_spam(node_id, user_id, saved_fields, request_headers):
+    """Check the content of `saved_fields` with Akismet, off the request that saved them."""
+    AbstractNode = apps.get_model('osf.AbstractNode')
+    OSFUser = apps.get_model('osf.OSFUser')
+    node = AbstractNode.load(node_id)
+    user = OSFUser.load(user_id)
+    if not node or not user:
+        return
+    node.check_spam_and_save(user, saved_fields, request_headers)
+
+def queue_node_share(node):
+    """Push `node` to SHARE through the outbox, where repeated updates of it are coalesced.
+    Without Celery to run the outbox, push it right away.
+    """
+    if not (settings.USE_CELERY and settings.SHARE_UPDATE_OUTBOX):
+        return update_node_share(node)
+    if settings.SHARE_URL and settings.SHARE_API_TOKEN:
+        QueuedShareUpdate = apps.get_model('osf.QueuedShareUpdate')
+        QueuedShareUpdate.enqueue(QueuedShareUpdate.NODE, node._id)
 
 def update_node_share(node):
     # Wrapper that ensures share_url and token exist
@@ -75,8 +96,9 @@ def _async_update_node_share(self, node_id):
         else:
             send_desk_share_error(node, resp, self.request.retries)
 
-def send_share_node_data(data):
-    resp = requests.post('{}api/normalizeddata/'.format(settings.SHARE_URL), json=data, headers={'Authorization': 'Bearer {}'.format(settings.SHARE_API_TOKEN), 'Content-Type': 'application/vnd.api+json'})
+def send_share_node_data(data, session=None):
+    """POST `data` to SHARE, reusing the connections of the `requests.Session` `session` if given."""
+    resp = (session or requests).post('{}api/normalizeddata/'.format(settings.SHARE_URL), json=data, headers={'Authorization': 'Bearer {}'.format(settings.SHARE_API_TOKEN), 'Content-Type': 'application/vnd.api+json'})
     logger.debug(resp.content)
     return resp
 
@@ -92,9 +114,13 @@ def serialize_share_node_data(node):
         }
     }
 
-def format_node(node):
-    is_qa_node = bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(node.tags.all().values_list('name', flat=True))) \
+def is_qa_node(node, tag_names):
+    return bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(tag_names)) \
         or any(substring in node.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
+
+def format_node(node):
+    # Read through `all()` to use tags prefetched by a bulk push
+    is_qa = is_qa_node(node, [tag.name for tag in node.tags.all()])
     return [
         {
             '@id': '_:123',
@@ -104,18 +130,18 @@ def format_node(node):
         }, {
             '@id': '_:789',
             '@type': 'project',
-            'is_deleted': not node.is_public or node.is_deleted or node.is_spammy or is_qa_node
+            'is_deleted': not node.is_public or node.is_deleted or node.is_spammy or is_qa
         }
     ]
 
 def format_registration(node):
-    is_qa_node = bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(node.tags.all().values_list('name', flat=True))) \
-        or any(substring in node.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
+    tag_names = [tag.name for tag in node.tags.all()]
+    is_qa = is_qa_node(node, tag_names)
 
     registration_graph = GraphNode('registration', **{
         'title': node.title,
         'description': node.description or '',
-        'is_deleted': not node.is_public or node.is_deleted or is_qa_node,
+        'is_deleted': not node.is_public or node.is_deleted or is_qa,
         'date_published': node.registered_date.isoformat() if node.registered_date else None,
         'registration_type': node.registered_schema.first().name if node.registered_schema else None,
         'withdrawn': node.is_retracted,
@@ -128,26 +154,16 @@ def format_registration(node):
     ]
 
     registration_graph.attrs['tags'] = [
-        GraphNode('throughtags', creative_work=registration_graph, tag=GraphNode('tag', name=tag._id))
-        for tag in node.tags.all() or [] if tag._id
+        GraphNode('throughtags', creative_work=registration_graph, tag=GraphNode('tag', name=tag_name.lower()))
+        for tag_name in tag_names if tag_name
     ]
 
-    to_visit.extend(format_contributor(registration_graph, user, bool(user._id in node.visible_contributor_ids), i) for i, user in enumerate(node.contributors))
+    visible_contributor_ids = set(node.visible_contributor_ids)
+    to_visit.extend(format_contributor(registration_graph, user, user._id in visible_contributor_ids, i) for i, user in enumerate(node.contributors))
     to_visit.extend(GraphNode('AgentWorkRelation', creative_work=registration_graph, agent=GraphNode('institution', name=institution.name)) for institution in node.affiliated_institutions.all())
 
-    visited = set()
     to_visit.extend(registration_graph.get_related())
-
-    while True:
-        if not to_visit:
-            break
-        n = to_visit.pop(0)
-        if n in visited:
-            continue
-        visited.add(n)
-        to_visit.extend(list(n.get_related()))
-
-    return [node_.serialize() for node_ in visited]
+    return [node_.serialize() for node_ in walk_graph(to_visit)]
 
 def send_desk_share_error(node, resp, retries):
     mails.send_mail(
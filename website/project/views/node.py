@@ -9,7 +9,8 @@ from itertools import islice
 from flask import request
 from django.apps import apps
 from django.core.exceptions import ValidationError
-from django.db.models import Q, OuterRef, Exists, Subquery
+from django.db.models import Count, Exists, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 
 from framework import status
 from framework.utils import iso8601format
@@ -633,24 +634,91 @@ def _should_show_wiki_widget(node, contributor):
         return has_wiki and wiki_page and wiki_page.html(node)
 
 
+def _get_overview_node(node, bookmark_collection=None):
+    """Fetch `node` for its overview page, annotated with the counts and flags the page shows
+    and with its contributors, so that building the page does not grow in queries with the
+    size of the project.
+    """
+    Comment = apps.get_model('osf.Comment')
+    DraftRegistration = apps.get_model('osf.DraftRegistration')
+    PreprintService = apps.get_model('osf.PreprintService')
+
+    def count(queryset, field):
+        return Coalesce(Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(count=Count('pk')).values('count'),
+            output_field=IntegerField()
+        ), 0)
+
+    annotations = {
+        'overview_fork_count': count(AbstractNode.objects.filter(is_deleted=False).exclude(type='osf.registration'), 'forked_from'),
+        'overview_templated_count': count(AbstractNode.objects.filter(is_deleted=False), 'template_node'),
+        'overview_linked_nodes_count': count(
+            NodeRelation.objects.filter(is_node_link=True).exclude(parent__type='osf.collection'), 'child'
+        ),
+        'overview_active_descendant_count': count(AbstractNode.objects.filter(is_deleted=False), 'root'),
+        'overview_has_children': Exists(NodeRelation.objects.filter(parent=OuterRef('pk'), child__is_deleted=False)),
+        'overview_has_comments': Exists(Comment.objects.filter(node=OuterRef('pk'))),
+        'overview_has_draft_registrations': Exists(DraftRegistration.objects.filter(
+            Q(branched_from=OuterRef('pk')) &
+            Q(deleted__isnull=True) &
+            (Q(registered_node=None) | Q(registered_node__is_deleted=True))
+        )),
+        'overview_has_published_preprint': Exists(PreprintService.objects.filter(node=OuterRef('pk'), is_published=True)),
+    }
+    if bookmark_collection:
+        annotations['overview_in_bookmark_collection'] = Exists(NodeRelation.objects.filter(
+            parent=bookmark_collection, child=OuterRef('pk'), is_node_link=True
+        ))
+    return AbstractNode.objects.filter(pk=node.pk).include('contributor__user__guids').annotate(**annotations).get()
+
+
 def _view_project(node, auth, primary=False,
                   embed_contributors=False, embed_descendants=False,
                   embed_registrations=False, embed_forks=False):
     """Build a JSON object containing everything needed to render
     project.view.mako.
     """
-    node = AbstractNode.objects.filter(pk=node.pk).include('contributor__user__guids').get()
     user = auth.user
-    try:
-        contributor = node.contributor_set.get(user=user)
-    except Contributor.DoesNotExist:
-        contributor = None
+    bookmark_collection = find_bookmark_collection(user) if user else None
+    node = _get_overview_node(node, bookmark_collection)
+    contributor = None
+    if user:
+        contributor = next((each for each in node.contributor_set.all() if each.user_id == user.id), None)
+
+    # Ancestors, closest first, and the user's permissions on them in one query each
+    ancestors = node.get_lineage()[-2::-1]
+    ancestor_permissions = {}
+    if user and ancestors:
+        ancestor_permissions = {
+            each.node_id: each
+            for each in Contributor.objects.filter(node__in=ancestors, user=user)
+        }
+
+    def can_view_ancestor(index, ancestor):
+        # Mirrors AbstractNode.can_view using the permissions fetched above
+        if getattr(auth.private_link, 'anonymous', False):
+            return ancestor.can_view(auth)
+        contrib = ancestor_permissions.get(ancestor.id)
+        return (
+            ancestor.is_public or
+            (bool(contrib) and contrib.read) or
+            any(getattr(ancestor_permissions.get(each.id), 'admin', False) for each in ancestors[index:]) or
+            (bool(auth.private_key) and auth.private_key in ancestor.private_link_keys_active)
+        )
+
+    parent = next((ancestor for index, ancestor in enumerate(ancestors) if can_view_ancestor(index, ancestor)), None)
+    is_admin_parent = bool(parent) and any(
+        getattr(ancestor_permissions.get(ancestor.id), 'admin', False)
+        for ancestor in ancestors[ancestors.index(parent):]
+    )
+    is_admin = bool(contributor) and contributor.admin
+    has_read_permissions = (bool(contributor) and contributor.read) or any(
+        each.admin for each in ancestor_permissions.values()
+    )
 
-    parent = node.find_readable_antecedent(auth)
     if user:
-        bookmark_collection = find_bookmark_collection(user)
         bookmark_collection_id = bookmark_collection._id
-        in_bookmark_collection = bookmark_collection.linked_nodes.filter(pk=node.pk).exists()
+        in_bookmark_collection = node.overview_in_bookmark_collection
     else:
         in_bookmark_collection = False
         bookmark_collection_id = ''
@@ -662,10 +730,10 @@ def _view_project(node, auth, primary=False,
     node_linked_preprint = node.linked_preprint
 
     disapproval_link = ''
-    if (node.is_pending_registration and node.has_permission(user, ADMIN)):
+    if (is_admin and node.is_pending_registration):
         disapproval_link = node.root.registration_approval.stashed_urls.get(user._id, {}).get('reject', '')
 
-    if (node.is_pending_embargo and node.has_permission(user, ADMIN)):
+    if (is_admin and node.is_pending_embargo):
         disapproval_link = node.root.embargo.stashed_urls.get(user._id, {}).get('reject', '')
 
     # Before page load callback; skip if not primary call
@@ -674,7 +742,6 @@ def _view_project(node, auth, primary=False,
             messages = addon.before_page_load(node, user) or []
             for message in messages:
                 status.push_status_message(message, kind='info', dismissible=False, trust=True)
-    NodeRelation = apps.get_model('osf.NodeRelation')
 
     is_registration = node.is_registration
     data = {
@@ -684,7 +751,7 @@ def _view_project(node, auth, primary=False,
             'title': node.title,
             'category': node.category_display,
             'category_short': node.category,
-            'node_type': node.project_or_component,
+            'node_type': 'component' if ancestors else 'project',
             'description': node.description or '',
             'license': serialize_node_license_record(node.license),
             'url': node.url,
@@ -699,8 +766,8 @@ def _view_project(node, auth, primary=False,
             'date_created': iso8601format(node.created),
             'date_modified': iso8601format(node.last_logged) if node.last_logged else '',
             'tags': list(node.tags.filter(system=False).values_list('name', flat=True)),
-            'children': node.nodes_active.exists(),
-            'child_exists': Node.objects.get_children(node, active=True).exists(),
+            'children': node.overview_has_children,
+            'child_exists': node.overview_active_descendant_count > 1 if node.root_id == node.pk else Node.objects.get_children(node, active=True).exists(),
             'is_registration': is_registration,
             'is_pending_registration': node.is_pending_registration if is_registration else False,
             'is_retracted': node.is_retracted if is_registration else False,
@@ -716,27 +783,27 @@ def _view_project(node, auth, primary=False,
             ),
             'registered_from_url': node.registered_from.url if is_registration else '',
             'registered_date': iso8601format(node.registered_date) if is_registration else '',
-            'root_id': node.root._id if node.root else None,
+            'root_id': (node._id if node.root_id == node.pk else node.root._id) if node.root_id else None,
             'registered_meta': node.registered_meta,
             'registered_schemas': serialize_meta_schemas(list(node.registered_schema.all())) if is_registration else False,
             'is_fork': node.is_fork,
             'forked_from_id': node.forked_from._primary_key if node.is_fork else '',
             'forked_from_display_absolute_url': node.forked_from.display_absolute_url if node.is_fork else '',
             'forked_date': iso8601format(node.forked_date) if node.is_fork else '',
-            'fork_count': node.forks.exclude(type='osf.registration').filter(is_deleted=False).count(),
+            'fork_count': node.overview_fork_count,
             'private_links': [x.to_json() for x in node.private_links_active],
             'link': view_only_link,
-            'templated_count': node.templated_list.count(),
-            'linked_nodes_count': NodeRelation.objects.filter(child=node, is_node_link=True).exclude(parent__type='osf.collection').count(),
+            'templated_count': node.overview_templated_count,
+            'linked_nodes_count': node.overview_linked_nodes_count,
             'anonymous': anonymous,
             'comment_level': node.comment_level,
-            'has_comments': node.comment_set.exists(),
+            'has_comments': node.overview_has_comments,
             'identifiers': {
                 'doi': node.get_identifier_value('doi'),
                 'ark': node.get_identifier_value('ark'),
             },
             'institutions': get_affiliated_institutions(node) if node else [],
-            'has_draft_registrations': node.has_active_draft_registrations,
+            'has_draft_registrations': node.overview_has_draft_registrations,
             'is_preprint': node.is_preprint,
             'has_moderated_preprint': node_linked_preprint.provider.reviews_workflow if node_linked_preprint else '',
             'preprint_state': node_linked_preprint.machine_state if node_linked_preprint else '',
@@ -746,7 +813,7 @@ def _view_project(node, auth, primary=False,
                 'workflow': node_linked_preprint.provider.reviews_workflow
             } if node_linked_preprint else {},
             'is_preprint_orphan': node.is_preprint_orphan,
-            'has_published_preprint': node.preprints.filter(is_published=True).exists() if node else False,
+            'has_published_preprint': node.overview_has_published_preprint,
             'preprint_file_id': node.preprint_file._id if node.preprint_file else None,
             'preprint_url': node.preprint_url
         },
@@ -760,21 +827,24 @@ def _view_project(node, auth, primary=False,
             'absolute_url': parent.absolute_url if parent else '',
             'registrations_url': parent.web_url_for('node_registrations') if parent else '',
             'is_public': parent.is_public if parent else '',
-            'is_contributor': parent.is_contributor(user) if parent else '',
-            'can_view': parent.can_view(auth) if parent else False,
+            'is_contributor': parent.id in ancestor_permissions if parent else '',
+            # The parent is the closest ancestor the user can view
+            'can_view': parent is not None,
         },
         'user': {
             'is_contributor': bool(contributor),
-            'is_admin': bool(contributor) and contributor.admin,
-            'is_admin_parent': parent.is_admin_parent(user) if parent else False,
+            'is_admin': is_admin,
+            'is_admin_parent': is_admin_parent,
             'can_edit': bool(contributor) and contributor.write and not node.is_registration,
             'can_edit_tags': bool(contributor) and contributor.write,
-            'has_read_permissions': node.has_permission(user, READ),
+            'has_read_permissions': has_read_permissions,
             'permissions': get_contributor_permissions(contributor, as_list=True) if contributor else [],
             'id': user._id if user else None,
             'username': user.username if user else None,
             'fullname': user.fullname if user else '',
-            'can_comment': bool(contributor) or node.can_comment(auth),
+            'can_comment': bool(contributor) or (
+                node.comment_level == 'public' and auth.logged_in and (node.is_public or has_read_permissions)
+            ),
             'show_wiki_widget': _should_show_wiki_widget(node, contributor),
             'dashboard_id': bookmark_collection_id,
             'institutions': get_affiliated_institutions(user) if user else [],
@@ -793,7 +863,7 @@ def _view_project(node, auth, primary=False,
     if embed_contributors and not anonymous:
         data['node']['contributors'] = utils.serialize_visible_contributors(node)
     else:
-        data['node']['contributors'] = list(node.contributors.values_list('guids___id', flat=True))
+        data['node']['contributors'] = [each.user._id for each in sorted(node.contributor_set.all(), key=lambda each: each._order)]
     if embed_descendants:
         descendants, all_readable = _get_readable_descendants(auth=auth, node=node)
         data['user']['can_sort'] = all_readable
@@ -15,11 +15,9 @@ import six
 
 from django.apps import apps
 from django.core.paginator import Paginator
-from django.db.models import Q
 from elasticsearch import (ConnectionError, Elasticsearch, NotFoundError,
                            RequestError, TransportError, helpers)
 from framework.celery_tasks import app as celery_app
-from framework.database import paginated
 from osf.models import AbstractNode
 from osf.models import OSFUser
 from osf.models import BaseFileNode
@@ -29,7 +27,7 @@ from website import settings
 from website.filters import profile_image_url
 from osf.models.licenses import serialize_node_license_record
 from website.search import exceptions
-from website.search.util import build_query, clean_splitters
+from website.search.util import build_query, clean_splitters, pop_dirty
 from website.util import sanitize
 from website.views import validate_page_num
 
@@ -66,6 +64,9 @@ ENGLISH_ANALYZER_PROPERTY = {'type': 'string', 'analyzer': 'english'}
 
 INDEX = settings.ELASTIC_INDEX
 
+# Number of file documents sent per bulk request when reindexing a node's files
+FILE_BULK_CHUNK_SIZE = 500
+
 CLIENT = None
 
 
@@ -316,17 +317,22 @@ def get_doctype_from_node(node):
         return node.category
 
 @celery_app.task(bind=True, max_retries=5, default_retry_delay=60)
-def update_node_async(self, node_id, index=None, bulk=False):
+def update_node_async(self, node_id, index=None, bulk=False, update_files=True, coalesced=False):
     AbstractNode = apps.get_model('osf.AbstractNode')
+    if coalesced:
+        # Updates recorded while this task was waiting are picked up by this run
+        update_files = pop_dirty('node', node_id) or update_files
     node = AbstractNode.load(node_id)
     try:
-        update_node(node=node, index=index, bulk=bulk, async=True)
+        update_node(node=node, index=index, bulk=bulk, async=True, update_files=update_files)
     except Exception as exc:
         self.retry(exc=exc)
 
 @celery_app.task(bind=True, max_retries=5, default_retry_delay=60)
-def update_user_async(self, user_id, index=None):
+def update_user_async(self, user_id, index=None, coalesced=False):
     OSFUser = apps.get_model('osf.OSFUser')
+    if coalesced:
+        pop_dirty('user', user_id)
     user = OSFUser.objects.get(id=user_id)
     try:
         update_user(user, index)
@@ -384,15 +390,16 @@ def serialize_node(node, category):
 
     return elastic_document
 
+def is_qa_node(node):
+    return bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(node.tags.all().values_list('name', flat=True))) or any(substring in node.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
+
 @requires_search
-def update_node(node, index=None, bulk=False, async=False):
-    from addons.osfstorage.models import OsfStorageFile
+def update_node(node, index=None, bulk=False, async=False, update_files=True):
     index = index or INDEX
-    for file_ in paginated(OsfStorageFile, Q(node=node)):
-        update_file(file_, index=index)
+    if update_files:
+        bulk_update_files(node, index=index)
 
-    is_qa_node = bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(node.tags.all().values_list('name', flat=True))) or any(substring in node.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
-    if node.is_deleted or not node.is_public or node.archiving or (node.is_spammy and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH) or node.is_quickfiles or is_qa_node:
+    if node.is_deleted or not node.is_public or node.archiving or (node.is_spammy and settings.SPAM_FLAGGED_REMOVE_FROM_SEARCH) or node.is_quickfiles or is_qa_node(node):
         delete_doc(node._id, node, index=index)
     else:
         category = get_doctype_from_node(node)
@@ -507,58 +514,128 @@ def update_user(user, index=None):
 
     client().index(index=index, doc_type='user', body=user_doc, id=user._id, refresh=True)
 
-@requires_search
-def update_file(file_, index=None, delete=False):
-    index = index or INDEX
+def files_are_searchable(node):
+    return node.is_public and not node.is_deleted and not node.archiving and not is_qa_node(node)
 
-    # TODO: Can remove 'not file_.name' if we remove all base file nodes with name=None
-    file_node_is_qa = bool(set(settings.DO_NOT_INDEX_LIST['tags']).intersection(file_.node.tags.all().values_list('name', flat=True))) or any(substring in file_.node.title for substring in settings.DO_NOT_INDEX_LIST['titles'])
-    if not file_.name or not file_.node.is_public or delete or file_.node.is_deleted or file_.node.archiving or file_node_is_qa:
-        client().delete(
-            index=index,
-            doc_type='file',
-            id=file_._id,
-            refresh=True,
-            ignore=[404]
-        )
-        return
+def serialize_file_node(node):
+    """Fields of a file document that come from its node; shared by all files of the node."""
+    return {
+        'node_url': '/{node_id}/'.format(node_id=node._id),
+        'node_title': node.title,
+        'parent_id': node.parent_node._id if node.parent_node else None,
+        'is_registration': node.is_registration,
+        'is_retracted': node.is_retracted,
+    }
+
+def serialize_file(file_, node_doc=None):
+    node_doc = node_doc or serialize_file_node(file_.node)
 
     # We build URLs manually here so that this function can be
     # run outside of a Flask request context (e.g. in a celery task)
-    file_deep_url = '/{node_id}/files/{provider}{path}/'.format(
-        node_id=file_.node._id,
+    file_deep_url = '{node_url}files/{provider}{path}/'.format(
+        node_url=node_doc['node_url'],
         provider=file_.provider,
         path=file_.path,
     )
-    node_url = '/{node_id}/'.format(node_id=file_.node._id)
 
-    guid_url = None
-    file_guid = file_.get_guid(create=False)
-    if file_guid:
-        guid_url = '/{file_guid}/'.format(file_guid=file_guid._id)
+    guids = list(file_.guids.all())
+    guid_url = '/{file_guid}/'.format(file_guid=guids[0]._id) if guids else None
     file_doc = {
         'id': file_._id,
         'deep_url': file_deep_url,
         'guid_url': guid_url,
-        'tags': list(file_.tags.filter(system=False).values_list('name', flat=True)),
+        'tags': [tag.name for tag in file_.tags.all() if not tag.system],
         'name': file_.name,
         'category': 'file',
-        'node_url': node_url,
-        'node_title': file_.node.title,
-        'parent_id': file_.node.parent_node._id if file_.node.parent_node else None,
-        'is_registration': file_.node.is_registration,
-        'is_retracted': file_.node.is_retracted,
         'extra_search_terms': clean_splitters(file_.name),
     }
+    file_doc.update(node_doc)
+    return file_doc
+
+@requires_search
+def update_file(file_, index=None, delete=False):
+    index = index or INDEX
+
+    # TODO: Can remove 'not file_.name' if we remove all base file nodes with name=None
+    if not file_.name or delete or not files_are_searchable(file_.node):
+        client().delete(
+            index=index,
+            doc_type='file',
+            id=file_._id,
+            refresh=True,
+            ignore=[404]
+        )
+        return
 
     client().index(
         index=index,
         doc_type='file',
-        body=file_doc,
+        body=serialize_file(file_),
         id=file_._id,
         refresh=True
     )
 
+@requires_search
+def bulk_update_files(node, index=None, file_ids=None):
+    """Index or remove every OsfStorage file of `node` through the bulk API, refreshing
+    once per chunk instead of once per file.
+
+    :param list file_ids: Only update the files with these `_id`s
+    """
+    from addons.osfstorage.models import OsfStorageFile
+    index = index or INDEX
+    searchable = files_are_searchable(node)
+    node_doc = serialize_file_node(node) if searchable else None
+
+    files = OsfStorageFile.objects.filter(node=node).order_by('pk')
+    if file_ids is not None:
+        files = files.filter(_id__in=file_ids)
+    if searchable:
+        files = files.prefetch_related('tags', 'guids')
+    else:
+        files = files.values_list('_id', flat=True)
+
+    def actions():
+        paginator = Paginator(files, FILE_BULK_CHUNK_SIZE)
+        for page_num in paginator.page_range:
+            for file_ in paginator.page(page_num).object_list:
+                if searchable and file_.name:
+                    yield {
+                        '_op_type': 'index',
+                        '_index': index,
+                        '_type': 'file',
+                        '_id': file_._id,
+                        '_source': serialize_file(file_, node_doc=node_doc),
+                    }
+                else:
+                    yield {
+                        '_op_type': 'delete',
+                        '_index': index,
+                        '_type': 'file',
+                        '_id': file_._id if searchable else file_,
+                    }
+
+    _, errors = helpers.bulk(client(), actions(), chunk_size=FILE_BULK_CHUNK_SIZE, refresh=True, raise_on_error=False)
+    # Deleting a file that was never indexed is fine
+    errors = [error for error in errors if error.get('delete', {}).get('status') != 404]
+    if errors:
+        logger.error('Failed to update {} search documents for files of node {}: {}'.format(len(errors), node._id, errors[:10]))
+
+@requires_search
+def bulk_delete_files(file_ids, index=None):
+    """Remove the search documents of the files with `_id`s `file_ids` through the bulk API."""
+    index = index or INDEX
+    actions = ({
+        '_op_type': 'delete',
+        '_index': index,
+        '_type': 'file',
+        '_id': file_id,
+    } for file_id in file_ids)
+    _, errors = helpers.bulk(client(), actions, chunk_size=FILE_BULK_CHUNK_SIZE, refresh=True, raise_on_error=False)
+    errors = [error for error in errors if error.get('delete', {}).get('status') != 404]
+    if errors:
+        logger.error('Failed to delete {} search documents of files: {}'.format(len(errors), errors[:10]))
+
 @requires_search
 def update_institution(institution, index=None):
     index = index or INDEX
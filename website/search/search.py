@@ -3,6 +3,7 @@ import logging
 from framework.celery_tasks.handlers import enqueue_task
 
 from website import settings
+from website.search import util as search_util
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +29,9 @@ def search(query, index=None, doc_type=None, raw=None):
 def update_node(node, index=None, bulk=False, async=True, saved_fields=None):
     kwargs = {
         'index': index,
-        'bulk': bulk
+        'bulk': bulk,
+        # Files only carry a few fields of their node, don't touch them unless one of those changed
+        'update_files': saved_fields is None or bool(node.FILE_SEARCH_UPDATE_FIELDS.intersection(saved_fields)),
     }
     if async:
         node_id = node._id
@@ -36,7 +39,13 @@ def update_node(node, index=None, bulk=False, async=True, saved_fields=None):
         # For example, when updating a Node's privacy, is_public must be True in the
         # database in order for method that updates the Node's elastic search document
         # to run correctly.
-        if settings.USE_CELERY:
+        if settings.USE_CELERY and settings.SEARCH_UPDATE_COALESCE_WINDOW:
+            # Repeated updates within the window are folded into the task that is already scheduled
+            if search_util.mark_dirty('node', node_id, files=kwargs['update_files']):
+                enqueue_task(search_engine.update_node_async.s(node_id=node_id, coalesced=True, **kwargs).set(
+                    countdown=settings.SEARCH_UPDATE_COALESCE_WINDOW
+                ))
+        elif settings.USE_CELERY:
             enqueue_task(search_engine.update_node_async.s(node_id=node_id, **kwargs))
         else:
             search_engine.update_node_async(node_id=node_id, **kwargs)
@@ -72,7 +81,12 @@ def update_user(user, index=None, async=True):
     index = index or settings.ELASTIC_INDEX
     if async:
         user_id = user.id
-        if settings.USE_CELERY:
+        if settings.USE_CELERY and settings.SEARCH_UPDATE_COALESCE_WINDOW:
+            if search_util.mark_dirty('user', user_id):
+                enqueue_task(search_engine.update_user_async.s(user_id, index=index, coalesced=True).set(
+                    countdown=settings.SEARCH_UPDATE_COALESCE_WINDOW
+                ))
+        elif settings.USE_CELERY:
             enqueue_task(search_engine.update_user_async.s(user_id, index=index))
         else:
             search_engine.update_user_async(user_id, index=index)
@@ -84,6 +98,16 @@ def update_file(file_, index=None, delete=False):
     index = index or settings.ELASTIC_INDEX
     search_engine.update_file(file_, index=index, delete=delete)
 
+@requires_search
+def bulk_update_files(node, file_ids=None, index=None):
+    index = index or settings.ELASTIC_INDEX
+    search_engine.bulk_update_files(node, index=index, file_ids=file_ids)
+
+@requires_search
+def bulk_delete_files(file_ids, index=None):
+    index = index or settings.ELASTIC_INDEX
+    search_engine.bulk_delete_files(file_ids, index=index)
+
 @requires_search
 def update_institution(institution, index=None):
     index = index or settings.ELASTIC_INDEX
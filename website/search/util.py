@@ -1,7 +1,14 @@
 import logging
 
+from django.core.cache import cache
+
+from website import settings
+
 logger = logging.getLogger(__name__)
 
+DIRTY_KEY = 'search-dirty:{}:{}'
+DIRTY_FILES_KEY = 'search-dirty-files:{}:{}'
+
 
 TITLE_WEIGHT = 4
 DESCRIPTION_WEIGHT = 1.2
@@ -53,3 +60,29 @@ def clean_splitters(text):
     if new_text == text:
         return ''
     return new_text
+
+
+def mark_dirty(doc_type, doc_id, files=False):
+    """Record a pending search update of a document, to be picked up by `pop_dirty`.
+
+    :param bool files: Whether the update must also reindex the document's files
+    :return bool: True if no update was pending yet, i.e. the caller must schedule one
+    """
+    # Outlive the scheduled task so repeated updates don't schedule another one, but
+    # expire eventually in case the task never runs
+    timeout = settings.SEARCH_UPDATE_COALESCE_WINDOW * 2
+    if files:
+        cache.set(DIRTY_FILES_KEY.format(doc_type, doc_id), True, timeout)
+    return cache.add(DIRTY_KEY.format(doc_type, doc_id), True, timeout)
+
+
+def pop_dirty(doc_type, doc_id):
+    """Clear the pending update of a document recorded by `mark_dirty`.
+
+    :return bool: Whether any of the coalesced updates asked for the files to be reindexed
+    """
+    cache.delete(DIRTY_KEY.format(doc_type, doc_id))
+    files_key = DIRTY_FILES_KEY.format(doc_type, doc_id)
+    files = cache.get(files_key, False)
+    cache.delete(files_key)
+    return files
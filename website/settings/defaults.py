@@ -98,6 +98,9 @@ SEARCH_ENGINE = 'elastic'  # Can be 'elastic', or None
 ELASTIC_URI = 'localhost:9200'
 ELASTIC_TIMEOUT = 10
 ELASTIC_INDEX = 'website'
+# Seconds during which repeated search updates of the same node or user are folded into one
+# indexing task. Needs a cache shared by web and worker processes; 0 disables coalescing.
+SEARCH_UPDATE_COALESCE_WINDOW = 0
 ELASTIC_KWARGS = {
     # 'use_ssl': False,
     # 'verify_certs': True,
@@ -170,6 +173,16 @@ NO_LOGIN_OSF4M_WAIT_TIME = timedelta(weeks=6)
 NEW_PUBLIC_PROJECT_WAIT_TIME = timedelta(hours=24)
 WELCOME_OSF4M_WAIT_TIME_GRACE = timedelta(days=12)
 
+# Number of users whose pending notification digests are loaded, mailed and removed at a time
+NOTIFICATION_DIGEST_BATCH_SIZE = 500
+
+# Number of file nodes read and inserted at a time when a file tree is copied, e.g. on fork
+FILE_COPY_BATCH_SIZE = 1000
+
+# Seconds during which page and user activity counter increments are buffered in each process
+# and merged before being written. 0 writes every increment immediately.
+ANALYTICS_COUNTER_FLUSH_INTERVAL = 0
+
 # TODO: Override in local.py
 MAILGUN_API_KEY = None
 
@@ -332,6 +345,14 @@ WATERBUTLER_URL = 'http://localhost:7777'
 WATERBUTLER_INTERNAL_URL = WATERBUTLER_URL
 WATERBUTLER_ADDRS = ['127.0.0.1']
 
+# Crawling an addon's file tree (archiving, file maps) lists up to FILE_TREE_CRAWLER_WORKERS folders
+# at once, and at most WATERBUTLER_METADATA_RATE_LIMIT folders per second per provider and process.
+# Failed listings are retried FILE_TREE_CRAWLER_RETRIES times, waiting BACKOFF * 2 ** attempt seconds.
+FILE_TREE_CRAWLER_WORKERS = 4
+FILE_TREE_CRAWLER_RETRIES = 3
+FILE_TREE_CRAWLER_BACKOFF = 1
+WATERBUTLER_METADATA_RATE_LIMIT = 5
+
 # Test identifier namespaces
 DOI_NAMESPACE = 'doi:10.5072/FK2'
 ARK_NAMESPACE = 'ark:99999/fk4'
@@ -348,8 +369,46 @@ SHARE_PREPRINT_PROVIDER_PREPEND = None
 SHARE_REGISTRATION_URL = ''
 SHARE_URL = None
 SHARE_API_TOKEN = None  # Required to send project updates to SHARE
+# Queue node and preprint updates in an outbox that `scripts.send_queued_share_updates` sends
+# to SHARE every minute, instead of sending each update as it happens. Only used with Celery.
+SHARE_UPDATE_OUTBOX = True
+# Seconds that a newly queued object waits in the outbox, to fold in further updates of it
+SHARE_UPDATE_COALESCE_WINDOW = 30
+# Objects pushed per outbox query, and per query of a bulk backfill
+SHARE_UPDATE_BATCH_SIZE = 100
+# Failed pushes are retried this many times before the support desk is told
+SHARE_UPDATE_MAX_RETRIES = 4
 
 CAS_SERVER_URL = 'http://localhost:8080'
+# Cache of CAS profile responses for OAuth2 bearer tokens, keyed by a hash of the token.
+# Set CAS_TOKEN_CACHE_TTL to 0 to always ask CAS.
+CAS_TOKEN_CACHE_SIZE = 1000
+CAS_TOKEN_CACHE_TTL = 60  # seconds
+# Optional Django cache alias shared between processes, e.g. 'default'
+CAS_TOKEN_CACHE_BACKEND = None
+
+# Request instrumentation, see framework.instrumentation
+# Log the query count, query time and section timings of every request
+INSTRUMENT_REQUESTS = False
+# A query run at least this many times in one request is reported as a likely N+1
+N_PLUS_ONE_QUERY_THRESHOLD = 10
+# Fraction of requests profiled by the stack sampler, e.g. 0.001
+PROFILE_SAMPLE_RATE = 0
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds
+# Directory the profiles are written to; None logs them
+PROFILE_OUTPUT_DIR = None
+
+# Django cache alias holding the GUID directory used to resolve short links, e.g. 'default'.
+# Must be shared between processes; None reads GUIDs from the database on every request.
+GUID_CACHE_BACKEND = None
+GUID_CACHE_TIMEOUT = 24 * 60 * 60  # seconds
+
+# Django cache alias used to tell other processes that the subject index is stale, e.g. 'default'.
+# Without one, each process rebuilds its subject index every SUBJECT_INDEX_TTL seconds.
+SUBJECT_INDEX_CACHE_BACKEND = None
+SUBJECT_INDEX_TTL = 5 * 60  # seconds
+# How often a process reads the shared generation of the subject index
+SUBJECT_INDEX_CHECK_INTERVAL = 5  # seconds
 MFR_SERVER_URL = 'http://localhost:7778'
 
 ###### ARCHIVER ###########
@@ -409,6 +468,7 @@ class CeleryConfig:
     med_pri_modules = {
         'framework.email.tasks',
         'scripts.send_queued_mails',
+        'scripts.send_queued_share_updates',
         'scripts.triggered_mails',
         'website.mailchimp_utils',
         'website.notifications.tasks',
@@ -476,6 +536,7 @@ class CeleryConfig:
         'scripts.approve_embargo_terminations',
         'scripts.triggered_mails',
         'scripts.send_queued_mails',
+        'scripts.send_queued_share_updates',
         'scripts.analytics.run_keen_summaries',
         'scripts.analytics.run_keen_snapshots',
         'scripts.analytics.run_keen_events',
@@ -558,6 +619,11 @@ class CeleryConfig:
                 'schedule': crontab(minute=0, hour=17),  # Daily 12 p.m.
                 'kwargs': {'dry_run': False},
             },
+            'send_queued_share_updates': {
+                'task': 'scripts.send_queued_share_updates',
+                'schedule': crontab(minute='*'),  # Every minute
+                'kwargs': {'dry_run': False},
+            },
             'prereg_reminder': {
                 'task': 'scripts.remind_draft_preregistrations',
                 'schedule': crontab(minute=0, hour=12),  # Daily 12 p.m.
@@ -1859,6 +1925,9 @@ SPAM_ACCOUNT_SUSPENSION_ENABLED = False
 SPAM_ACCOUNT_SUSPENSION_THRESHOLD = timedelta(hours=24)
 SPAM_FLAGGED_MAKE_NODE_PRIVATE = False
 SPAM_FLAGGED_REMOVE_FROM_SEARCH = False
+# Seconds an Akismet verdict is cached for, keyed by a hash of the checked content, so that
+# unchanged content is not submitted again. 0 disables the cache.
+SPAM_VERDICT_CACHE_TIMEOUT = 7 * 24 * 60 * 60
 
 SHARE_API_TOKEN = None
 
@@ -1909,4 +1978,10 @@ CUSTOM_CITATIONS = {
     'bluebook-inline': 'bluebook'
 }
 
+# Number of parsed citation styles kept in memory by each process
+CITATION_STYLE_REGISTRY_SIZE = 100
+# Seconds a rendered citation is cached for. Cache keys change whenever the node or its
+# contributors do, so this only bounds how long unused entries linger. 0 disables the cache.
+CITATION_CACHE_TIMEOUT = 24 * 60 * 60
+
 PREPRINTS_ASSETS = '/static/img/preprints_assets/'
@@ -1,4 +1,7 @@
 import uuid
+from collections import deque
+
+from website.util import api_v2_url
 
 
 class GraphNode(object):
@@ -33,6 +36,19 @@ class GraphNode(object):
         return dict(self.ref, **ser)
 
 
+def walk_graph(to_visit):
+    """Return the set of `GraphNode`s in `to_visit` and of all nodes related to them."""
+    to_visit = deque(to_visit)
+    visited = set()
+    while to_visit:
+        n = to_visit.popleft()
+        if n in visited:
+            continue
+        visited.add(n)
+        to_visit.extend(n.get_related())
+    return visited
+
+
 def format_user(user):
     person = GraphNode('person', **{
         'suffix': user.suffix,
@@ -69,6 +85,9 @@ def format_subject(subject, context=None):
         context = {}
     if subject is None:
         return None
+    if subject.is_indexed:
+        from osf.utils.subject_index import get_subject_index
+        return format_indexed_subject(get_subject_index(), subject.id, context)
     if subject.id in context:
         return context[subject.id]
     context[subject.id] = GraphNode(
@@ -80,3 +99,21 @@ def format_subject(subject, context=None):
     context[subject.id].attrs['parent'] = format_subject(subject.parent, context)
     context[subject.id].attrs['central_synonym'] = format_subject(subject.bepress_subject, context)
     return context[subject.id]
+
+
+def format_indexed_subject(index, subject_id, context):
+    """Same as `format_subject`, but reads the subject and its relatives from the subject index."""
+    subject = index.get(subject_id)
+    if subject is None:
+        return None
+    if subject.id in context:
+        return context[subject.id]
+    context[subject.id] = GraphNode(
+        'subject',
+        name=subject.text,
+        is_deleted=False,
+        uri=api_v2_url('taxonomies/{}/'.format(subject._id)),
+    )
+    context[subject.id].attrs['parent'] = format_indexed_subject(index, subject.parent_id, context)
+    context[subject.id].attrs['central_synonym'] = format_indexed_subject(index, subject.bepress_subject_id, context)
+    return context[subject.id]
@@ -11,7 +11,6 @@ from django.apps import apps
 from django.db.models import Count
 from flask import request, send_from_directory, Response, stream_with_context
 
-from framework import sentry
 from framework.auth import Auth
 from framework.auth.decorators import must_be_logged_in
 from framework.auth.forms import SignInForm, ForgotPasswordForm
@@ -23,7 +22,8 @@ from framework.auth.core import get_current_user_id
 from website import settings
 from website.institutions.views import serialize_institution
 
-from osf.models import BaseFileNode, Guid, Institution, PreprintService, AbstractNode, Node
+from osf.models import BaseFileNode, Institution, PreprintService, AbstractNode, Node
+from osf.utils import guid_cache
 from website.settings import EXTERNAL_EMBER_APPS, PROXY_EMBER_APPS, INSTITUTION_DISPLAY_NODE_THRESHOLD, DOMAIN
 from website.project.model import has_anonymous_link
 from website.util import permissions
@@ -240,34 +240,24 @@ def resolve_guid(guid, suffix=None):
     :param str suffix: Remainder of URL after the GUID
     :return: Return value of proxied view function
     """
-    try:
-        # Look up
-        guid_object = Guid.load(guid)
-    except KeyError as e:
-        if e.message == 'osfstorageguidfile':  # Used when an old detached OsfStorageGuidFile object is accessed
+    entry = guid_cache.resolve_guid(guid)
+    if entry:
+        if not entry.deep_url:
             raise HTTPError(http.NOT_FOUND)
+        model = entry.model
+        is_download = suffix and suffix.rstrip('/').lower() == 'download'
+
+        # Only downloads and preprints need the referent; everything else is proxied to its deep url
+        if is_download or (model and issubclass(model, PreprintService)):
+            referent = entry.get_referent()
+            if referent is None:
+                logger.error('Referent of GUID {0} not found'.format(guid))
+                raise HTTPError(http.NOT_FOUND)
         else:
-            raise e
-    if guid_object:
-        # verify that the object implements a GuidStoredObject-like interface. If a model
-        #   was once GuidStoredObject-like but that relationship has changed, it's
-        #   possible to have referents that are instances of classes that don't
-        #   have a deep_url attribute or otherwise don't behave as
-        #   expected.
-        if not hasattr(guid_object.referent, 'deep_url'):
-            sentry.log_message(
-                'Guid resolved to an object with no deep_url', dict(guid=guid)
-            )
-            raise HTTPError(http.NOT_FOUND)
-        referent = guid_object.referent
-        if referent is None:
-            logger.error('Referent of GUID {0} not found'.format(guid))
-            raise HTTPError(http.NOT_FOUND)
-        if not referent.deep_url:
-            raise HTTPError(http.NOT_FOUND)
+            referent = None
 
         # Handle file `/download` shortcut with supported types.
-        if suffix and suffix.rstrip('/').lower() == 'download':
+        if is_download:
             file_referent = None
             if isinstance(referent, PreprintService) and referent.primary_file:
                 if not referent.is_published:
@@ -303,12 +293,11 @@ def resolve_guid(guid, suffix=None):
 
             return send_from_directory(preprints_dir, 'index.html')
 
-        url = _build_guid_url(urllib.unquote(referent.deep_url), suffix)
+        url = _build_guid_url(urllib.unquote(entry.deep_url), suffix)
         return proxy_url(url)
 
     # GUID not found; try lower-cased and redirect if exists
-    guid_object_lower = Guid.load(guid.lower())
-    if guid_object_lower:
+    if guid_cache.resolve_guid(guid.lower()):
         return redirect(
             _build_guid_url(guid.lower(), suffix)
         )